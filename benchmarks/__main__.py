@@ -0,0 +1,109 @@
+"""Benchmark synthetic installations of several sizes.
+
+Every size runs in its own process, so the memory of one run does not
+count into the next one. The state write cost per entity type is measured
+in a process of its own too.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import subprocess
+import sys
+from typing import Any
+
+_COLUMNS = (
+    ("devices", "devices"),
+    ("entities", "entities"),
+    ("setup ms", "setup_ms"),
+    ("burst ms", "burst_ms"),
+    ("p50 ms", "latency.p50_ms"),
+    ("p90 ms", "latency.p90_ms"),
+    ("p99 ms", "latency.p99_ms"),
+    ("writes/frame", "state_writes_per_frame"),
+    ("lost", "lost_frames"),
+    ("MiB/1k entities", "rss_per_1000_entities_mib"),
+)
+
+
+def _field(result: dict[str, Any], path: str) -> Any:
+    """Value of a dotted path of the result."""
+    value: Any = result
+    for key in path.split("."):
+        value = value[key]
+    return value
+
+
+def _run(module: str, *args: str) -> dict[str, Any]:
+    """Result of one benchmark module, measured in a fresh process."""
+    output = subprocess.run(
+        [sys.executable, "-m", f"benchmarks.{module}", *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent.parent,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def _print_table(results: list[dict[str, Any]]) -> None:
+    """Results side by side, one row per size."""
+    widths = [max(len(title), 8) for title, _ in _COLUMNS]
+    print("  ".join(title.rjust(width) for (title, _), width in zip(_COLUMNS, widths)))
+    for result in results:
+        print(
+            "  ".join(
+                str(_field(result, path)).rjust(width)
+                for (_, path), width in zip(_COLUMNS, widths)
+            )
+        )
+
+    catalog = results[0]["catalog"]
+    print(f"\n{catalog['device_types']} device types", end="")
+    if catalog["uncovered_keys"]:
+        print(f", keys without a device: {', '.join(catalog['uncovered_keys'])}", end="")
+    print()
+
+
+def _print_state_writes(result: dict[str, Any]) -> None:
+    """State write cost per entity type, one row per type."""
+    print(f"\n{'entity type':>28}  {'attrs us':>8}  {'cached us':>9}  {'write us':>8}")
+    for name, costs in result["entity_types"].items():
+        print(
+            f"{name:>28}  {costs['update_attrs_us']:>8}  "
+            f"{costs['cached_write_us']:>9}  {costs['write_us']:>8}"
+        )
+
+
+def main() -> None:
+    """Run the sizes and report them."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--devices", type=int, nargs="+", default=[100, 500, 1000], metavar="N"
+    )
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument(
+        "--state-writes",
+        action="store_true",
+        help="also measure the state write cost per entity type",
+    )
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    args = parser.parse_args()
+
+    results = [
+        _run("installation", "--devices", str(devices), "--frames", str(args.frames))
+        for devices in args.devices
+    ]
+    _print_table(results)
+    report: Any = results
+    if args.state_writes:
+        state_writes = _run("state_writes")
+        _print_state_writes(state_writes)
+        report = {"installations": results, "state_writes": state_writes}
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Decoding of bus sensor values, the legacy decoder against bus_values.
+
+The legacy decoder is kept here as the reference: every sensor decoded its
+own value of the frame, walking its hex digits. The sensors of one array
+now share a BusValueArray, which decodes the array once per frame. The
+frames are the arrays of TI3-10B, of the CU3 unit RC3-610DALI and of
+ADC3-60M with random values and one sensor reporting an error, long
+arrays of two byte values and an array of eight byte values.
+
+numpy rounds values above 2**53 to a float before dividing them by 100, as
+the legacy decoder did. An exact division of the integer would differ from
+it in the last bit, so every path of bus_values rounds first as well.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import time
+from typing import Any
+
+from inelsmqtt.const import BUS_SENSOR_ERRORS
+from inelsmqtt.devices import Device
+
+from custom_components.inels.bus_values import BusValueArray
+from custom_components.inels.const import LOGGER
+from custom_components.inels.ha_mqtt import InelsHaMqtt
+
+from .catalog import build_catalog
+
+# device type -> state key of the array
+ARRAY_DEVICE_TYPES = {"157": "temps", "114": "temps", "156": "ains"}
+LONG_ARRAYS = (256, 4096)
+WIDE_VALUES = 64
+
+ERROR_CODE = 0x9
+
+
+def legacy_process_value(val: str) -> tuple[float, bool]:
+    """Value of a bus sensor and whether it reports an error, as decoded before."""
+    middle_fs = True
+    for k in val[1:-1]:
+        if k.capitalize() != "F":
+            middle_fs = False
+
+    if (
+        middle_fs
+        and val[0] == "7"
+        and ((val[-1] <= "F" and val[-1] >= "A") or val[-1] == "9")
+    ):
+        last = val[-1]
+        last = int(last, 16)
+        error = BUS_SENSOR_ERRORS.get(last)
+        if error is not None:
+            LOGGER.warning(error)
+            return (float(int(val, 16)) / 100, True)
+
+    return (float(int(val, 16)) / 100, False)
+
+
+def error_value(width: int, code: int = ERROR_CODE) -> str:
+    """Hex value of a sensor reporting the error code."""
+    return f"7{'F' * (width - 2)}{code:X}"
+
+
+def _device_arrays(rng: random.Random) -> dict[str, list[str]]:
+    """Arrays of the catalog devices, the first sensor reports an error."""
+    mqtt = InelsHaMqtt(None)  # type: ignore[arg-type]
+    arrays: dict[str, list[str]] = {}
+    for synthetic in build_catalog():
+        if (key := ARRAY_DEVICE_TYPES.get(synthetic.device_type)) is None:
+            continue
+        frame = b"".join(
+            f"{rng.randrange(256):02X}\n".encode()
+            for _ in synthetic.frames[0].splitlines()
+        )
+        state_topic = f"inels/status/000000000000/{synthetic.device_type}/000000"
+        mqtt.restore_value(state_topic, frame)
+        device = Device(mqtt, state_topic)  # type: ignore[arg-type]
+        values = list(getattr(device.state, key))
+        values[0] = error_value(len(values[0]))
+        arrays[f"{synthetic.inels_type} {key} ({len(values)})"] = values
+    return arrays
+
+
+def _legacy(values: list[str]) -> list[tuple[float, bool]]:
+    """Every sensor of the array decodes its own value."""
+    return [legacy_process_value(value) for value in values]
+
+
+def _shared(values: list[str]) -> list[tuple[float, bool]]:
+    """The sensors of the array read the array decoded once."""
+    array = BusValueArray()
+    # the library builds a new list for every frame
+    values = list(values)
+    return [array.get(values, index) for index in range(len(values))]
+
+
+def _time_us(decode: Any, values: list[str], rounds: int) -> float:
+    """Median duration of the decode of one frame in microseconds."""
+    durations: list[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        decode(values)
+        durations.append(time.perf_counter() - started)
+    return round(statistics.median(durations) * 1_000_000, 1)
+
+
+def run(rounds: int, seed: int) -> dict[str, Any]:
+    """Time both decoders on the same frames."""
+    rng = random.Random(seed)
+    arrays = _device_arrays(rng)
+    for count in LONG_ARRAYS:
+        arrays[f"{count} values"] = [
+            f"{rng.randrange(0x10000):04X}" for _ in range(count)
+        ]
+    arrays[f"{WIDE_VALUES} wide values"] = [
+        f"{rng.getrandbits(64):016X}" for _ in range(WIDE_VALUES)
+    ]
+
+    result: dict[str, Any] = {"rounds": rounds, "frames": {}}
+    for name, values in arrays.items():
+        result["frames"][name] = {
+            "same": _legacy(values) == _shared(values),
+            "legacy_us": _time_us(_legacy, values, rounds),
+            "shared_us": _time_us(_shared, values, rounds),
+        }
+    return result
+
+
+def main() -> None:
+    """Decode the frames and print the result as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # the error of every frame is logged by both decoders
+    logging.basicConfig(level=logging.CRITICAL)
+    print(json.dumps(run(args.rounds, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Synthetic devices covering the keys of all platforms."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+import json
+import logging
+from typing import Any
+
+from inelsmqtt.devices import Device
+from inelsmqtt.utils.core import ProtocolHandlerMapper
+
+from custom_components.inels.binary_sensor import INELS_BINARY_SENSOR_TYPES
+from custom_components.inels.button import INELS_BUTTON_INTERFACE, INELS_BUTTON_TYPES
+from custom_components.inels.climate import INELS_CLIMATE_TYPES
+from custom_components.inels.cover import INELS_SHUTTERS_TYPES
+from custom_components.inels.ha_mqtt import InelsHaMqtt
+from custom_components.inels.light import INELS_LIGHT_TYPES
+from custom_components.inels.number import INELS_NUMBER_TYPES
+from custom_components.inels.select import INELS_SELECT_TYPES
+from custom_components.inels.sensor import INELS_SENSOR_TYPES
+from custom_components.inels.switch import INELS_SWITCH_TYPES
+
+PLATFORM_KEYS: frozenset[str] = frozenset().union(
+    INELS_BINARY_SENSOR_TYPES,
+    INELS_BUTTON_TYPES,
+    INELS_CLIMATE_TYPES,
+    INELS_SHUTTERS_TYPES,
+    INELS_LIGHT_TYPES,
+    INELS_NUMBER_TYPES,
+    INELS_SELECT_TYPES,
+    INELS_SENSOR_TYPES,
+    INELS_SWITCH_TYPES,
+)
+
+# most positional protocols decode any number of lines above their minimum
+_MAX_LINES = 80
+_LINE_VALUES = ("00", "01", "FF", "7F")
+
+
+@dataclass(frozen=True)
+class SyntheticType:
+    """Device type with two frames which differ in the keys of its entities."""
+
+    device_type: str
+    inels_type: str
+    keys: frozenset[str]
+    frames: tuple[bytes, bytes]
+
+
+def _candidates() -> Iterable[bytes]:
+    """Frames tried for every device type."""
+    for addresses in (1, 8):
+        for value in (0, 1):
+            yield json.dumps(
+                {"state": {f"{addr:03}": value for addr in range(addresses)}}
+            ).encode()
+    for lines in range(1, _MAX_LINES):
+        for value in _LINE_VALUES:
+            yield f"{value}\n".encode() * lines
+
+
+def _decode(
+    mqtt: InelsHaMqtt, topic: str, frame: bytes
+) -> tuple[str, dict[str, str]] | None:
+    """Model and printable values of the platform keys the frame decodes to."""
+    mqtt.restore_value(topic, frame)
+    try:
+        device = Device(mqtt, topic)  # type: ignore[arg-type]
+        state = device.state
+    except Exception:  # pylint: disable=broad-except
+        return None
+    if not hasattr(state, "__dict__"):
+        return None
+    return device.inels_type, {
+        key: repr(value) for key, value in vars(state).items() if key in PLATFORM_KEYS
+    }
+
+
+def _synthetic_type(mqtt: InelsHaMqtt, device_type: str) -> SyntheticType | None:
+    """First two frames of the device type whose entity values differ."""
+    topic = f"inels/status/catalog/{device_type}/01"
+    first: tuple[bytes, dict[str, str]] | None = None
+    for frame in _candidates():
+        if (decoded := _decode(mqtt, topic, frame)) is None or not decoded[1]:
+            continue
+        inels_type, values = decoded
+        if first is None:
+            first = (frame, values)
+        elif values.keys() == first[1].keys() and values != first[1]:
+            return SyntheticType(
+                device_type, inels_type, frozenset(values), (first[0], frame)
+            )
+        elif values.keys() != first[1].keys():
+            # a longer frame decodes more channels, start over with it
+            first = (frame, values)
+    return None
+
+
+def build_catalog() -> list[SyntheticType]:
+    """Synthetic types of all device types the library can decode."""
+    mqtt = InelsHaMqtt(None)  # type: ignore[arg-type]
+    catalog: list[SyntheticType] = []
+    # the library logs every frame it cannot decode
+    library_logger = logging.getLogger("inelsmqtt")
+    level = library_logger.level
+    library_logger.setLevel(logging.CRITICAL)
+    try:
+        for device_type in ProtocolHandlerMapper.DEVICE_TYPE_MAP:
+            if (synthetic := _synthetic_type(mqtt, device_type)) is not None:
+                catalog.append(synthetic)
+    finally:
+        library_logger.setLevel(level)
+    return catalog
+
+
+def uncovered_keys(catalog: list[SyntheticType]) -> list[str]:
+    """Platform keys no synthetic type has."""
+    covered = frozenset().union(*(synthetic.keys for synthetic in catalog))
+    return sorted(PLATFORM_KEYS - covered)
+
+
+def uncovered_interfaces(catalog: list[SyntheticType]) -> list[str]:
+    """Models of the button interfaces no synthetic type has."""
+    covered = {
+        synthetic.inels_type for synthetic in catalog if "interface" in synthetic.keys
+    }
+    return sorted(set(INELS_BUTTON_INTERFACE) - covered)
+
+
+@dataclass(frozen=True)
+class SyntheticDevice:
+    """One device of the synthetic installation."""
+
+    state_topic: str
+    frames: tuple[bytes, bytes]
+
+
+def synthetic_devices(catalog: list[SyntheticType], count: int) -> list[SyntheticDevice]:
+    """Devices of the installation, cycling through the catalog."""
+    devices: list[SyntheticDevice] = []
+    for number in range(count):
+        synthetic = catalog[number % len(catalog)]
+        # one bus controller per 64 devices, as on larger sites
+        controller = f"{number // 64:012X}"
+        devices.append(
+            SyntheticDevice(
+                f"inels/status/{controller}/{synthetic.device_type}/{number:06X}",
+                synthetic.frames,
+            )
+        )
+    return devices
+
+
+def describe(catalog: list[SyntheticType]) -> dict[str, Any]:
+    """Summary of the catalog for the report."""
+    return {
+        "device_types": len(catalog),
+        "uncovered_keys": uncovered_keys(catalog),
+        "uncovered_interfaces": uncovered_interfaces(catalog),
+    }
@@ -0,0 +1,143 @@
+"""Click to publish latency of the paho transport.
+
+Every click toggles a relay and publishes its value either from the event
+loop, as the integration does, or with the blocking library call in the
+executor, as it did before. The paho client is a fake connected client and
+the broker acknowledges every frame after the round trip.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import time
+from typing import Any
+
+from inelsmqtt.devices import Device
+
+from homeassistant.core import HomeAssistant
+from homeassistant.runner import MAX_EXECUTOR_WORKERS
+
+from custom_components.inels.commands import async_publish_ha_value
+
+from .catalog import build_catalog
+from .fakes import FakePahoClient, fake_paho_transport
+from .harness import percentiles
+
+RELAY_DEVICE_TYPE = "02"
+
+_Publish = Callable[[HomeAssistant, Device, Any], Awaitable[Any]]
+
+
+async def _async_publish_executor(
+    hass: HomeAssistant, device: Device, value: Any
+) -> bool:
+    """Publish with the blocking library call."""
+    return await hass.async_add_executor_job(device.set_ha_value, value)
+
+
+_PATHS: dict[str, _Publish] = {
+    "loop": async_publish_ha_value,
+    "executor": _async_publish_executor,
+}
+
+
+def _relays(count: int, round_trip: float) -> list[Device]:
+    """Relays reporting their first frame, on one fake transport."""
+    synthetic = next(
+        synthetic
+        for synthetic in build_catalog()
+        if synthetic.device_type == RELAY_DEVICE_TYPE
+    )
+    mqtt = fake_paho_transport(round_trip)
+    relays: list[Device] = []
+    for number in range(count):
+        state_topic = f"inels/status/000000000000/{RELAY_DEVICE_TYPE}/{number:06X}"
+        mqtt.messages()[state_topic] = synthetic.frames[0]
+        relay = Device(mqtt, state_topic)
+        relay.get_value()
+        relays.append(relay)
+    return relays
+
+
+def _toggled(relay: Device) -> Any:
+    """State of the relay switched over, as a switch entity builds it."""
+    value = relay.state
+    value.simple_relay[0].is_on = not value.simple_relay[0].is_on
+    return value
+
+
+async def _async_measure_path(
+    hass: HomeAssistant, publish: _Publish, relays: list[Device], clicks: int
+) -> dict[str, Any]:
+    """Click the relays one by one, then all of them at once."""
+    client: FakePahoClient = relays[0].mqtt.client  # type: ignore[assignment]
+    to_publish: list[float] = []
+    to_done: list[float] = []
+    for number in range(clicks):
+        relay = relays[number % len(relays)]
+        published = len(client.published)
+        started = time.perf_counter()
+        await publish(hass, relay, _toggled(relay))
+        to_done.append(time.perf_counter() - started)
+        to_publish.append(client.published[published][2] - started)
+
+    # a scene switching every relay
+    published = len(client.published)
+    started = time.perf_counter()
+    await asyncio.gather(*(publish(hass, relay, _toggled(relay)) for relay in relays))
+    burst_done = time.perf_counter() - started
+    burst_published = max(sent for _, _, sent in client.published[published:]) - started
+
+    return {
+        "click_to_publish": percentiles(to_publish),
+        "click_to_done": percentiles(to_done),
+        "burst_published_ms": round(burst_published * 1000, 1),
+        "burst_done_ms": round(burst_done * 1000, 1),
+    }
+
+
+async def async_run(relays: int, clicks: int, round_trip: float) -> dict[str, Any]:
+    """Measure both publish paths on the same relays."""
+    loop = asyncio.get_running_loop()
+    # the executor of Home Assistant
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=MAX_EXECUTOR_WORKERS))
+    hass = HomeAssistant()
+    devices = _relays(relays, round_trip)
+    return {
+        "relays": relays,
+        "clicks": clicks,
+        "round_trip_ms": round(round_trip * 1000, 3),
+        **{
+            path: await _async_measure_path(hass, publish, devices, clicks)
+            for path, publish in _PATHS.items()
+        },
+    }
+
+
+def main() -> None:
+    """Run the clicks and print the result as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--relays", type=int, default=100)
+    parser.add_argument("--clicks", type=int, default=500)
+    parser.add_argument(
+        "--round-trip-ms",
+        type=float,
+        default=2,
+        help="acknowledgement delay of the broker (default 2)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    print(
+        json.dumps(
+            asyncio.run(async_run(args.relays, args.clicks, args.round_trip_ms / 1000))
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Fake broker transport serving synthetic devices."""
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from inelsmqtt import InelsMqtt
+from inelsmqtt.const import MQTT_HOST, MQTT_PORT
+from paho.mqtt.client import MQTT_ERR_SUCCESS
+
+from custom_components.inels.ha_mqtt import InelsHaMqtt
+
+
+class FakeInelsMqtt(InelsHaMqtt):
+    """Transport without a broker, frames are injected by the benchmark.
+
+    The integration and its streaming discovery see the same calls as with
+    the MQTT integration, published commands are only recorded.
+    """
+
+    def __init__(self, hass: Any) -> None:
+        """Initialize the transport."""
+        super().__init__(hass)
+        self.published: list[tuple[str, Any]] = []
+
+    @property
+    def is_available(self) -> bool:
+        """The fake broker is always connected."""
+        return True
+
+    async def async_connect(self) -> bool:
+        """There is nothing to wait for."""
+        return True
+
+    async def async_subscribe(self, topics: list[str]) -> None:
+        """Record the subscriptions."""
+        for topic in topics:
+            self._subscriptions.setdefault(topic, lambda: None)
+
+    async def async_publish(
+        self, topic: str, payload: Any, qos: int = 0, retain: bool = True
+    ) -> bool:
+        """Record the published command."""
+        self.published.append((topic, payload))
+        return True
+
+    def publish(
+        self, topic: str, payload: Any, qos: int = 0, retain: bool = True
+    ) -> bool:
+        """Record the published command."""
+        self.published.append((topic, payload))
+        return True
+
+    def inject(self, topic: str, payload: bytes) -> None:
+        """Receive a frame of the topic, must be called from the event loop."""
+        self._async_on_message(SimpleNamespace(topic=topic, payload=payload))
+
+
+class _FakeMessageInfo:
+    """Frame acknowledged by the broker after the round trip."""
+
+    rc = MQTT_ERR_SUCCESS
+
+    def __init__(self, round_trip: float) -> None:
+        """Initialize the frame."""
+        self._round_trip = round_trip
+
+    def is_published(self) -> bool:
+        """The acknowledgement is not there yet."""
+        return False
+
+    def wait_for_publish(self, timeout: float | None = None) -> None:
+        """Block for the round trip, as for the acknowledgement of the broker."""
+        time.sleep(self._round_trip)
+
+
+class FakePahoClient:
+    """Connected paho client recording the time every frame is handed over."""
+
+    def __init__(self, round_trip: float) -> None:
+        """Initialize the client."""
+        self._round_trip = round_trip
+        self.published: list[tuple[str, Any, float]] = []
+
+    def is_connected(self) -> bool:
+        """The fake broker is always connected."""
+        return True
+
+    def publish(
+        self,
+        topic: str,
+        payload: Any,
+        qos: int = 0,
+        retain: bool = False,
+        properties: Any = None,
+    ) -> _FakeMessageInfo:
+        """Record the frame, safe to call from any thread."""
+        self.published.append((topic, payload, time.perf_counter()))
+        return _FakeMessageInfo(self._round_trip)
+
+
+def fake_paho_transport(round_trip: float) -> InelsMqtt:
+    """Paho transport of the library connected to the fake client."""
+    mqtt = InelsMqtt({MQTT_HOST: "localhost", MQTT_PORT: 1883})
+    # the library connects before every publish unless it saw a connection
+    mqtt._InelsMqtt__client = FakePahoClient(round_trip)  # pylint: disable=protected-access
+    mqtt._InelsMqtt__try_connect = True  # pylint: disable=protected-access
+    return mqtt
@@ -0,0 +1,166 @@
+"""Home Assistant with the integration of the repo on a fake transport."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import resource
+import sys
+import tempfile
+import time
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant import loader
+from homeassistant.config_entries import ConfigEntries, ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity as entity_helper,
+    entity_registry as er,
+    issue_registry as ir,
+    restore_state,
+)
+from homeassistant.helpers.storage import Store
+
+from custom_components.inels.const import (
+    CONF_USE_HA_MQTT,
+    DOMAIN,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    UPDATE_QUEUE,
+)
+
+from .fakes import FakeInelsMqtt
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def rss_bytes() -> int:
+    """Current resident set size of the process."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # peak instead of current size, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentiles(samples: list[float]) -> dict[str, float | None]:
+    """Percentiles of the durations in milliseconds."""
+    if not samples:
+        return {"p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+
+    def _at(fraction: float) -> float:
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        "p50_ms": _at(0.5),
+        "p90_ms": _at(0.9),
+        "p99_ms": _at(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+@dataclass
+class Installation:
+    """Running config entry of the benchmark."""
+
+    hass: HomeAssistant
+    entry: ConfigEntry
+    mqtt: FakeInelsMqtt
+    setup_time: float
+    setup_rss: int
+
+    @property
+    def inels_data(self) -> dict[str, Any]:
+        """Runtime data of the config entry."""
+        return self.hass.data[DOMAIN][self.entry.entry_id]
+
+    async def async_wait_for_writes(self) -> None:
+        """Wait until the batched state writes are done."""
+        await self.hass.async_block_till_done()
+        while self.inels_data[UPDATE_QUEUE].pending:
+            await asyncio.sleep(0.001)
+        await self.hass.async_block_till_done()
+
+
+async def _async_start_hass(config_dir: str) -> HomeAssistant:
+    """Home Assistant with empty registries and the integration of the repo."""
+    hass = HomeAssistant()
+    hass.config.config_dir = config_dir
+    hass.config.skip_pip = True
+    os.symlink(REPO_ROOT / "custom_components", Path(config_dir, "custom_components"))
+
+    entity_helper.async_setup(hass)
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await asyncio.gather(
+        ar.async_load(hass),
+        dr.async_load(hass),
+        er.async_load(hass),
+        ir.async_load(hass),
+        restore_state.async_load(hass),
+    )
+    # the fake transport replaces the connection of the MQTT integration
+    hass.config.components.add("mqtt")
+    await loader.async_get_integration(hass, DOMAIN)
+    await hass.async_start()
+    return hass
+
+
+@asynccontextmanager
+async def async_installation(
+    cached: Iterable[tuple[str, bytes]], options: dict[str, Any] | None = None
+) -> AsyncIterator[Installation]:
+    """Config entry with the options set up with the devices of its cache.
+
+    The cached devices are given as their state topic and last frame, as
+    after a restart of Home Assistant.
+    """
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await _async_start_hass(config_dir)
+        entry = ConfigEntry(
+            version=1,
+            domain=DOMAIN,
+            title="iNELS benchmark",
+            data={CONF_USE_HA_MQTT: True},
+            source="user",
+            options=options,
+        )
+        await Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry.entry_id}").async_save(
+            {
+                "devices": [
+                    {"state_topic": topic, "state": frame.decode()}
+                    for topic, frame in cached
+                ]
+            }
+        )
+
+        transports: list[FakeInelsMqtt] = []
+
+        def _transport(hass: HomeAssistant) -> FakeInelsMqtt:
+            transports.append(FakeInelsMqtt(hass))
+            return transports[-1]
+
+        rss_before = rss_bytes()
+        with patch("custom_components.inels.InelsHaMqtt", _transport):
+            started = time.perf_counter()
+            await hass.config_entries.async_add(entry)
+            setup_time = time.perf_counter() - started
+            await hass.async_block_till_done()
+
+        try:
+            yield Installation(
+                hass, entry, transports[0], setup_time, rss_bytes() - rss_before
+            )
+        finally:
+            await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_stop(force=True)
@@ -0,0 +1,120 @@
+"""One benchmark run of Home Assistant with a synthetic installation."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event
+
+from custom_components.inels.const import ENTITIES, UPDATE_QUEUE
+
+from .catalog import SyntheticDevice, build_catalog, describe, synthetic_devices
+from .harness import Installation, async_installation, percentiles
+
+# a frame which changes no state within this time counts as lost
+FRAME_TIMEOUT_IN_SEC = 0.5
+
+
+async def _async_measure_frames(
+    installation: Installation, devices: list[SyntheticDevice], frames: int
+) -> dict[str, Any]:
+    """Send frames one by one, time them until the first state of the device."""
+    hass = installation.hass
+    inels_data = installation.inels_data
+    entities = inels_data[ENTITIES]
+    topics = {
+        entity_id: entity.device.state_topic for entity_id, entity in entities.items()
+    }
+    waiting: dict[str, asyncio.Future[float]] = {}
+    changes = 0
+
+    def _state_changed(event: Event) -> None:
+        nonlocal changes
+        changes += 1
+        topic = topics.get(event.data["entity_id"])
+        if (future := waiting.pop(topic, None)) is not None:  # type: ignore[arg-type]
+            future.set_result(time.perf_counter())
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _state_changed)
+    update_queue = inels_data[UPDATE_QUEUE]
+    writes = update_queue.writes
+    latencies: list[float] = []
+    lost = 0
+    for number in range(frames):
+        device = devices[number % len(devices)]
+        # the first frame of a device switches away from the restored state
+        frame = device.frames[(number // len(devices) + 1) % 2]
+        future: asyncio.Future[float] = hass.loop.create_future()
+        waiting[device.state_topic] = future
+        sent = time.perf_counter()
+        installation.mqtt.inject(device.state_topic, frame)
+        try:
+            latencies.append(
+                await asyncio.wait_for(future, FRAME_TIMEOUT_IN_SEC) - sent
+            )
+        except asyncio.TimeoutError:
+            lost += 1
+            waiting.pop(device.state_topic, None)
+        await installation.async_wait_for_writes()
+    unsub()
+
+    return {
+        "frames": frames,
+        "lost_frames": lost,
+        "latency": percentiles(latencies),
+        "state_writes_per_frame": round((update_queue.writes - writes) / frames, 3),
+        "state_changes_per_frame": round(changes / frames, 3),
+    }
+
+
+async def async_run(device_count: int, frames: int) -> dict[str, Any]:
+    """Set up a synthetic installation and measure it."""
+    catalog = build_catalog()
+    devices = synthetic_devices(catalog, device_count)
+
+    # the devices are known from the discovery cache of the last run
+    async with async_installation(
+        (device.state_topic, device.frames[0]) for device in devices
+    ) as installation:
+        entity_count = len(installation.inels_data[ENTITIES])
+
+        # all devices announce themselves at once, as after a reconnect
+        started = time.perf_counter()
+        for device in devices:
+            connected_topic = device.state_topic.replace("/status/", "/connected/", 1)
+            installation.mqtt.inject(connected_topic, b"on\n")
+            installation.mqtt.inject(device.state_topic, device.frames[0])
+        await installation.async_wait_for_writes()
+        burst_time = time.perf_counter() - started
+
+        return {
+            "devices": device_count,
+            "entities": entity_count,
+            "catalog": describe(catalog),
+            "setup_ms": round(installation.setup_time * 1000, 1),
+            "burst_ms": round(burst_time * 1000, 1),
+            "rss_per_1000_entities_mib": round(
+                installation.setup_rss / max(entity_count, 1) * 1000 / 2**20, 2
+            ),
+            **await _async_measure_frames(installation, devices, frames),
+        }
+
+
+def main() -> None:
+    """Run one installation size and print the result as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    print(json.dumps(asyncio.run(async_run(args.devices, args.frames))))
+
+
+if __name__ == "__main__":
+    main()
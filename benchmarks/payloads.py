@@ -0,0 +1,131 @@
+"""Bytes published per command for the device classes of the catalog.
+
+Every device class of the catalog reports its first frame and is commanded
+to the state of its second frame, which changes the keys of its entities.
+Read only device classes encode an empty command and are only listed. The
+CU3 virtual bits and integers are also measured with many addresses of
+which one changes, as a single entity does.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from typing import Any
+
+from inelsmqtt.devices import Device
+
+from custom_components.inels.commands import encode_command
+from custom_components.inels.ha_mqtt import InelsHaMqtt
+from custom_components.inels.metrics import PayloadStats
+
+from .catalog import build_catalog
+
+ADDRESSED_DEVICE_TYPES = ("bits", "integers")
+
+
+def _device(mqtt: InelsHaMqtt, state_topic: str, frame: bytes) -> Device:
+    """Device which published the frame."""
+    mqtt.restore_value(state_topic, frame)
+    device = Device(mqtt, state_topic)  # type: ignore[arg-type]
+    device.get_value()
+    return device
+
+
+def _addressed_frame(addresses: int, value: int) -> bytes:
+    """Status of CU3 virtual bits or integers with all addresses set."""
+    return json.dumps(
+        {"state": {f"{addr:03}": value for addr in range(addresses)}}
+    ).encode()
+
+
+def run(addresses: int) -> dict[str, Any]:
+    """Encode one command per device class, count the bytes."""
+    mqtt = InelsHaMqtt(None)  # type: ignore[arg-type]
+    stats = PayloadStats()
+    failed: list[str] = []
+
+    for number, synthetic in enumerate(build_catalog()):
+        topic = f"inels/status/000000000000/{synthetic.device_type}/{number:06X}"
+        commanded = _device(mqtt, f"{topic}0", synthetic.frames[1]).state
+        device = _device(mqtt, topic, synthetic.frames[0])
+        try:
+            encode_command(device, commanded, stats)
+        except Exception:  # pylint: disable=broad-except
+            # the second frame is not a value the device class can be set to
+            failed.append(synthetic.device_type)
+
+    one_address = PayloadStats()
+    for number, device_type in enumerate(ADDRESSED_DEVICE_TYPES):
+        topic = f"inels/status/000000000001/{device_type}/{number:06X}"
+        device = _device(mqtt, topic, _addressed_frame(addresses, 0))
+        value = device.state
+        for item in getattr(value, "bit", []):
+            item.is_on = item.addr == "000"
+        for item in getattr(value, "number", []):
+            item.value = int(item.addr == "000")
+        encode_command(device, value, one_address)
+
+    device_classes = stats.as_dict()
+    read_only = [
+        device_class
+        for device_class, counted in device_classes.items()
+        if not counted["bytes"]
+    ]
+    return {
+        "device_classes": {
+            device_class: counted
+            for device_class, counted in device_classes.items()
+            if device_class not in read_only
+        },
+        "one_of_many_addresses": {"addresses": addresses, **one_address.as_dict()},
+        "read_only": read_only,
+        "not_encodable": failed,
+    }
+
+
+def _print_table(result: dict[str, Any]) -> None:
+    """Bytes per command, one row per device class."""
+    print(f"{'device class':>14}  {'bytes':>6}  {'full state':>10}  delta")
+    rows = {
+        **result["device_classes"],
+        **{
+            f"{device_class} x{result['one_of_many_addresses']['addresses']}": stats
+            for device_class, stats in result["one_of_many_addresses"].items()
+            if device_class != "addresses"
+        },
+    }
+    for device_class, stats in rows.items():
+        print(
+            f"{device_class:>14}  {stats['bytes_per_command']:>6}  "
+            f"{stats['full_state_bytes'] / stats['commands']:>10.1f}  "
+            f"{'yes' if stats['delta_commands'] else 'no'}"
+        )
+    if result["read_only"]:
+        print(f"\nread only: {', '.join(result['read_only'])}")
+    if result["not_encodable"]:
+        print(f"\nnot encodable: {', '.join(result['not_encodable'])}")
+
+
+def main() -> None:
+    """Count the bytes and print them as a table or as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--addresses",
+        type=int,
+        default=32,
+        help="addresses of the virtual bits and integers (default 32)",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON instead")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    result = run(args.addresses)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        _print_table(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Scan of the device states for the entities of all platforms.
+
+The legacy scan probes every device with hasattr for every key of every
+platform, as the platforms did before the entity plan. The plan scans the
+state of every device once and every platform looks up its keys.
+"""
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterable
+import json
+import logging
+import statistics
+import time
+from typing import Any
+
+from inelsmqtt.devices import Device
+
+from custom_components.inels.ha_mqtt import InelsHaMqtt
+from custom_components.inels.planner import InelsEntityPlan
+from custom_components.inels.platforms import PLATFORM_KEYS
+
+from .catalog import build_catalog, synthetic_devices
+
+
+def _devices(count: int) -> list[Device]:
+    """Devices of the synthetic installation with their first frame decoded."""
+    mqtt = InelsHaMqtt(None)  # type: ignore[arg-type]
+    devices: list[Device] = []
+    for synthetic in synthetic_devices(build_catalog(), count):
+        mqtt.restore_value(synthetic.state_topic, synthetic.frames[0])
+        device = Device(mqtt, synthetic.state_topic)  # type: ignore[arg-type]
+        # the state is decoded once and cached by the device
+        device.state  # pylint: disable=pointless-statement
+        devices.append(device)
+    return devices
+
+
+def _legacy_scan(devices: list[Device], tables: Iterable[Iterable[str]]) -> int:
+    """Probe every device for every key of every platform."""
+    found: list[tuple[Device, str, Any]] = []
+    for keys in tables:
+        for device in devices:
+            for key in keys:
+                if hasattr(device.state, key):
+                    found.append((device, key, device.state.__dict__[key]))
+    return len(found)
+
+
+def _plan_scan(devices: list[Device], tables: Iterable[Iterable[str]]) -> int:
+    """Scan the devices once, look up the keys of every platform."""
+    plan = InelsEntityPlan(devices)
+    return sum(len(plan.blueprints(keys)) for keys in tables)
+
+
+def run(device_count: int, rounds: int) -> dict[str, Any]:
+    """Time both scans on the same devices."""
+    devices = _devices(device_count)
+    tables = list(PLATFORM_KEYS.values())
+
+    result: dict[str, Any] = {"devices": device_count, "rounds": rounds}
+    for name, scan in (("legacy", _legacy_scan), ("plan", _plan_scan)):
+        durations: list[float] = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            found = scan(devices, tables)
+            durations.append(time.perf_counter() - started)
+        result[name] = {
+            "blueprints": found,
+            "best_ms": round(min(durations) * 1000, 3),
+            "median_ms": round(statistics.median(durations) * 1000, 3),
+        }
+    return result
+
+
+def main() -> None:
+    """Run both scans and print the result as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    print(json.dumps(run(args.devices, args.rounds)))
+
+
+if __name__ == "__main__":
+    main()
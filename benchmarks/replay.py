@@ -0,0 +1,211 @@
+"""Replay recorded iNELS traffic against the integration of the repo.
+
+Recordings are made with the inels.start_recording service. The devices
+of the recording are set up from the discovery cache, then every message is
+received through the fake transport at its recorded time divided by the
+speed, or as fast as possible with the max speed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Any
+
+from homeassistant.helpers.entity import Entity
+
+from custom_components.inels.const import ENTITIES, RECORDING_VERSION, SUBSCRIPTIONS
+from custom_components.inels.recorder import decode_record
+
+from .harness import Installation, async_installation, percentiles
+
+STATUS_PREFIX = "inels/status/"
+CONNECTED_PREFIX = "inels/connected/"
+
+# an update not written within this time counts as dropped
+DROP_TIMEOUT_IN_SEC = 5
+LOOP_LAG_INTERVAL_IN_SEC = 0.05
+# messages received between two yields to the loop at the max speed
+MAX_SPEED_CHUNK = 50
+
+
+def load_recording(path: Path) -> list[tuple[float, str, bytes]]:
+    """Messages of the recording in the order they were received."""
+    with path.open(encoding="utf-8") as file:
+        header = json.loads(file.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise SystemExit(
+                f"{path}: recording version {header.get('version')} is not supported"
+            )
+        return [decode_record(line) for line in file if line.strip()]
+
+
+class _LoopLag:
+    """Delay of the event loop, sampled by a task sleeping one interval."""
+
+    def __init__(self) -> None:
+        """Initialize the sampler."""
+        self.samples: list[float] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        """Sample until cancelled."""
+        while True:
+            expected = time.perf_counter() + LOOP_LAG_INTERVAL_IN_SEC
+            await asyncio.sleep(LOOP_LAG_INTERVAL_IN_SEC)
+            self.samples.append(max(0.0, time.perf_counter() - expected))
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+
+
+class _Deliveries:
+    """Updates expected from the received frames and their state writes.
+
+    A frame is expected to update its device when the subscriptions notify
+    an entity while it is received, it is delivered by the next state write
+    of an entity of the device.
+    """
+
+    def __init__(self, installation: Installation) -> None:
+        """Observe the state writes of all entities."""
+        self._mqtt = installation.mqtt
+        self._subscriptions = installation.inels_data[SUBSCRIPTIONS]
+        self.pending: dict[str, list[float]] = {}
+        self.latencies: list[float] = []
+        self.expected = 0
+        for entity in installation.inels_data[ENTITIES].values():
+            self._observe(entity)
+
+    def _observe(self, entity: Entity) -> None:
+        """Count the state writes of the entity as deliveries of its device."""
+        write = entity.async_write_ha_state
+        topic = entity.device.state_topic  # type: ignore[attr-defined]
+
+        def _write() -> None:
+            write()
+            if (sent := self.pending.pop(topic, None)) is not None:
+                written = time.perf_counter()
+                self.latencies.extend(written - scheduled for scheduled in sent)
+
+        entity.async_write_ha_state = _write  # type: ignore[method-assign]
+
+    def receive(self, topic: str, payload: bytes, scheduled: float) -> None:
+        """Receive a frame, expect an update if it notified any entity."""
+        emitted = self._subscriptions.emitted
+        self._mqtt.inject(topic, payload)
+        if self._subscriptions.emitted != emitted:
+            self.expected += 1
+            device_topic = topic.replace(CONNECTED_PREFIX, STATUS_PREFIX, 1)
+            self.pending.setdefault(device_topic, []).append(scheduled)
+
+
+async def async_replay(
+    records: list[tuple[float, str, bytes]], speed: float | None, late: float
+) -> dict[str, Any]:
+    """Replay the messages, speed None receives them as fast as possible."""
+    first_frames: dict[str, bytes] = {}
+    connected: set[str] = set()
+    for _, topic, payload in records:
+        if topic.startswith(STATUS_PREFIX):
+            first_frames.setdefault(topic, payload)
+        elif topic.startswith(CONNECTED_PREFIX):
+            connected.add(topic)
+
+    # the devices are known from the discovery cache of the last run
+    async with async_installation(first_frames.items()) as installation:
+        mqtt = installation.mqtt
+        # retained availability is received before the recording starts
+        for topic in first_frames:
+            connected_topic = topic.replace(STATUS_PREFIX, CONNECTED_PREFIX, 1)
+            if connected_topic not in connected:
+                mqtt.inject(connected_topic, b"on\n")
+        await installation.async_wait_for_writes()
+
+        deliveries = _Deliveries(installation)
+        loop_lag = _LoopLag()
+        loop_lag.start()
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        for number, (elapsed, topic, payload) in enumerate(records):
+            if speed is None:
+                scheduled = time.perf_counter()
+                if number % MAX_SPEED_CHUNK == 0:
+                    await asyncio.sleep(0)
+            else:
+                scheduled = started + elapsed / speed
+                if (delay := scheduled - time.perf_counter()) > 0:
+                    await asyncio.sleep(delay)
+            deliveries.receive(topic, payload, scheduled)
+        await installation.async_wait_for_writes()
+        wall_time = time.perf_counter() - started
+        cpu_time = time.process_time() - cpu_started
+        loop_lag.stop()
+
+        # late writes of the last updates still count as delivered
+        waited = 0.0
+        while deliveries.pending and waited < DROP_TIMEOUT_IN_SEC:
+            await asyncio.sleep(0.1)
+            waited += 0.1
+
+    replayed_time = records[-1][0] - records[0][0] if records else 0.0
+    return {
+        "messages": len(records),
+        "devices": len(first_frames),
+        "speed": "max" if speed is None else speed,
+        "replayed_seconds": round(replayed_time, 3),
+        "wall_seconds": round(wall_time, 3),
+        "expected_updates": deliveries.expected,
+        "delivered_updates": len(deliveries.latencies),
+        "late_updates": sum(latency > late for latency in deliveries.latencies),
+        "dropped_updates": sum(len(sent) for sent in deliveries.pending.values()),
+        "latency": percentiles(deliveries.latencies),
+        "loop_lag": percentiles(loop_lag.samples),
+        "cpu_seconds_per_replayed_second": (
+            round(cpu_time / replayed_time, 4) if replayed_time else None
+        ),
+    }
+
+
+def _speed(value: str) -> float | None:
+    """Speed of the replay, None for as fast as possible."""
+    if value == "max":
+        return None
+    if (speed := float(value)) <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or max")
+    return speed
+
+
+def main() -> None:
+    """Replay one recording and print the result as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("recording", type=Path)
+    parser.add_argument(
+        "--speed", type=_speed, default=1.0, help="1, 10, ... or max (default 1)"
+    )
+    parser.add_argument(
+        "--late-ms",
+        type=float,
+        default=250,
+        help="updates written later than this count as late (default 250)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    records = load_recording(args.recording)
+    print(
+        json.dumps(asyncio.run(async_replay(records, args.speed, args.late_ms / 1000)))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""State write cost of one entity per entity type of the platforms.
+
+An installation with one device per device type of the catalog is set up
+and one entity is taken for every key of the INELS_*_TYPES tables. Every
+entity is written repeatedly with the same frame in three ways: the frame
+evaluation alone (_update_attrs), the write of Home Assistant reading the
+attributes computed before, and the write of the integration which
+evaluates the frame and writes it. The state does not change between the
+writes, so no state changed event is fired.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+import json
+import logging
+import statistics
+import time
+from typing import Any
+
+from homeassistant.helpers.entity import Entity
+
+from custom_components.inels.const import ENTITIES
+from custom_components.inels.entity import InelsBaseEntity
+from custom_components.inels.platforms import PLATFORM_KEYS
+
+from .catalog import build_catalog, synthetic_devices
+from .harness import async_installation
+
+
+def _entities(inels_data: dict[str, Any]) -> dict[str, InelsBaseEntity]:
+    """First entity of every key of every platform, by platform and key."""
+    entities: dict[str, InelsBaseEntity] = {}
+    for entity in inels_data[ENTITIES].values():
+        domain = entity.platform.domain
+        if entity.key in PLATFORM_KEYS.get(domain, ()):
+            entities.setdefault(f"{domain}.{entity.key}", entity)
+    return entities
+
+
+def _time_us(write: Callable[[], Any], rounds: int) -> float:
+    """Median duration of the call in microseconds."""
+    durations: list[float] = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        write()
+        durations.append(time.perf_counter() - started)
+    return round(statistics.median(durations) * 1_000_000, 1)
+
+
+async def async_run(rounds: int) -> dict[str, Any]:
+    """Time the state writes of one entity per entity type."""
+    catalog = build_catalog()
+    devices = synthetic_devices(catalog, len(catalog))
+
+    async with async_installation(
+        (device.state_topic, device.frames[0]) for device in devices
+    ) as installation:
+        await installation.async_wait_for_writes()
+        entities = _entities(installation.inels_data)
+
+        result: dict[str, Any] = {"rounds": rounds, "entity_types": {}}
+        for name, entity in sorted(entities.items()):
+            result["entity_types"][name] = {
+                "update_attrs_us": _time_us(entity._update_attrs, rounds),
+                # the attributes were computed by the calls above
+                "cached_write_us": _time_us(
+                    lambda entity=entity: Entity.async_write_ha_state(entity), rounds
+                ),
+                "write_us": _time_us(entity.async_write_ha_state, rounds),
+            }
+        result["uncovered"] = sorted(
+            f"{domain}.{key}"
+            for domain, keys in PLATFORM_KEYS.items()
+            for key in keys
+            if f"{domain}.{key}" not in entities
+        )
+        return result
+
+
+def main() -> None:
+    """Time the writes and print the result as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    print(json.dumps(asyncio.run(async_run(args.rounds))))
+
+
+if __name__ == "__main__":
+    main()
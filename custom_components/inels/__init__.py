@@ -1,29 +1,67 @@
 """The iNels integration."""
 from __future__ import annotations
+from functools import partial
 from typing import Any
 
 from inelsmqtt import InelsMqtt
-from inelsmqtt.discovery import InelsDiscovery
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import device_registry as dr, entity_registry as er
 
-from .const import BROKER, BROKER_CONFIG, DEVICES, DOMAIN, LOGGER, OLD_ENTITIES
-
-PLATFORMS: list[Platform] = [
-    Platform.BUTTON,
-    Platform.SWITCH,
-    Platform.NUMBER,
-    Platform.LIGHT,
-    Platform.COVER,
-    Platform.SENSOR,
-    Platform.CLIMATE,
-    Platform.BINARY_SENSOR,
-    Platform.SELECT,
-]
+from .const import (
+    BROKER,
+    BROKER_CONFIG,
+    COMMANDS,
+    CONF_CONFIRM_TIMEOUT,
+    CONF_OPTIMISTIC,
+    CONF_TRANSITION_RATE,
+    CONF_UPDATE_BATCH_SIZE,
+    CONF_UPDATE_LATENCY,
+    CONF_USE_HA_MQTT,
+    CONF_WRITE_WINDOW,
+    CONFIRM_TIMEOUT,
+    CREATED_ENTITIES,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_TRANSITION_RATE,
+    DEFAULT_UPDATE_BATCH_SIZE,
+    DEFAULT_UPDATE_LATENCY,
+    DEFAULT_WRITE_WINDOW,
+    DEVICE_INFOS,
+    DEVICE_METRICS,
+    DEVICES,
+    DISCOVERY,
+    DISCOVERY_CACHE,
+    DOMAIN,
+    ENTITIES,
+    ENTITY_PLAN,
+    LOADED_PLATFORMS,
+    LOGGER,
+    OPTIMISTIC_STATS,
+    PRESS_LATENCY,
+    RECORDER,
+    SUBSCRIPTIONS,
+    TRANSITIONS,
+    UPDATE_QUEUE,
+)
+from .commands import InelsCommandAggregator
+from .device_info import InelsDeviceInfos
+from .discovery import InelsDiscoveryCache, InelsStreamingDiscovery
+from .ha_mqtt import InelsHaMqtt
+from .library import missing_library_attributes
+from .metrics import DeviceMetrics, LatencyStats, OptimisticStats
+from .planner import InelsEntityPlan
+from .platforms import InelsPlatforms
+from .services import (
+    async_setup_services,
+    async_stop_profile,
+    async_unload_services,
+)
+from .subscription import InelsSubscriptions
+from .transitions import InelsTransitionScheduler
+from .updates import InelsUpdateQueue
 
 
 async def _async_config_entry_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -37,23 +75,59 @@ async def _async_config_entry_updated(hass: HomeAssistant, entry: ConfigEntry) -
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up iNELS from a config entry."""
 
-    if CONF_HOST not in entry.data:
+    use_ha_mqtt = entry.data.get(CONF_USE_HA_MQTT, False)
+    if not use_ha_mqtt and CONF_HOST not in entry.data:
         LOGGER.error("MQTT broker is not configured")
         return False
 
+    if missing := missing_library_attributes(not use_ha_mqtt):
+        LOGGER.error(
+            "The installed elkoep-mqtt library is not supported, it has no %s",
+            ", ".join(missing),
+        )
+        return False
+
     inels_data: dict[str, Any] = {
         BROKER_CONFIG: entry.data,
     }
 
-    mqtt: InelsMqtt = await hass.async_add_executor_job(
-        InelsMqtt, inels_data[BROKER_CONFIG]
-    )
+    mqtt: InelsMqtt | InelsHaMqtt
+    if use_ha_mqtt:
+        mqtt = InelsHaMqtt(hass)
+        if not await mqtt.async_connect():
+            raise ConfigEntryNotReady("MQTT integration is not available")
+    else:
+        mqtt = await hass.async_add_executor_job(InelsMqtt, inels_data[BROKER_CONFIG])
 
     inels_data[BROKER] = mqtt
+    inels_data[DEVICE_METRICS] = DeviceMetrics()
+    inels_data[SUBSCRIPTIONS] = InelsSubscriptions(mqtt, inels_data[DEVICE_METRICS])
+    inels_data[PRESS_LATENCY] = LatencyStats()
+    inels_data[UPDATE_QUEUE] = InelsUpdateQueue(
+        hass,
+        entry.options.get(CONF_UPDATE_BATCH_SIZE, DEFAULT_UPDATE_BATCH_SIZE),
+        entry.options.get(CONF_UPDATE_LATENCY, DEFAULT_UPDATE_LATENCY) / 1000,
+    )
+    inels_data[COMMANDS] = InelsCommandAggregator(
+        hass,
+        entry.options.get(CONF_WRITE_WINDOW, DEFAULT_WRITE_WINDOW) / 1000,
+        inels_data[DEVICE_METRICS],
+    )
+    inels_data[CONFIRM_TIMEOUT] = (
+        entry.options.get(CONF_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_TIMEOUT) / 1000
+        if entry.options.get(CONF_OPTIMISTIC, False)
+        else None
+    )
+    inels_data[OPTIMISTIC_STATS] = OptimisticStats()
+    inels_data[TRANSITIONS] = InelsTransitionScheduler(
+        hass,
+        inels_data[COMMANDS],
+        entry.options.get(CONF_TRANSITION_RATE, DEFAULT_TRANSITION_RATE),
+    )
 
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
-    if isinstance(  # None -> no error, int -> error code
+    if not use_ha_mqtt and isinstance(  # None -> no error, int -> error code
         await hass.async_add_executor_job(inels_data[BROKER].test_connection), int
     ):
         return False
@@ -61,63 +135,94 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if hass.data.get(DOMAIN) is None:
         hass.data.setdefault(DOMAIN, {})[entry.entry_id] = inels_data
 
-    try:
-        i_disc = InelsDiscovery(inels_data[BROKER])
-        await hass.async_add_executor_job(i_disc.discovery)
+    cache = InelsDiscoveryCache(hass, entry.entry_id)
+    inels_data[DISCOVERY_CACHE] = cache
+
+    # entities of cached devices are set up right away, the other devices
+    # are added by the discovery as soon as they are announced
+    inels_data[DEVICES] = await cache.async_restore(mqtt)
+
+    platforms = InelsPlatforms(hass, entry)
+    inels_data[LOADED_PLATFORMS] = platforms
 
-        inels_data[DEVICES] = i_disc.devices
+    discovery = InelsStreamingDiscovery(
+        hass,
+        entry,
+        mqtt,
+        inels_data[DEVICES],
+        cache,
+        platforms,
+        partial(_async_remove_stale_entries, hass, entry),
+    )
+    inels_data[DISCOVERY] = discovery
+    try:
+        await discovery.async_subscribe()
     except Exception as exc:
-        await hass.async_add_executor_job(mqtt.close)
+        _async_teardown(hass, entry, inels_data)
+        if isinstance(mqtt, InelsHaMqtt):
+            mqtt.close()
+        else:
+            await hass.async_add_executor_job(mqtt.close)
         raise ConfigEntryNotReady from exc
 
-    LOGGER.info("Finished discovery, setting up platforms")
+    # (domain, unique_id) of the entities set up by the platforms
+    inels_data[CREATED_ENTITIES] = set()
+    # entity_id -> entity, looked up by the services
+    inels_data[ENTITIES] = {}
 
-    # save entity ids of old entities
-    old_entries: dict[str, list[str]] = {}
+    # the states are scanned once for all platforms
+    inels_data[ENTITY_PLAN] = InelsEntityPlan(inels_data[DEVICES])
 
-    entity_registry = er.async_get(hass)
-    registry_entries: list[er.RegistryEntry] = er.async_entries_for_config_entry(
-        entity_registry, entry.entry_id
-    )
-    for entity in registry_entries:
-        if not entity.domain in old_entries:
-            old_entries[entity.domain] = []
-        old_entries[entity.domain].append(entity.entity_id)
-
-    inels_data[OLD_ENTITIES] = old_entries
+    # the devices are registered before their entities are added
+    inels_data[DEVICE_INFOS] = InelsDeviceInfos()
+    inels_data[DEVICE_INFOS].async_register(hass, entry, inels_data[DEVICES])
 
     hass.data[DOMAIN][entry.entry_id] = inels_data
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # only the platforms with entities are set up, the others once needed
+    await platforms.async_setup(inels_data[ENTITY_PLAN])
+    del inels_data[ENTITY_PLAN]
+    discovery.async_start()
+    async_setup_services(hass)
+
     LOGGER.info("Platform setup complete")
+    return True
 
-    LOGGER.info("Cleaning up entities/devices")
 
-    # remove the old entities that aren't being used
-    remaining_entries: dict[str, list[str]] = hass.data[DOMAIN][entry.entry_id][
-        OLD_ENTITIES
+@callback
+def _async_remove_stale_entries(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove entities which were not set up again and devices left empty."""
+    created: set[tuple[str, str]] = hass.data[DOMAIN][entry.entry_id][
+        CREATED_ENTITIES
     ]
-    for platform in remaining_entries:
-        for entity_id in remaining_entries[platform]:
-            entity_registry.async_remove(entity_id)
-
-    # check for devices without
-    device_registry: dr.DeviceRegistry = dr.async_get(hass)
-    registered_devices: list[str] = [
-        entry.id
-        for entry in dr.async_entries_for_config_entry(
-            registry=device_registry, config_entry_id=entry.entry_id
+
+    entity_registry = er.async_get(hass)
+    used_devices: set[str] = set()
+    stale_entities: list[str] = []
+    for entity in er.async_entries_for_config_entry(entity_registry, entry.entry_id):
+        if (entity.domain, entity.unique_id) in created:
+            if entity.device_id is not None:
+                used_devices.add(entity.device_id)
+        else:
+            stale_entities.append(entity.entity_id)
+
+    device_registry = dr.async_get(hass)
+    stale_devices = [
+        device_entry.id
+        for device_entry in dr.async_entries_for_config_entry(
+            device_registry, entry.entry_id
         )
+        if device_entry.id not in used_devices
     ]
 
-    for device_id in registered_devices:
-        if not er.async_entries_for_device(
-            entity_registry, device_id, include_disabled_entities=True
-        ):
-            LOGGER.info("Removing device %s, because it has no entities", device_id)
-            device_registry.async_remove_device(device_id=device_id)
-
-    LOGGER.info("Platform setup complete")
-    return True
+    LOGGER.info(
+        "Removing %s stale entities and %s devices without entities",
+        len(stale_entities),
+        len(stale_devices),
+    )
+    for entity_id in stale_entities:
+        entity_registry.async_remove(entity_id)
+    for device_id in stale_devices:
+        device_registry.async_remove_device(device_id)
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -128,16 +233,39 @@ async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     hass_data = hass.data[DOMAIN][entry.entry_id]
-    broker: InelsMqtt = hass_data[BROKER]
+    broker: InelsMqtt | InelsHaMqtt = hass_data[BROKER]
 
-    broker.unsubscribe_listeners()
-    broker.disconnect()
+    # keep the last states for the next start
+    await hass_data[DISCOVERY_CACHE].async_save(hass_data[DEVICES])
 
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+    if (recorder := hass_data.pop(RECORDER, None)) is not None:
+        await recorder.async_stop()
 
-    if hass.data[DOMAIN]:
-        hass.data.pop(DOMAIN)
+    _async_teardown(hass, entry, hass_data)
+    broker.disconnect()
 
-    return True
+    unload_ok = await hass_data[LOADED_PLATFORMS].async_unload()
+    if not any(
+        other.entry_id != entry.entry_id and other.state is ConfigEntryState.LOADED
+        for other in hass.config_entries.async_entries(DOMAIN)
+    ):
+        async_unload_services(hass)
+        await async_stop_profile(hass)
+
+    return unload_ok
+
+
+@callback
+def _async_teardown(
+    hass: HomeAssistant, entry: ConfigEntry, inels_data: dict[str, Any]
+) -> None:
+    """Stop the workers of the config entry and drop its runtime data."""
+    inels_data[SUBSCRIPTIONS].clear()
+    inels_data[UPDATE_QUEUE].async_stop()
+    inels_data[TRANSITIONS].async_stop()
+    inels_data[COMMANDS].async_stop()
+
+    domain_data: dict[str, Any] = hass.data.get(DOMAIN, {})
+    domain_data.pop(entry.entry_id, None)
+    if not domain_data:
+        hass.data.pop(DOMAIN, None)
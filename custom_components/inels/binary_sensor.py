@@ -16,21 +16,31 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .entity import InelsAlert, InelsBaseEntity, async_setup_inels_entities
 from .const import (
-    DEVICES,
-    DOMAIN,
     ICON_BINARY_INPUT,
     ICON_CARD_PRESENT,
     ICON_HEAT_WAVE,
     ICON_PROXIMITY,
     ICON_SNOWFLAKE,
-    LOGGER,
-    OLD_ENTITIES,
 )
+from .planner import InelsEntityPlan
 
 
 # BINARY SENSOR PLATFORM
+@dataclass
+class InelsInputAlert(InelsAlert):
+    """Binary input alert, reported as the value of the input."""
+
+    value: int = 0
+
+
+INPUT_ALERTS: list[InelsAlert] = [
+    InelsInputAlert(key="alert", message="Alert on %s of device %s", value=2),
+    InelsInputAlert(key="tamper", message="Tamper on %s of device %s", value=3),
+]
+
+
 @dataclass
 class InelsBinarySensorType:
     """Binary sensor type property description"""
@@ -103,65 +113,58 @@ class InelsBinarySensorEntityDescription(
     """Class for describing binary sensor iNELS entities."""
 
 
+def _create_entities(plan: InelsEntityPlan) -> list[InelsBaseEntity]:
+    """Create entities of the planned devices."""
+    entities: list[InelsBaseEntity] = []
+    for _, device, key, value in plan.blueprints(INELS_BINARY_SENSOR_TYPES):
+        type_dict = INELS_BINARY_SENSOR_TYPES[key]
+        if type_dict.is_binary_input:
+            binary_sensor_type = InelsBinaryInputSensor
+        else:
+            binary_sensor_type = InelsBinarySensor
+
+        if not type_dict.indexed:
+            entities.append(
+                binary_sensor_type(
+                    device=device,
+                    key=key,
+                    index=-1,
+                    description=InelsBinarySensorEntityDescription(
+                        key=key,
+                        name=type_dict.name,
+                        icon=type_dict.icon,
+                        device_class=type_dict.device_class,
+                    ),
+                )
+            )
+        else:
+            for k in range(len(value)):
+                entities.append(
+                    binary_sensor_type(
+                        device=device,
+                        key=key,
+                        index=k,
+                        description=InelsBinarySensorEntityDescription(
+                            key=f"{key}{k}",
+                            name=f"{type_dict.name} {k+1}",
+                            icon=type_dict.icon,
+                            device_class=type_dict.device_class,
+                        ),
+                    )
+                )
+
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Load iNELS binary sensor."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.BINARY_SENSOR)
-
-    items = INELS_BINARY_SENSOR_TYPES.items()
-    entities: list[InelsBaseEntity] = []
-    for device in device_list:
-        for key, type_dict in items:
-            if hasattr(device.state, key):
-                if type_dict.is_binary_input:
-                    binary_sensor_type = InelsBinaryInputSensor
-                else:
-                    binary_sensor_type = InelsBinarySensor
-
-                if not type_dict.indexed:
-                    entities.append(
-                        binary_sensor_type(
-                            device=device,
-                            key=key,
-                            index=-1,
-                            description=InelsBinarySensorEntityDescription(
-                                key=key,
-                                name=type_dict.name,
-                                icon=type_dict.icon,
-                                device_class=type_dict.device_class,
-                            ),
-                        )
-                    )
-                else:
-                    for k in range(len(device.state.__dict__[key])):
-                        entities.append(
-                            binary_sensor_type(
-                                device=device,
-                                key=key,
-                                index=k,
-                                description=InelsBinarySensorEntityDescription(
-                                    key=f"{key}{k}",
-                                    name=f"{type_dict.name} {k+1}",
-                                    icon=type_dict.icon,
-                                    device_class=type_dict.device_class,
-                                ),
-                            )
-                        )
-
-    async_add_entities(entities, True)
-
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
-
-    hass.data[DOMAIN][config_entry.entry_id][Platform.BINARY_SENSOR] = old_entities
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, _create_entities, True
+    )
 
 
 class InelsBinarySensor(InelsBaseEntity, BinarySensorEntity):
@@ -195,13 +198,9 @@ class InelsBinarySensor(InelsBaseEntity, BinarySensorEntity):
         """Return name of the entity."""
         return super().name
 
-    @property
-    def is_on(self) -> bool | None:
-        """Return true is sensor is on."""
-        if self.index != -1:
-            return self._device.values.ha_value.__dict__[self.key][self.index]
-
-        return self._device.values.ha_value.__dict__[self.key]
+    def _update_attrs(self) -> None:
+        """Compute the sensor value from the state of the device."""
+        self._attr_is_on = self._read_field(self._device.values.ha_value)
 
 
 class InelsBinaryInputSensor(InelsBaseEntity, BinarySensorEntity):
@@ -209,6 +208,8 @@ class InelsBinaryInputSensor(InelsBaseEntity, BinarySensorEntity):
 
     entity_description: InelsBinarySensorEntityDescription
 
+    _alerts = INPUT_ALERTS
+
     def __init__(
         self,
         device: Device,
@@ -232,21 +233,12 @@ class InelsBinaryInputSensor(InelsBaseEntity, BinarySensorEntity):
     @property
     def available(self) -> bool:
         """Return availability of device."""
+        return self._attr_available
 
-        val = self._device.values.ha_value.__dict__[self.key]
-        last_val = self._device.last_values.ha_value.__dict__[self.key]
-        if self.index != -1:
-            val = val[self.index]
-            last_val = last_val[self.index]
-
-        if val in [0, 1]:
-            return True
-        if last_val != val:
-            if val == 2:
-                LOGGER.warning("%s ALERT", self._attr_unique_id)
-            elif val == 3:
-                LOGGER.warning("%s TAMPER", self._attr_unique_id)
-        return False
+    def _raised_alerts(self) -> list[InelsAlert]:
+        """Alert or tamper reported instead of the value of the input."""
+        value = self._read_field(self._device.values.ha_value)
+        return [alert for alert in INPUT_ALERTS if alert.value == value]
 
     @property
     def unique_id(self) -> str | None:
@@ -258,9 +250,8 @@ class InelsBinaryInputSensor(InelsBaseEntity, BinarySensorEntity):
         """Return name of the entity."""
         return super().name
 
-    @property
-    def is_on(self) -> bool | None:
-        """Return true is sensor is on."""
-        if self.index != -1:
-            return self._device.values.ha_value.__dict__[self.key][self.index] == 1
-        return self._device.values.ha_value.__dict__[self.key] == 1
+    def _update_attrs(self) -> None:
+        """Compute the sensor value from the state of the device."""
+        value = self._read_field(self._device.values.ha_value)
+        self._attr_is_on = value == 1
+        self._attr_available = value in (0, 1)
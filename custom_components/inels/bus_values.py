@@ -0,0 +1,129 @@
+"""Decoding of the hex values of iNELS bus sensors."""
+from __future__ import annotations
+
+import struct
+
+from inelsmqtt.const import BUS_SENSOR_ERRORS
+
+from .const import LOGGER
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# arrays of equal width values with at least this many values are parsed
+# together, with numpy from the second threshold when it is available
+UNIFORM_MIN_VALUES = 4
+NUMPY_MIN_VALUES = 64
+
+# hex digits per value -> struct format of one big endian value
+_STRUCT_FORMATS = {2: "B", 4: "H", 8: "I", 16: "Q"}
+
+# last digits of the error codes, the sensors send them in upper case
+_ERROR_DIGITS = frozenset("9ABCDEF")
+
+
+def _error_table(width: int) -> dict[int, str]:
+    """Error messages by the raw value of a width digits wide value.
+
+    Errors are sent as 7, then F in all the middle digits and the code of
+    the error as the last digit (7FF9 ... 7FFF for two bytes).
+    """
+    if width < 2:
+        return {}
+    prefix = (0x7 << 4 * (width - 1)) | ((16 ** (width - 2) - 1) << 4)
+    return {prefix | code: error for code, error in BUS_SENSOR_ERRORS.items()}
+
+
+# hex digits per value -> error messages by raw value
+_ERROR_TABLES: dict[int, dict[int, str]] = {
+    width: _error_table(width) for width in range(17)
+}
+
+
+def _decode_uniform(values: list[str], width: int) -> list[tuple[float, bool]]:
+    """Decode values of equal width, parsed together as one run of bytes."""
+    raw_bytes = bytes.fromhex("".join(values))
+    fmt = _STRUCT_FORMATS[width]
+    table = _ERROR_TABLES[width]
+
+    if np is not None and len(values) >= NUMPY_MIN_VALUES:
+        array = np.frombuffer(raw_bytes, dtype=f">{fmt}")
+        # numpy rounds values above 2**53 to a float before the division,
+        # the other paths do the same so that every path decodes alike
+        decoded = list(zip((array / 100).tolist(), [False] * len(values)))
+        # error values only differ in their last digit
+        candidates = np.flatnonzero((array | 0xF) == (min(table) | 0xF)).tolist()
+        raws = array.tolist() if candidates else []
+    else:
+        raws = struct.unpack(f">{len(values)}{fmt}", raw_bytes)
+        decoded = [(float(raw) / 100, False) for raw in raws]
+        candidates = [index for index, raw in enumerate(raws) if raw in table]
+
+    for index in candidates:
+        _check_error(decoded, index, values[index], raws[index], table)
+    return decoded
+
+
+def _check_error(
+    decoded: list[tuple[float, bool]],
+    index: int,
+    value: str,
+    raw: int,
+    table: dict[int, str],
+) -> None:
+    """Mark the decoded value at the index if it is an error code."""
+    if (error := table.get(raw)) is not None and value[-1] in _ERROR_DIGITS:
+        LOGGER.warning(error)
+        decoded[index] = (float(raw) / 100, True)
+
+
+def decode_bus_value(value: str) -> tuple[float, bool]:
+    """Value of a bus sensor and whether it reports an error."""
+    raw = int(value, 16)
+    table = _ERROR_TABLES.get(len(value)) or _error_table(len(value))
+    error = table.get(raw)
+    if error is not None and value[-1] in _ERROR_DIGITS:
+        LOGGER.warning(error)
+        return (float(raw) / 100, True)
+    return (float(raw) / 100, False)
+
+
+def decode_bus_values(values: list[str]) -> list[tuple[float, bool]]:
+    """Values of the bus sensors of one array and whether they report errors."""
+    width = len(values[0]) if values else 0
+    if (
+        len(values) >= UNIFORM_MIN_VALUES
+        and width in _STRUCT_FORMATS
+        and all(len(value) == width for value in values)
+    ):
+        try:
+            return _decode_uniform(values, width)
+        except ValueError:
+            # whitespace or signs, which only int accepts
+            pass
+    return [decode_bus_value(value) for value in values]
+
+
+class BusValueArray:
+    """Decoded values of one indexed array, shared by the sensors reading it.
+
+    The library builds a new list for every frame, so the whole array is
+    decoded by the first sensor reading it after a frame and the other
+    sensors of the array read the result.
+    """
+
+    __slots__ = ("_values", "_decoded")
+
+    def __init__(self) -> None:
+        """Initialize the empty array."""
+        self._values: list[str] | None = None
+        self._decoded: list[tuple[float, bool]] = []
+
+    def get(self, values: list[str], index: int) -> tuple[float, bool]:
+        """Decoded value at the index of the array of hex values of the frame."""
+        if values is not self._values:
+            self._decoded = decode_bus_values(values)
+            self._values = values
+        return self._decoded[index]
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+import time
 from typing import Any
 
 from inelsmqtt.devices import Device
@@ -32,16 +33,21 @@ from homeassistant.components.button import (
     ButtonEntityDescription,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import ATTR_ENTITY_ID, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    ATTR_DEVICE_ID,
+    ATTR_ENTITY_ID,
+    CONF_TYPE,
+    Platform,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .entity import InelsBaseEntity, async_setup_inels_entities
 from .const import (
-    DEVICES,
     DOMAIN,
+    EVENT_BUTTON_PRESSED,
     ICON_BUTTON,
     ICON_ECO,
     ICON_FAN_1,
@@ -52,8 +58,11 @@ from .const import (
     ICON_CYCLE,
     ICON_UP,
     ICON_DOWN,
-    OLD_ENTITIES,
+    PRESS_LATENCY,
+    TRIGGER_BUTTON_PRESS,
 )
+from .metrics import LatencyStats
+from .planner import InelsEntityPlan
 
 
 # BUTTON PLATFORM
@@ -148,70 +157,62 @@ class InelsButtonDescription(ButtonEntityDescription):
     """A class that describes button entity."""
 
 
+def _create_entities(plan: InelsEntityPlan) -> list[InelsBaseEntity]:
+    """Create entities of the planned devices."""
+    entities: list[InelsBaseEntity] = []
+    for _, device, key, value in plan.blueprints(INELS_BUTTON_TYPES):
+        type_dict = INELS_BUTTON_TYPES[key]
+        for k in range(len(value)):
+            if key == "interface":  # special case
+                btn_type = INELS_BUTTON_INTERFACE.get(device.inels_type)
+                name = f"Interface {k}"
+                icon = ICON_BUTTON
+                category = EntityCategory.CONFIG
+                if btn_type and (k < len(btn_type)):
+                    name = btn_type[k].name
+                    icon = btn_type[k].icon
+                    category = btn_type[k].entity_category
+
+                entities.append(
+                    InelsButton(
+                        device=device,
+                        key="interface",
+                        index=k,
+                        description=InelsButtonDescription(
+                            key=f"interface{k}",
+                            name=name,
+                            icon=icon,
+                            entity_category=category,
+                        ),
+                    )
+                )
+            else:
+                entities.append(
+                    InelsButton(
+                        device=device,
+                        key=key,
+                        index=k,
+                        description=InelsButtonDescription(
+                            key=f"{key}{k+1}",
+                            name=f"{type_dict.name} {k+1}",
+                            icon=type_dict.icon,
+                            entity_category=type_dict.entity_category,
+                        ),
+                    )
+                )
+
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Load iNELS buttons from config entry."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.BUTTON)
-
-    items = INELS_BUTTON_TYPES.items()
-    entities: list[InelsBaseEntity] = []
-    for device in device_list:
-        val = device.state
-        for key, type_dict in items:
-            if hasattr(device.state, key):
-                for k in range(len(val.__dict__[key])):
-                    if key == "interface":  # special case
-                        btn_type = INELS_BUTTON_INTERFACE.get(device.inels_type)
-                        name = f"Interface {k}"
-                        icon = ICON_BUTTON
-                        category = EntityCategory.CONFIG
-                        if btn_type and (k < len(btn_type)):
-                            name = btn_type[k].name
-                            icon = btn_type[k].icon
-                            category = btn_type[k].entity_category
-
-                        entities.append(
-                            InelsButton(
-                                device=device,
-                                key="interface",
-                                index=k,
-                                description=InelsButtonDescription(
-                                    key=f"interface{k}",
-                                    name=name,
-                                    icon=icon,
-                                    entity_category=category,
-                                ),
-                            )
-                        )
-                    else:
-                        entities.append(
-                            InelsButton(
-                                device=device,
-                                key=key,
-                                index=k,
-                                description=InelsButtonDescription(
-                                    key=f"{key}{k+1}",
-                                    name=f"{type_dict.name} {k+1}",
-                                    icon=type_dict.icon,
-                                    entity_category=type_dict.entity_category,
-                                ),
-                            )
-                        )
-
-    async_add_entities(entities)
-
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
-
-    hass.data[DOMAIN][config_entry.entry_id][Platform.BUTTON] = old_entities
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, _create_entities
+    )
 
 
 class InelsButton(InelsBaseEntity, ButtonEntity):
@@ -232,28 +233,59 @@ class InelsButton(InelsBaseEntity, ButtonEntity):
         if description.name:
             self._attr_name = f"{self._attr_name} {description.name}"
 
+        # a button held down while the integration starts is no press
+        self._pressed = bool(self._read_field(device.state))
+        self._press_latency: LatencyStats | None = None
+
     @property
     def available(self) -> bool:
         # since the buttons only work within HA, they can always be available
         return True
 
+    async def async_added_to_hass(self) -> None:
+        """Get the press latency statistics of the entry."""
+        await super().async_added_to_hass()
+        assert self.platform.config_entry
+        self._press_latency = self.hass.data[DOMAIN][
+            self.platform.config_entry.entry_id
+        ][PRESS_LATENCY]
+
     def _callback(self) -> None:
         super()._callback()
 
-        curr_val = self._device.state
-        last_val = self._device.last_values.ha_value
+        pressed = bool(self._read_field(self._device.state))
+        if pressed and not self._pressed:
+            # called from the network thread of paho, never wait for the press
+            self.hass.loop.call_soon_threadsafe(
+                self._async_pressed, time.monotonic()
+            )
+        self._pressed = pressed
 
-        if (
-            curr_val.__dict__[self.key][self.index]
-            and not last_val.__dict__[self.key][self.index]
-        ):
-            self.hass.services.call(
+    @callback
+    def _async_pressed(self, received: float) -> None:
+        """Fire the press of the physical button."""
+        self.hass.async_create_task(
+            self.hass.services.async_call(
                 Platform.BUTTON,
                 SERVICE_PRESS,
                 {ATTR_ENTITY_ID: self.entity_id},
-                True,
-                self._context,
+                blocking=False,
+                context=self._context,
             )
+        )
+        self.hass.bus.async_fire(
+            EVENT_BUTTON_PRESSED,
+            {
+                ATTR_DEVICE_ID: self.registry_entry.device_id
+                if self.registry_entry
+                else None,
+                ATTR_ENTITY_ID: self.entity_id,
+                CONF_TYPE: TRIGGER_BUTTON_PRESS,
+            },
+            context=self._context,
+        )
+        if self._press_latency is not None:
+            self._press_latency.record(time.monotonic() - received)
 
     def press(self) -> None:
         """Press the button."""
@@ -22,14 +22,12 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .entity import InelsBaseEntity, async_setup_inels_entities
 from .const import (
     DEFAULT_MAX_TEMP,
     DEFAULT_MIN_TEMP,
-    DEVICES,
-    DOMAIN,
-    OLD_ENTITIES,
 )
+from .planner import InelsEntityPlan
 
 OPERATION_LIST = [
     STATE_OFF,
@@ -101,45 +99,38 @@ INELS_CLIMATE_TYPES: dict[str, InelsClimateType] = {
 }
 
 
+def _create_entities(plan: InelsEntityPlan) -> list[InelsBaseEntity]:
+    """Create entities of the planned devices."""
+    entities: list[InelsBaseEntity] = []
+    for _, device, key, value in plan.blueprints(INELS_CLIMATE_TYPES):
+        type_dict = INELS_CLIMATE_TYPES[key]
+        entities.append(
+            InelsClimate(
+                device=device,
+                key=key,
+                index=-1,
+                description=InelsClimateDescription(
+                    key=key,
+                    name=type_dict.name,
+                    hvac_modes=type_dict.hvac_modes,
+                    features=type_dict.features,
+                    presets=type_dict.presets,
+                ),
+            )
+        )
+
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Load iNELS climate entities from config entry."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.CLIMATE)
-
-    items = INELS_CLIMATE_TYPES.items()
-    entities: list[InelsBaseEntity] = []
-    for device in device_list:
-        for key, type_dict in items:
-            if hasattr(device.state, key):
-                entities.append(
-                    InelsClimate(
-                        device=device,
-                        key=key,
-                        index=-1,
-                        description=InelsClimateDescription(
-                            key=key,
-                            name=type_dict.name,
-                            hvac_modes=type_dict.hvac_modes,
-                            features=type_dict.features,
-                            presets=type_dict.presets,
-                        ),
-                    )
-                )
-
-    async_add_entities(entities)
-
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
-
-    hass.data[DOMAIN][config_entry.entry_id][Platform.CLIMATE] = old_entities
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, _create_entities
+    )
 
 
 @dataclass
@@ -175,77 +166,47 @@ class InelsClimate(InelsBaseEntity, ClimateEntity):
         self._attr_name = f"{self._attr_name} {description.name}"
         #self._attr_supported_features = description.features
 
-    @property
-    def current_temperature(self) -> float | None:
-        """Get current temperature."""
-        return self._device.state.__dict__[self.key].current
+    def _update_attrs(self) -> None:
+        """Compute the climate attributes from the state of the controller."""
+        val = self._read_field(self._device.state)
 
-    @property
-    def supported_features(self) -> ClimateEntityFeature:
-        if len(self.entity_description.features) == 0:
-            return self.entity_description.features
+        self._attr_current_temperature = val.current
+        features = self.entity_description.features
+        if hasattr(val, "control_mode"):  # features of the virtual controller mode
+            self._attr_supported_features = features[val.control_mode]
         else:
-            return self.entity_description.features[
-                self._device.state.__dict__[self.key].control_mode
-            ]
-
-    @property
-    def target_temperature(self) -> float | None:
-        """Get target temperature."""
-        val = self._device.state.__dict__[self.key]
-
-        if self.hvac_mode == HVACMode.COOL:
-            return self._device.state.__dict__[self.key].required_cool
+            self._attr_supported_features = (
+                features[0] if features else ClimateEntityFeature(0)
+            )
+
+        self._attr_hvac_mode = CLIMATE_MODE_TO_HVAC_MODE.get(val.climate_mode)
+        # the thermovalves report neither the action nor a cooling temperature
+        self._attr_hvac_action = CLIMATE_ACTION_TO_HVAC_ACTION.get(
+            getattr(val, "current_action", None)
+        )
+        required_cool = getattr(val, "required_cool", None)
+        if self._attr_hvac_mode == HVACMode.COOL:
+            self._attr_target_temperature = required_cool
         else:
-            return self._device.state.__dict__[self.key].required
-
-    @property
-    def target_temperature_high(self) -> float | None:
-        # if self.
+            self._attr_target_temperature = val.required
         # virt controller on two temp mode
-        return self._device.state.__dict__[self.key].required
-
-    @property
-    def target_temperature_low(self) -> float | None:
-        return self._device.state.__dict__[self.key].required_cool
+        self._attr_target_temperature_high = val.required
+        self._attr_target_temperature_low = required_cool
 
-    @property
-    def hvac_modes(self) -> list[HVACMode] | list[str]:
-        val = self._device.state.__dict__[self.key]
         if hasattr(val, "control_mode"):  # virtual controller
             if val.control_mode == 0:  # user controller
-                return [HVACMode.OFF, HVACMode.HEAT, HVACMode.COOL]
+                self._attr_hvac_modes = [HVACMode.OFF, HVACMode.HEAT, HVACMode.COOL]
             else:  # auto two-temp or single-temp
-                return [HVACMode.OFF, HVACMode.AUTO]
-        return self.entity_description.hvac_modes
-
-    @property
-    def hvac_mode(self) -> HVACMode | str | None:
-        val = self._device.state.__dict__[self.key]
-
-        return CLIMATE_MODE_TO_HVAC_MODE.get(val.climate_mode)
-
-    @property
-    def hvac_action(self) -> HVACAction | str | None:
-        val = self._device.state.__dict__[self.key]
-
-        return CLIMATE_ACTION_TO_HVAC_ACTION.get(val.current_action)
-
-    @property
-    def preset_mode(self) -> str | None:
-        val = self._device.state.__dict__[self.key]
-
-        if hasattr(val, "current_preset") and val.control_mode == 0:  # user controlled
-            return self.preset_modes[val.current_preset]
-        return None
-
-    @property
-    def preset_modes(self) -> list[str] | None:
-        val = self._device.state.__dict__[self.key]
+                self._attr_hvac_modes = [HVACMode.OFF, HVACMode.AUTO]
+        else:
+            self._attr_hvac_modes = self.entity_description.hvac_modes
 
         if hasattr(val, "current_preset") and val.control_mode == 0:  # user controlled
-            return self.entity_description.presets
-        return None
+            self._attr_preset_modes = self.entity_description.presets
+            self._attr_preset_mode = self._attr_preset_modes[val.current_preset]
+        else:
+            self._attr_preset_modes = None
+            self._attr_preset_mode = None
 
     async def async_set_temperature(self, **kwargs) -> None:
         """Set the required temperature."""
@@ -273,7 +234,7 @@ class InelsClimate(InelsBaseEntity, ClimateEntity):
                 else:
                     ha_val.__dict__[self.key].required = kwargs.get(ATTR_TEMPERATURE)
 
-        await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        await self.async_set_ha_value(ha_val)
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         ha_val = self._device.state
@@ -304,11 +265,11 @@ class InelsClimate(InelsBaseEntity, ClimateEntity):
                     ha_val.__dict__[self.key].current + 2
                 )
 
-        return await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        return await self.async_set_ha_value(ha_val)
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         ha_val = self._device.state
         new_preset = self.entity_description.presets.index(preset_mode)
         ha_val.__dict__[self.key].current_preset = new_preset
 
-        return await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        return await self.async_set_ha_value(ha_val)
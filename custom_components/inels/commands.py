@@ -0,0 +1,346 @@
+"""Publishing of the values of iNELS devices."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from inelsmqtt.const import FRAGMENT_DEVICE_TYPE, TOPIC_FRAGMENTS
+from inelsmqtt.devices import Device
+from inelsmqtt.protocols.cu3 import DT_BITS, DT_INTEGERS
+from inelsmqtt.utils.core import DeviceValue, ProtocolHandlerMapper
+from paho.mqtt.client import MQTT_ERR_SUCCESS
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import LOGGER
+from .ha_mqtt import InelsHaMqtt
+from .library import DEVICE_STATE, DEVICE_VALUES
+from .metrics import DeviceMetrics, LatencyStats, PayloadStats
+from .subscription import freeze_value
+
+# addressed protocols, (key, attribute) of the values sent by address
+_ADDRESSED_FIELDS: dict[str, tuple[str, str]] = {
+    DT_BITS.TYPE_ID: ("bit", "is_on"),
+    DT_INTEGERS.TYPE_ID: ("number", "value"),
+}
+
+
+def _device_class(device: Device) -> Any:
+    """Protocol handler of the device."""
+    if device.values is not None:
+        return device.values.device_class
+    return ProtocolHandlerMapper.get_handler(
+        device.state_topic.split("/")[TOPIC_FRAGMENTS[FRAGMENT_DEVICE_TYPE]]
+    )
+
+
+def _set_value(device: Device, value: Any) -> DeviceValue:
+    """Value of the device set to the HA value, as Device.set_ha_value builds it."""
+    return DeviceValue(
+        device.device_type,
+        device.inels_type,
+        _device_class(device),
+        ha_value=value,
+        last_value=device.state,
+    )
+
+
+def _apply_set_value(device: Device, dev_value: DeviceValue) -> None:
+    """Make the set value the state of the device, as Device.set_ha_value does.
+
+    The commanded value is the state until the device reports its own, the
+    next command of the device is built on it.
+    """
+    # the library has no public setter for the state, the attributes are
+    # checked when the config entry is set up
+    setattr(device, DEVICE_STATE, dev_value.ha_value)
+    setattr(device, DEVICE_VALUES, dev_value)
+
+
+def encode_ha_value(device: Device, value: Any) -> str:
+    """Convert HA value of the device into the inels set payload."""
+    return _set_value(device, value).inels_set_value
+
+
+def _encode_delta(device: Device, device_class: Any, value: Any) -> str | None:
+    """Payload of the addresses the value changed, None for a full frame."""
+    if (fields := _ADDRESSED_FIELDS.get(getattr(device_class, "TYPE_ID", ""))) is None:
+        return None
+    if (published := decode_published_state(device)) is None:
+        return None
+
+    key, attr = fields
+    last = {
+        item.addr: int(getattr(item, attr)) for item in getattr(published, key, [])
+    }
+    changed = {
+        item.addr: int(getattr(item, attr))
+        for item in getattr(value, key, [])
+        if last.get(item.addr) != int(getattr(item, attr))
+    }
+    if not changed:
+        return None
+    return device_class.create_command_payload(changed)
+
+
+def encode_command(
+    device: Device,
+    value: Any,
+    stats: PayloadStats | None = None,
+    full_payload: str | None = None,
+) -> str:
+    """Payload setting the value, only the changed fields where possible.
+
+    Devices with addressed payloads (virtual bits and integers of CU3)
+    accept commands with a subset of their addresses, the positional
+    payloads of the other devices always carry the whole state. The full
+    payload is encoded unless given.
+    """
+    if full_payload is None:
+        full_payload = encode_ha_value(device, value)
+    device_class = _device_class(device)
+    payload = _encode_delta(device, device_class, value) or full_payload
+    if stats is not None:
+        stats.record(
+            getattr(device_class, "TYPE_ID", device.device_type),
+            payload,
+            full_payload,
+        )
+    return payload
+
+
+def _timed_set_ha_value(
+    device: Device, value: Any, queued: float, wait: LatencyStats
+) -> bool:
+    """Set the value with the blocking library call, note the executor wait."""
+    wait.record(time.monotonic() - queued)
+    return device.set_ha_value(value)
+
+
+async def async_publish_ha_value(
+    hass: HomeAssistant,
+    device: Device,
+    value: Any,
+    stats: PayloadStats | None = None,
+    executor_wait: LatencyStats | None = None,
+) -> bool:
+    """Publish HA value of the device from the event loop.
+
+    The payload is encoded on the loop and either handed to the MQTT
+    integration or queued into the paho client, which is flushed by its
+    own network thread. Only when the paho client is not connected the
+    blocking library call (which reconnects) is used. The device takes the
+    value as its state on every path, as with the library call.
+    """
+    if device.set_topic is None:
+        return False
+
+    mqtt = device.mqtt
+    if not isinstance(mqtt, InelsHaMqtt) and not mqtt.client.is_connected():
+        if executor_wait is None:
+            return await hass.async_add_executor_job(device.set_ha_value, value)
+        return await hass.async_add_executor_job(
+            _timed_set_ha_value, device, value, time.monotonic(), executor_wait
+        )
+
+    set_value = _set_value(device, value)
+    payload = encode_command(device, value, stats, set_value.inels_set_value)
+    _apply_set_value(device, set_value)
+    if isinstance(mqtt, InelsHaMqtt):
+        return await mqtt.async_publish(device.set_topic, payload)
+
+    info = mqtt.client.publish(device.set_topic, payload, 0, True)
+    if info.rc != MQTT_ERR_SUCCESS:
+        LOGGER.error(
+            "Could not publish message to topic %s, error code: %d",
+            device.set_topic,
+            info.rc,
+        )
+        return False
+    return True
+
+
+def decode_published_state(device: Device) -> Any:
+    """Fresh copy of the last published state, the device is not touched."""
+    payload = device.mqtt.messages().get(device.state_topic)
+    if payload is None:
+        return None
+    return DeviceValue(
+        device.device_type,
+        device.inels_type,
+        _device_class(device),
+        inels_value=payload.decode(),
+    ).ha_value
+
+
+def _published_fields(device: Device) -> dict[str, Any]:
+    """Comparable fields of the last published state of the device."""
+    if not hasattr(state := decode_published_state(device), "__dict__"):
+        return {}
+    return {
+        key: freeze_value(value)
+        for key, value in vars(state).items()
+        if not key.startswith("_")
+    }
+
+
+def _merge(merged: Any, value: Any, base: dict[str, Any]) -> None:
+    """Copy the fields the value changed against the base into merged."""
+    if value is merged:
+        return
+
+    for key, item in vars(value).items():
+        if key.startswith("_"):
+            continue
+        base_item = base.get(key)
+        target = getattr(merged, key, None)
+        if isinstance(item, list) and isinstance(target, list):
+            if item is target:
+                continue
+            for index, element in enumerate(item):
+                if (
+                    base_item is None
+                    or index >= len(base_item)
+                    or freeze_value(element) != base_item[index]
+                ):
+                    if index < len(target):
+                        target[index] = element
+                    else:
+                        target.append(element)
+        elif freeze_value(item) != base_item:
+            setattr(merged, key, item)
+
+
+class _PendingWrite:
+    """Merged value of one device waiting for the end of the window."""
+
+    __slots__ = ("device", "base", "value", "future", "handle")
+
+    def __init__(
+        self, device: Device, base: dict[str, Any], value: Any, future: asyncio.Future
+    ) -> None:
+        """Initialize the pending write."""
+        self.device = device
+        self.base = base
+        self.value = value
+        self.future = future
+        self.handle: asyncio.TimerHandle | None = None
+
+
+class InelsCommandAggregator:
+    """Values written to one device within a short window, published once.
+
+    Every entity sends the whole state of its device, so switching several
+    channels of one module would publish one frame per channel and the later
+    frames could overwrite the earlier changes. The fields each value changed
+    against the last published state are merged into the first value of the
+    window and the merged state is published in a single frame.
+
+    The frames of one device are published one after another in the order
+    of their windows, a frame waits until the previous one was handed over.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        window: float,
+        metrics: DeviceMetrics | None = None,
+    ) -> None:
+        """Initialize the aggregator, the window is in seconds."""
+        self._hass = hass
+        self._window = window
+        self._metrics = metrics
+        self._pending: dict[str, _PendingWrite] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._depths: dict[str, int] = {}
+
+        self.requested = 0
+        self.published = 0
+        self.max_depth = 0
+        self.wait = LatencyStats()
+        self.executor_wait = LatencyStats()
+        self.payloads = PayloadStats()
+
+    @property
+    def depth(self) -> int:
+        """Number of frames being published or waiting for their device."""
+        return sum(self._depths.values())
+
+    async def async_set_ha_value(self, device: Device, value: Any) -> bool:
+        """Publish the value merged with the other values of the window."""
+        self.requested += 1
+        if device.set_topic is None:
+            return False
+
+        if self._window <= 0:
+            return await self._async_publish_ordered(device, value)
+
+        topic = device.set_topic
+        if (pending := self._pending.get(topic)) is None:
+            pending = _PendingWrite(
+                device,
+                _published_fields(device),
+                value,
+                self._hass.loop.create_future(),
+            )
+            pending.handle = self._hass.loop.call_later(
+                self._window, self._async_schedule_publish, topic
+            )
+            self._pending[topic] = pending
+        else:
+            _merge(pending.value, value, pending.base)
+
+        # one caller being cancelled must not cancel the write of the others
+        return await asyncio.shield(pending.future)
+
+    @callback
+    def _async_schedule_publish(self, topic: str) -> None:
+        """Close the window of the device."""
+        if (pending := self._pending.pop(topic, None)) is not None:
+            self._hass.async_create_task(self._async_publish(pending))
+
+    async def _async_publish_ordered(self, device: Device, value: Any) -> bool:
+        """Publish the value after the previous frames of the device."""
+        topic = device.set_topic
+        # asyncio locks are fair, the frames keep their order
+        lock = self._locks.setdefault(topic, asyncio.Lock())
+        depth = self._depths[topic] = self._depths.get(topic, 0) + 1
+        self.max_depth = max(self.max_depth, depth)
+
+        queued = time.monotonic()
+        try:
+            async with lock:
+                self.wait.record(time.monotonic() - queued)
+                self.published += 1
+                if self._metrics is not None:
+                    self._metrics.get(device).command_sent()
+                return await async_publish_ha_value(
+                    self._hass, device, value, self.payloads, self.executor_wait
+                )
+        finally:
+            if depth := self._depths[topic] - 1:
+                self._depths[topic] = depth
+            else:
+                del self._depths[topic]
+
+    async def _async_publish(self, pending: _PendingWrite) -> None:
+        """Publish the merged value and resolve the waiting callers."""
+        try:
+            result = await self._async_publish_ordered(pending.device, pending.value)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("Could not publish value of %s", pending.device.title)
+            result = False
+
+        if not pending.future.done():
+            pending.future.set_result(result)
+
+    @callback
+    def async_stop(self) -> None:
+        """Drop the pending writes."""
+        for pending in self._pending.values():
+            if pending.handle is not None:
+                pending.handle.cancel()
+            if not pending.future.done():
+                pending.future.set_result(False)
+        self._pending.clear()
@@ -8,6 +8,7 @@ from inelsmqtt.const import MQTT_TRANSPORT
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.components import mqtt
 from homeassistant.components.hassio.discovery import HassioServiceInfo
 from homeassistant.const import (
     CONF_DISCOVERY,
@@ -18,8 +19,25 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
-
-from .const import DOMAIN, TITLE
+from homeassistant.helpers.service_info.mqtt import MqttServiceInfo
+
+from .const import (
+    CONF_CONFIRM_TIMEOUT,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_OPTIMISTIC,
+    CONF_TRANSITION_RATE,
+    CONF_UPDATE_BATCH_SIZE,
+    CONF_UPDATE_LATENCY,
+    CONF_USE_HA_MQTT,
+    CONF_WRITE_WINDOW,
+    DEFAULT_CONFIRM_TIMEOUT,
+    DEFAULT_TRANSITION_RATE,
+    DEFAULT_UPDATE_BATCH_SIZE,
+    DEFAULT_UPDATE_LATENCY,
+    DEFAULT_WRITE_WINDOW,
+    DOMAIN,
+    TITLE,
+)
 
 CONNECTION_TIMEOUT = 5
 
@@ -46,7 +64,30 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         if self._async_current_entries():
             return self.async_abort(reason="single_instance_allowed")
 
-        return await self.async_step_setup()
+        return self.async_show_menu(step_id="user", menu_options=["setup", "ha_mqtt"])
+
+    async def async_step_mqtt(self, discovery_info: MqttServiceInfo) -> FlowResult:
+        """Handle iNELS devices announced on the MQTT integration."""
+        await self._async_handle_discovery_without_unique_id()
+        if self._async_current_entries():
+            return self.async_abort(reason="single_instance_allowed")
+
+        return await self.async_step_ha_mqtt()
+
+    async def async_step_ha_mqtt(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Use the broker connection of the MQTT integration."""
+        if not await mqtt.async_wait_for_mqtt_client(self.hass):
+            return self.async_abort(reason="mqtt_not_configured")
+
+        if user_input is not None:
+            return self.async_create_entry(
+                title=TITLE,
+                data={CONF_USE_HA_MQTT: True, CONF_DISCOVERY: True},
+            )
+
+        return self.async_show_form(step_id="ha_mqtt", last_step=True)
 
     async def async_step_setup(
         self, user_input: dict[str, Any] | None = None
@@ -168,7 +209,10 @@ class InelsOptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input: None = None) -> FlowResult:
         """Manage the MQTT setup."""
-        return await self.async_step_setup()
+        if self.config_entry.data.get(CONF_USE_HA_MQTT):
+            # the connection is managed by the MQTT integration
+            return await self.async_step_tuning()
+        return self.async_show_menu(step_id="init", menu_options=["setup", "tuning"])
 
     async def async_step_setup(
         self, user_input: dict[str, Any] | None = None
@@ -196,6 +240,7 @@ class InelsOptionsFlowHandler(config_entries.OptionsFlow):
                 return self.async_create_entry(
                     title=TITLE,
                     data={
+                        **self.options,
                         CONF_HOST: user_input.get(CONF_HOST),
                         CONF_PORT: user_input.get(CONF_PORT),
                         CONF_USERNAME: user_input.get(CONF_USERNAME),
@@ -234,6 +279,62 @@ class InelsOptionsFlowHandler(config_entries.OptionsFlow):
             last_step=True,
         )
 
+    async def async_step_tuning(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the performance tuning of the integration."""
+        if user_input is not None:
+            return self.async_create_entry(
+                title=TITLE, data={**self.options, **user_input}
+            )
+
+        return self.async_show_form(
+            step_id="tuning",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_UPDATE_BATCH_SIZE,
+                        default=self.options.get(
+                            CONF_UPDATE_BATCH_SIZE, DEFAULT_UPDATE_BATCH_SIZE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                    vol.Required(
+                        CONF_UPDATE_LATENCY,
+                        default=self.options.get(
+                            CONF_UPDATE_LATENCY, DEFAULT_UPDATE_LATENCY
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),
+                    vol.Required(
+                        CONF_WRITE_WINDOW,
+                        default=self.options.get(
+                            CONF_WRITE_WINDOW, DEFAULT_WRITE_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),
+                    vol.Required(
+                        CONF_OPTIMISTIC,
+                        default=self.options.get(CONF_OPTIMISTIC, False),
+                    ): bool,
+                    vol.Required(
+                        CONF_CONFIRM_TIMEOUT,
+                        default=self.options.get(
+                            CONF_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_TIMEOUT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=100, max=30000)),
+                    vol.Required(
+                        CONF_TRANSITION_RATE,
+                        default=self.options.get(
+                            CONF_TRANSITION_RATE, DEFAULT_TRANSITION_RATE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=200)),
+                    vol.Required(
+                        CONF_DIAGNOSTIC_SENSORS,
+                        default=self.options.get(CONF_DIAGNOSTIC_SENSORS, False),
+                    ): bool,
+                }
+            ),
+            last_step=True,
+        )
+
 
 def try_connection(
     hass: HomeAssistant,
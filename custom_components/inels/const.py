@@ -7,9 +7,78 @@ DOMAIN = "inels"
 BROKER_CONFIG = "inels_mqtt_broker_config"
 BROKER = "inels_mqtt_broker"
 DEVICES = "devices"
-OLD_ENTITIES = "old_entities"
+CREATED_ENTITIES = "created_entities"
+DISCOVERY_CACHE = "discovery_cache"
+DISCOVERY = "discovery"
+ENTITY_PLAN = "entity_plan"
+LOADED_PLATFORMS = "loaded_platforms"
+SUBSCRIPTIONS = "subscriptions"
+UPDATE_QUEUE = "update_queue"
+COMMANDS = "commands"
+ENTITIES = "entities"
+CONFIRM_TIMEOUT = "confirm_timeout"
+OPTIMISTIC_STATS = "optimistic_stats"
+TRANSITIONS = "transitions"
+DEVICE_INFOS = "device_infos"
+PRESS_LATENCY = "press_latency"
+DEVICE_METRICS = "device_metrics"
+RECORDER = "recorder"
+# the profiler is shared by all entries, it is kept beside their data
+PROFILER = "inels_profiler"
+
+SIGNAL_NEW_DEVICES = "inels_new_devices_{}"
+
+EVENT_BUTTON_PRESSED = "inels_button_pressed"
+EVENT_ALERT = "inels_alert"
+TRIGGER_BUTTON_PRESS = "button_press"
+
+SERVICE_BULK_SET = "bulk_set"
+SERVICE_START_RECORDING = "start_recording"
+SERVICE_STOP_RECORDING = "stop_recording"
+SERVICE_START_PROFILE = "start_profile"
+SERVICE_STOP_PROFILE = "stop_profile"
+ATTR_COMMANDS = "commands"
+ATTR_CPROFILE = "cprofile"
+ATTR_DURATION = "duration"
+ATTR_MEMORY = "memory"
+ATTR_VALUE = "value"
+
+STORAGE_KEY = "inels.discovery"
+STORAGE_VERSION = 1
+
+# devices not heard of within the window are removed
+DISCOVERY_WINDOW_IN_SEC = 15
+# devices found in quick succession are added together
+DISCOVERY_BATCH_IN_SEC = 0.1
+# recorded traffic is written to the file at this interval
+RECORDING_FLUSH_INTERVAL_IN_SEC = 1
+RECORDING_VERSION = 1
+# lines of the cProfile and tracemalloc sections of a profile report
+PROFILE_REPORT_LINES = 40
+# interval of the brightness steps of light transitions
+TRANSITION_STEP_IN_SEC = 0.2
+# latest latencies kept for their percentiles
+LATENCY_WINDOW = 100
 
 CONF_DISCOVERY_PREFIX = "discovery_prefix"
+CONF_USE_HA_MQTT = "use_ha_mqtt"
+CONF_UPDATE_BATCH_SIZE = "update_batch_size"
+CONF_UPDATE_LATENCY = "update_latency"
+CONF_WRITE_WINDOW = "write_window"
+CONF_OPTIMISTIC = "optimistic"
+CONF_CONFIRM_TIMEOUT = "confirm_timeout"
+CONF_TRANSITION_RATE = "transition_rate"
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+
+DEFAULT_UPDATE_BATCH_SIZE = 200
+# milliseconds
+DEFAULT_UPDATE_LATENCY = 20
+# milliseconds, writes to one device within the window are merged
+DEFAULT_WRITE_WINDOW = 10
+# milliseconds, optimistic states not confirmed within the timeout are reverted
+DEFAULT_CONFIRM_TIMEOUT = 2000
+# frames per second published by the light transitions of one entry
+DEFAULT_TRANSITION_RATE = 20
 
 TITLE = "iNELS"
 DESCRIPTION = ""
@@ -52,6 +121,8 @@ ICON_FAN_3 = "mdi:fan-speed-3"
 ICON_ECO = "mdi:leaf"
 ICON_UP = "mdi:chevron-up"
 ICON_DOWN = "mdi:chevron-down"
+ICON_TRAFFIC = "mdi:swap-vertical"
+ICON_TIMER = "mdi:timer-outline"
 
 ICON_WATER_HEATER_DICT = {
     "on": "mdi:valve-open",
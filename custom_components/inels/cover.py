@@ -17,17 +17,16 @@ from homeassistant.components.cover import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .entity import InelsBaseEntity, async_setup_inels_entities
 from .const import (
-    DEVICES,
-    DOMAIN,
     ICON_SHUTTER_CLOSED,
     ICON_SHUTTER_OPEN,
-    OLD_ENTITIES,
 )
+from .planner import InelsEntityPlan
 
 
 @dataclass
@@ -58,58 +57,51 @@ INELS_SHUTTERS_TYPES: dict[str, InelsShutterType] = {
 }
 
 
+def _create_entities(plan: InelsEntityPlan) -> list[InelsBaseEntity]:
+    """Create entities of the planned devices."""
+    entities: list[InelsBaseEntity] = []
+    for _, device, key, value in plan.blueprints(INELS_SHUTTERS_TYPES):
+        type_dict = INELS_SHUTTERS_TYPES[key]
+        if len(value) == 1:
+            entities.append(
+                InelsCover(
+                    device=device,
+                    key=key,
+                    index=0,
+                    description=InelsCoverEntityDescription(
+                        key=key,
+                        name=str(type_dict.name),
+                        supported_features=type_dict.supported_features,
+                    ),
+                )
+            )
+        else:
+            for k in range(len(value)):
+                entities.append(
+                    InelsCover(
+                        device=device,
+                        key=key,
+                        index=k,
+                        description=InelsCoverEntityDescription(
+                            key=f"{key}{k}",
+                            name=f"{type_dict.name} {k+1}",
+                            supported_features=type_dict.supported_features,
+                        ),
+                    )
+                )
+
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Load iNELS cover from config entry."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.COVER)
-
-    items = INELS_SHUTTERS_TYPES.items()
-    entities: list[InelsBaseEntity] = []
-    for device in device_list:
-        for key, type_dict in items:
-            if hasattr(device.state, key):
-                if len(device.state.__dict__[key]) == 1:
-                    entities.append(
-                        InelsCover(
-                            device=device,
-                            key=key,
-                            index=0,
-                            description=InelsCoverEntityDescription(
-                                key=key,
-                                name=str(type_dict.name),
-                                supported_features=type_dict.supported_features,
-                            ),
-                        )
-                    )
-                else:
-                    for k in range(len(device.state.__dict__[key])):
-                        entities.append(
-                            InelsCover(
-                                device=device,
-                                key=key,
-                                index=k,
-                                description=InelsCoverEntityDescription(
-                                    key=f"{key}{k}",
-                                    name=f"{type_dict.name} {k+1}",
-                                    supported_features=type_dict.supported_features,
-                                ),
-                            )
-                        )
-
-    async_add_entities(entities, False)
-
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
-
-    hass.data[DOMAIN][config_entry.entry_id][Platform.COVER] = old_entities
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, _create_entities, False
+    )
 
 
 @dataclass
@@ -124,6 +116,8 @@ class InelsCover(InelsBaseEntity, CoverEntity):
 
     entity_description: InelsCoverEntityDescription
 
+    _supports_optimistic = True
+
     def __init__(
         self,
         device: Device,
@@ -143,34 +137,32 @@ class InelsCover(InelsBaseEntity, CoverEntity):
 
         self._attr_supported_features = description.supported_features
 
-    @property
-    def icon(self) -> str | None:
-        """Cover icon."""
-        return ICON_SHUTTER_CLOSED if self.is_closed is True else ICON_SHUTTER_OPEN
-
-    @property
-    def is_opening(self) -> bool | None:
-        """Is the cover opening ?"""
-        if self.key not in ["shutters", "shutters_with_pos"]:
-            return self._device.state.__dict__[self.key][self.index].state == Shutter_state.Open
+    def _update_attrs(self) -> None:
+        """Compute the cover attributes from the state of its shutter."""
+        state = self._read_field(self._device.state)
 
-    @property
-    def is_closing(self) -> bool | None:
-        """Is the cover closing ?"""
+        # shutters without position report no movement
         if self.key not in ["shutters", "shutters_with_pos"]:
-            return self._device.state.__dict__[self.key][self.index].state == Shutter_state.Closed
-
-    @property
-    def is_closed(self) -> bool | None:
-        """Cover is closed."""
-        return self._device.state.__dict__[self.key][self.index].is_closed
+            self._attr_is_opening = state.state == Shutter_state.Open
+            self._attr_is_closing = state.state == Shutter_state.Closed
+        self._attr_is_closed = state.is_closed
+        self._attr_current_cover_position = getattr(state, "position", None)
+        self._attr_icon = (
+            ICON_SHUTTER_CLOSED if self._attr_is_closed is True else ICON_SHUTTER_OPEN
+        )
 
-    @property
-    def current_cover_position(self) -> int | None:
-        """Return current cover position."""
-        if hasattr(self._device.state.__dict__[self.key][self.index], "position"):
-            return self._device.state.__dict__[self.key][self.index].position
-        return super().current_cover_position
+    def apply_value(self, state: Any, value: Any) -> None:
+        """Move the shutter of the state to a position or open/close it."""
+        shutter = state.__dict__[self.key][self.index]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if not hasattr(shutter, "position"):
+                raise ValueError(f"{self.entity_id} does not support positions")
+            shutter.position = int(value)
+            shutter.set_pos = True
+        else:
+            shutter.state = (
+                Shutter_state.Open if cv.boolean(value) else Shutter_state.Closed
+            )
 
     async def async_set_cover_position(self, **kwargs: Any) -> None:
         """Set cover position."""
@@ -178,7 +170,7 @@ class InelsCover(InelsBaseEntity, CoverEntity):
             ha_val = self._device.state
             ha_val.__dict__[self.key][self.index].position = kwargs[ATTR_POSITION]
             ha_val.__dict__[self.key][self.index].set_pos = True
-            await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+            await self.async_set_ha_value(ha_val)
             return
         return super().set_cover_position(**kwargs)
 
@@ -186,13 +178,13 @@ class InelsCover(InelsBaseEntity, CoverEntity):
         """Open cover."""
         ha_val = self._device.state
         ha_val.__dict__[self.key][self.index].state = Shutter_state.Open
-        await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        await self.async_set_ha_value(ha_val)
 
     async def async_close_cover(self, **kwargs: Any) -> None:
         """Close cover."""
         ha_val = self._device.state
         ha_val.__dict__[self.key][self.index].state = Shutter_state.Closed
-        await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        await self.async_set_ha_value(ha_val)
 
     async def async_stop_cover(self, **kwargs: Any) -> None:
         """Stop cover."""
@@ -200,4 +192,4 @@ class InelsCover(InelsBaseEntity, CoverEntity):
         ha_val.__dict__[self.key][self.index].state = (
             Shutter_state.Stop_up if self.is_closed else Shutter_state.Stop_down
         )
-        await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        await self.async_set_ha_value(ha_val)
@@ -0,0 +1,63 @@
+"""Device registry information of iNELS devices."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from inelsmqtt.devices import Device
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import DOMAIN
+
+
+def build_device_info(device: Device) -> DeviceInfo:
+    """Device info of the device."""
+    info = device.info()
+    return DeviceInfo(
+        identifiers={(DOMAIN, device.unique_id)},
+        manufacturer=info.manufacturer,
+        model=info.model_number,
+        name=device.title,
+        sw_version=info.sw_version,
+        via_device=(DOMAIN, device.parent_id),
+    )
+
+
+class InelsDeviceInfos:
+    """Device info built once per device and shared by its entities.
+
+    The info is built again only when the device is announced with another
+    type, title or parent.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._infos: dict[str, tuple[tuple[str, str, str], DeviceInfo]] = {}
+
+    def get(self, device: Device) -> DeviceInfo:
+        """Device info of the device."""
+        fingerprint = (device.inels_type, device.title, device.parent_id)
+        cached = self._infos.get(device.unique_id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        device_info = build_device_info(device)
+        self._infos[device.unique_id] = (fingerprint, device_info)
+        return device_info
+
+    @callback
+    def async_register(
+        self, hass: HomeAssistant, entry: ConfigEntry, devices: Iterable[Device]
+    ) -> None:
+        """Create or update the registry entries of the devices in one pass.
+
+        The entities of the devices then find their entries unchanged.
+        """
+        device_registry = dr.async_get(hass)
+        for device in devices:
+            device_registry.async_get_or_create(
+                config_entry_id=entry.entry_id, **self.get(device)
+            )
@@ -0,0 +1,75 @@
+"""Diagnostics support for iNELS."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .commands import InelsCommandAggregator
+from .const import (
+    COMMANDS,
+    DEVICE_METRICS,
+    DEVICES,
+    DOMAIN,
+    OPTIMISTIC_STATS,
+    PRESS_LATENCY,
+    SUBSCRIPTIONS,
+    TRANSITIONS,
+    UPDATE_QUEUE,
+)
+from .metrics import DeviceMetrics, LatencyStats, OptimisticStats
+from .subscription import InelsSubscriptions
+from .transitions import InelsTransitionScheduler
+from .updates import InelsUpdateQueue
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    inels_data: dict[str, Any] = hass.data[DOMAIN][entry.entry_id]
+    subscriptions: InelsSubscriptions = inels_data[SUBSCRIPTIONS]
+    update_queue: InelsUpdateQueue = inels_data[UPDATE_QUEUE]
+    press_latency: LatencyStats = inels_data[PRESS_LATENCY]
+    commands: InelsCommandAggregator = inels_data[COMMANDS]
+    optimistic: OptimisticStats = inels_data[OPTIMISTIC_STATS]
+    transitions: InelsTransitionScheduler = inels_data[TRANSITIONS]
+    device_metrics: DeviceMetrics = inels_data[DEVICE_METRICS]
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "devices": len(inels_data[DEVICES]),
+        "subscriptions": {
+            "active": subscriptions.active,
+            "entities": subscriptions.references,
+        },
+        "updates": {
+            "emitted": subscriptions.emitted,
+            "suppressed": subscriptions.suppressed,
+            "batches": update_queue.batches,
+            "writes": update_queue.writes,
+            "flush_duration": update_queue.flush.as_dict(),
+        },
+        "commands": {
+            "requested": commands.requested,
+            "published": commands.published,
+            "queue_depth": commands.depth,
+            "max_queue_depth": commands.max_depth,
+            "queue_wait": commands.wait.as_dict(),
+            "executor_wait": commands.executor_wait.as_dict(),
+            "payloads": commands.payloads.as_dict(),
+        },
+        "optimistic": optimistic.as_dict(),
+        "transitions": {
+            "active": transitions.active,
+            "frames": transitions.frames,
+            "deferred": transitions.deferred,
+        },
+        "button_press_latency": press_latency.as_dict(),
+        "device_metrics": device_metrics.as_dict(),
+    }
@@ -0,0 +1,356 @@
+"""Discovery of iNELS devices with a persistent cache."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+from inelsmqtt import InelsMqtt
+from inelsmqtt.const import (
+    DISCOVERY_TIMEOUT_IN_SEC,
+    FRAGMENT_DEVICE_TYPE,
+    FRAGMENT_STATE,
+    MQTT_SET_TOPIC_PREFIX,
+    MQTT_STATUS_TOPIC_PREFIX,
+    MQTT_TOTAL_CONNECTED_TOPIC,
+    MQTT_TOTAL_STATUS_TOPIC,
+    TOPIC_FRAGMENTS,
+)
+from inelsmqtt.devices import Device
+from inelsmqtt.utils.core import (
+    INELS_ASSUMED_STATE_DEVICES,
+    DeviceTypeNotFound,
+    ProtocolHandlerMapper,
+)
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DEVICE_INFOS,
+    DISCOVERY_BATCH_IN_SEC,
+    DISCOVERY_WINDOW_IN_SEC,
+    DOMAIN,
+    LOGGER,
+    SIGNAL_NEW_DEVICES,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from .device_info import InelsDeviceInfos
+from .ha_mqtt import InelsHaMqtt
+from .library import MQTT_LAST_VALUES, MQTT_MESSAGE_HANDLER
+from .planner import InelsEntityPlan
+from .platforms import InelsPlatforms
+
+
+def _restore_value(mqtt: InelsMqtt | InelsHaMqtt, topic: str, payload: bytes) -> None:
+    """Make the cached payload the current and the last value of the topic."""
+    if isinstance(mqtt, InelsHaMqtt):
+        mqtt.restore_value(topic, payload)
+    else:
+        mqtt.messages()[topic] = payload
+        # the library has no public setter for last values, the attribute is
+        # checked when the config entry is set up
+        getattr(mqtt, MQTT_LAST_VALUES)[topic] = payload
+
+
+class InelsDiscoveryCache:
+    """Discovered devices persisted between restarts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache of the config entry."""
+        self._store: Store[dict[str, list[dict[str, Any]]]] = Store(
+            hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry_id}"
+        )
+
+    async def async_restore(self, mqtt: InelsMqtt | InelsHaMqtt) -> list[Device]:
+        """Create devices from the cache, seeded with their last state."""
+        if (data := await self._store.async_load()) is None:
+            return []
+
+        devices: list[Device] = []
+        for item in data["devices"]:
+            try:
+                device = Device(mqtt, item["state_topic"])  # type: ignore[arg-type]
+            except DeviceTypeNotFound:
+                continue
+
+            if item["state"] is not None:
+                _restore_value(mqtt, device.state_topic, item["state"].encode())
+            devices.append(device)
+
+        LOGGER.info("Restored %s devices from the discovery cache", len(devices))
+        return devices
+
+    async def async_save(self, devices: list[Device]) -> None:
+        """Persist the devices together with their last state."""
+        items: list[dict[str, Any]] = []
+        for device in devices:
+            state = device.mqtt.messages().get(device.state_topic)
+            items.append(
+                {
+                    "state_topic": device.state_topic,
+                    "connected_topic": device.connected_topic,
+                    "unique_id": device.unique_id,
+                    "parent_id": device.parent_id,
+                    "device_type": device.device_type,
+                    "inels_type": device.inels_type,
+                    "state": state.decode() if state is not None else None,
+                }
+            )
+        await self._store.async_save({"devices": items})
+
+
+class InelsStreamingDiscovery:
+    """Discovery creating devices as soon as their topics arrive.
+
+    The status and connected wildcards stay subscribed for the lifetime of the
+    entry. Devices heard of for the first time are handed to the platforms in
+    small batches, so the entities of the first devices are available while
+    the rest of the installation is still being announced.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        mqtt: InelsMqtt | InelsHaMqtt,
+        devices: list[Device],
+        cache: InelsDiscoveryCache,
+        platforms: InelsPlatforms,
+        on_finished: Callable[[], None],
+    ) -> None:
+        """Initialize the discovery of the config entry."""
+        self._hass = hass
+        self._entry = entry
+        self._mqtt = mqtt
+        self._devices = devices
+        self._cache = cache
+        self._platforms = platforms
+        self._on_finished = on_finished
+
+        self._known: dict[str, Device] = {
+            device.state_topic: device for device in devices
+        }
+        self._unique_ids: dict[str, str] = {
+            device.unique_id: device.state_topic for device in devices
+        }
+        # topics handled already, read from the network thread of paho
+        self._processed: set[str] = set()
+        self._seen: set[str] = set()
+        self._connected_only: set[str] = set()
+        self._changed: set[str] = set()
+        self._pending: list[Device] = []
+
+        self._started = False
+        self._window_open = True
+        self._unsub_flush: CALLBACK_TYPE | None = None
+
+    async def async_subscribe(self) -> None:
+        """Subscribe to the wildcards, new devices are held back until start."""
+        if isinstance(self._mqtt, InelsHaMqtt):
+            self._mqtt.set_message_hook(self._async_process_topic)
+            await self._mqtt.async_subscribe(
+                [MQTT_TOTAL_CONNECTED_TOPIC, MQTT_TOTAL_STATUS_TOPIC]
+            )
+            return
+
+        mqtt = self._mqtt
+        # the library has no public hook for received messages, the handler
+        # is checked when the config entry is set up
+        on_message = getattr(mqtt, MQTT_MESSAGE_HANDLER)
+
+        def _on_message(client: Any, userdata: Any, msg: Any) -> None:
+            on_message(client, userdata, msg)
+            if msg.topic not in self._processed:
+                self._hass.loop.call_soon_threadsafe(
+                    self._async_process_topic, msg.topic
+                )
+
+        mqtt.client.on_message = _on_message
+        await self._hass.async_add_executor_job(
+            mqtt.subscribe, [MQTT_TOTAL_CONNECTED_TOPIC, MQTT_TOTAL_STATUS_TOPIC]
+        )
+        if not mqtt.is_subscribed(MQTT_TOTAL_STATUS_TOPIC):
+            raise ConnectionError("Subscription to the status topics failed")
+
+    @callback
+    def async_start(self) -> None:
+        """Start handing new devices to the platforms and open the window."""
+        self._started = True
+        self._async_flush()
+
+        self._entry.async_on_unload(
+            async_call_later(
+                self._hass, DISCOVERY_TIMEOUT_IN_SEC, self._async_send_comm_test
+            )
+        )
+        self._entry.async_on_unload(
+            async_call_later(
+                self._hass, DISCOVERY_WINDOW_IN_SEC, self._async_close_window
+            )
+        )
+        self._entry.async_on_unload(self._async_cancel_flush)
+
+    @callback
+    def _async_process_topic(self, topic: str) -> None:
+        """Handle the first message of a topic."""
+        if topic in self._processed:
+            return
+        self._processed.add(topic)
+
+        fragments = topic.split("/")
+        device_type = fragments[TOPIC_FRAGMENTS[FRAGMENT_DEVICE_TYPE]]
+        if device_type not in ProtocolHandlerMapper.DEVICE_TYPE_MAP:
+            if device_type != "gw":
+                LOGGER.error("No handler found for device_type: %s", device_type)
+            return
+
+        stripped_topic = "/".join(fragments[2:])
+        state_topic = MQTT_STATUS_TOPIC_PREFIX + stripped_topic
+        self._seen.add(state_topic)
+
+        if state_topic in self._known:
+            return
+
+        if fragments[TOPIC_FRAGMENTS[FRAGMENT_STATE]] == "status":
+            self._connected_only.discard(stripped_topic)
+            self._async_add_device(state_topic)
+        elif (
+            ProtocolHandlerMapper.get_handler(device_type)
+            in INELS_ASSUMED_STATE_DEVICES
+        ):
+            self._async_add_device(state_topic)
+        else:
+            # device without a retained status, asked for it later
+            self._connected_only.add(stripped_topic)
+
+    @callback
+    def _async_add_device(self, state_topic: str) -> None:
+        """Create the device and queue it for the platforms."""
+        try:
+            device = Device(self._mqtt, state_topic)  # type: ignore[arg-type]
+        except DeviceTypeNotFound:
+            return
+
+        self._known[state_topic] = device
+        if device.unique_id in self._unique_ids:
+            # same device address announced with another device type
+            LOGGER.info("Device type of %s changed", device.unique_id)
+            self._changed.add(device.unique_id)
+            if not self._window_open:
+                self._async_reload()
+            return
+
+        self._unique_ids[device.unique_id] = state_topic
+        self._pending.append(device)
+        if self._started and self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self._hass, DISCOVERY_BATCH_IN_SEC, self._async_flush
+            )
+
+    @callback
+    def _async_flush(self, _now: datetime | None = None) -> None:
+        """Hand the queued devices to the platforms."""
+        self._unsub_flush = None
+        if not self._pending:
+            return
+
+        added, self._pending = self._pending, []
+        self._devices.extend(added)
+        LOGGER.info("Discovered %s new devices", len(added))
+        device_infos: InelsDeviceInfos = self._hass.data[DOMAIN][
+            self._entry.entry_id
+        ][DEVICE_INFOS]
+        device_infos.async_register(self._hass, self._entry, added)
+        plan = InelsEntityPlan(added)
+        async_dispatcher_send(
+            self._hass, SIGNAL_NEW_DEVICES.format(self._entry.entry_id), plan
+        )
+        # platforms set up now plan all devices, including the added ones
+        self._platforms.async_setup_new(plan)
+
+        if not self._window_open:
+            self._entry.async_create_background_task(
+                self._hass, self._cache.async_save(self._devices), "inels cache"
+            )
+
+    @callback
+    def _async_cancel_flush(self) -> None:
+        """Cancel the scheduled hand over of new devices."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+    async def _async_send_comm_test(self, _now: datetime) -> None:
+        """Ask the devices which announced only their connection for a status."""
+        for stripped_topic in list(self._connected_only):
+            handler = ProtocolHandlerMapper.get_handler(stripped_topic.split("/")[1])
+            if not (command := getattr(handler, "COMM_TEST", lambda: None)()):
+                continue
+
+            LOGGER.info("Sending comm test to device %s", stripped_topic)
+            set_topic = MQTT_SET_TOPIC_PREFIX + stripped_topic
+            if isinstance(self._mqtt, InelsHaMqtt):
+                await self._mqtt.async_publish(set_topic, command)
+            else:
+                await self._hass.async_add_executor_job(
+                    self._mqtt.publish, set_topic, command
+                )
+
+    @callback
+    def _async_close_window(self, _now: datetime) -> None:
+        """Finish the discovery in the background."""
+        self._entry.async_create_background_task(
+            self._hass, self._async_finish(), "inels discovery"
+        )
+
+    async def _async_finish(self) -> None:
+        """Drop devices which were not heard of and store the rest."""
+        self._window_open = False
+        self._async_flush()
+
+        if self._changed:
+            await self._cache.async_save(
+                [
+                    device
+                    for device in self._devices
+                    if device.unique_id not in self._changed
+                ]
+            )
+            self._async_reload()
+            return
+
+        removed = [
+            device for device in self._devices if device.state_topic not in self._seen
+        ]
+        if removed:
+            device_registry = dr.async_get(self._hass)
+            for device in removed:
+                self._devices.remove(device)
+                self._known.pop(device.state_topic, None)
+                self._unique_ids.pop(device.unique_id, None)
+                if device_entry := device_registry.async_get_device(
+                    identifiers={(DOMAIN, device.unique_id)}
+                ):
+                    LOGGER.info(
+                        "Removing device %s, it was not discovered", device.unique_id
+                    )
+                    device_registry.async_remove_device(device_entry.id)
+
+        await self._cache.async_save(self._devices)
+        LOGGER.info("Finished discovery of %s devices", len(self._devices))
+        # entities of platforms still being set up are not stale
+        await self._platforms.async_wait()
+        self._on_finished()
+
+    @callback
+    def _async_reload(self) -> None:
+        """Reload the entry to set up the changed devices from scratch."""
+        self._hass.async_create_task(
+            self._hass.config_entries.async_reload(self._entry.entry_id)
+        )
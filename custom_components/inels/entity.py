@@ -1,16 +1,139 @@
 """Base class for iNELS components."""
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+import time
+from typing import Any
+
 from inelsmqtt.devices import Device
 
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.helpers import entity_platform, issue_registry as ir
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+
+from .commands import (
+    InelsCommandAggregator,
+    async_publish_ha_value,
+    decode_published_state,
+)
+from .const import (
+    COMMANDS,
+    CONFIRM_TIMEOUT,
+    CREATED_ENTITIES,
+    DEVICE_INFOS,
+    DEVICE_METRICS,
+    DEVICES,
+    DOMAIN,
+    ENTITIES,
+    ENTITY_PLAN,
+    EVENT_ALERT,
+    LOGGER,
+    OPTIMISTIC_STATS,
+    SIGNAL_NEW_DEVICES,
+    SUBSCRIPTIONS,
+    UPDATE_QUEUE,
+)
+from .device_info import InelsDeviceInfos, build_device_info
+from .metrics import DeviceStats, OptimisticStats
+from .planner import InelsEntityPlan
+from .subscription import (
+    Field,
+    InelsSubscriptions,
+    field_accessor,
+    field_value,
+    freeze_value,
+)
+from .updates import InelsUpdateQueue
+
+
+@dataclass
+class InelsAlert:
+    """Alert flag of a channel, the message takes the entity and device."""
+
+    key: str
+    message: str
+
+
+# attributes of commands which the devices never echo
+_COMMAND_ATTRIBUTES = {"set_pos"}
+
+
+def _expected_change(
+    published: Any, value: Any, field: Field
+) -> dict[str | None, Any]:
+    """Attributes of the field the value changes, None stands for the whole field."""
+    new = field_value(value, field)
+    if not hasattr(new, "__dict__"):
+        return {None: freeze_value(new)}
+
+    old = field_value(published, field) if published is not None else None
+    expected: dict[str | None, Any] = {}
+    for name, item in vars(new).items():
+        if name.startswith("_") or name in _COMMAND_ATTRIBUTES:
+            continue
+        item = freeze_value(item)
+        if old is None or freeze_value(getattr(old, name, None)) != item:
+            expected[name] = item
+    return expected
+
+
+def _matches(expected: dict[str | None, Any], actual: Any) -> bool:
+    """Whether the echoed field has the expected attributes."""
+    return all(
+        freeze_value(actual if name is None else getattr(actual, name, None)) == item
+        for name, item in expected.items()
+    )
+
+
+@callback
+def async_setup_inels_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    create_entities: Callable[[InelsEntityPlan], list[Entity]],
+    update_before_add: bool = False,
+) -> None:
+    """Add entities of the planned devices and of devices discovered later."""
+    domain = entity_platform.async_get_current_platform().domain
+    inels_data: dict[str, Any] = hass.data[DOMAIN][config_entry.entry_id]
+    created: set[tuple[str, str]] = inels_data[CREATED_ENTITIES]
 
-from .const import DOMAIN, LOGGER
+    @callback
+    def async_add_plan(plan: InelsEntityPlan) -> None:
+        entities = create_entities(plan)
+        # registry entries which are not created are removed as stale
+        created.update((domain, entity.unique_id) for entity in entities)
+        async_add_entities(entities, update_before_add)
+
+    # platforms set up after the start plan the devices known at that time
+    if (plan := inels_data.get(ENTITY_PLAN)) is None:
+        plan = InelsEntityPlan(inels_data[DEVICES])
+    async_add_plan(plan)
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_NEW_DEVICES.format(config_entry.entry_id), async_add_plan
+        )
+    )
 
 
 class InelsBaseEntity(Entity):
     """Base Inels device."""
 
+    # the requested state is shown before the device confirms it
+    _supports_optimistic = False
+    # alert flags of the channel, an entity with an active alert is unavailable
+    _alerts: list[InelsAlert] = []
+
     def __init__(
         self,
         device: Device,
@@ -27,24 +150,218 @@ class InelsBaseEntity(Entity):
 
         self._key = key
         self._index = index
+        # reads the channel of the entity from a state of the device
+        self._read_field = field_accessor((key, index))
 
-        self._device.add_ha_callback(self.key, self.index, self._callback)
+        self._update_queue: InelsUpdateQueue | None = None
+        self._device_infos: InelsDeviceInfos | None = None
+        self._commands: InelsCommandAggregator | None = None
+        self._device_stats: DeviceStats | None = None
+
+        self._confirm_timeout: float | None = None
+        self._optimistic_stats: OptimisticStats | None = None
+        self._expected: dict[str | None, Any] | None = None
+        self._expected_since = 0.0
+        self._cancel_revert: CALLBACK_TYPE | None = None
+
+        self._active_alerts: frozenset[str] = frozenset()
 
     async def async_added_to_hass(self) -> None:
         """Add subscription of the data listener."""
-        self._device.mqtt.subscribe_listener(
-            self._device.state_topic, self._device.unique_id, self._device.callback
+        assert self.platform.config_entry
+        inels_data = self.hass.data[DOMAIN][self.platform.config_entry.entry_id]
+        subscriptions: InelsSubscriptions = inels_data[SUBSCRIPTIONS]
+        self._update_queue = inels_data[UPDATE_QUEUE]
+        self._commands = inels_data[COMMANDS]
+        self._device_stats = inels_data[DEVICE_METRICS].get(self._device)
+        if self._supports_optimistic:
+            self._confirm_timeout = inels_data[CONFIRM_TIMEOUT]
+            self._optimistic_stats = inels_data[OPTIMISTIC_STATS]
+            self.async_on_remove(self._async_cancel_revert)
+
+        entities: dict[str, InelsBaseEntity] = inels_data[ENTITIES]
+        entities[self.entity_id] = self
+        self.async_on_remove(partial(entities.pop, self.entity_id, None))
+
+        self.async_on_remove(
+            subscriptions.subscribe(self._device, self.key, self.index, self._callback)
         )
+        self.async_on_remove(partial(self._update_queue.discard, self))
+        if self._alerts:
+            # reported once the entity has its entity_id and name
+            self._async_set_alerts(self._raised_alerts())
+            self.async_on_remove(partial(self._async_set_alerts, []))
 
         self.async_on_remove(lambda: LOGGER.info("Entity %s to be removed", self.name))
 
+    def _update_attrs(self) -> None:
+        """Compute the attributes of the entity from the state of its device."""
+
+    def _raised_alerts(self) -> list[InelsAlert]:
+        """Alerts of the entity the state of its device raises."""
+        element = self._read_field(self._device.state)
+        return [alert for alert in self._alerts if getattr(element, alert.key, False)]
+
+    @callback
+    def _async_set_alerts(self, alerts: list[InelsAlert]) -> None:
+        """Store the raised alerts, report the ones raised and cleared since."""
+        active = frozenset(alert.key for alert in alerts)
+        if active == self._active_alerts:
+            return
+
+        for alert in alerts:
+            if alert.key in self._active_alerts:
+                continue
+            message = alert.message % (self.name, self._device_id)
+            LOGGER.warning(message)
+            ir.async_create_issue(
+                self.hass,
+                DOMAIN,
+                f"alert_{self._attr_unique_id}_{alert.key}",
+                is_fixable=False,
+                severity=ir.IssueSeverity.WARNING,
+                translation_key="alert",
+                translation_placeholders={"message": message},
+            )
+            self._async_fire_alert(alert.key, True)
+        for key in self._active_alerts - active:
+            ir.async_delete_issue(
+                self.hass, DOMAIN, f"alert_{self._attr_unique_id}_{key}"
+            )
+            self._async_fire_alert(key, False)
+
+        self._active_alerts = active
+
+    @callback
+    def _async_fire_alert(self, key: str, active: bool) -> None:
+        """Fire the event of a raised or cleared alert."""
+        self.hass.bus.async_fire(
+            EVENT_ALERT,
+            {ATTR_ENTITY_ID: self.entity_id, "alert": key, "active": active},
+        )
+
+    def _update_state(self) -> None:
+        """Evaluate the current frame of the device once for the write."""
+        self._update_attrs()
+        if self._alerts:
+            self._async_set_alerts(self._raised_alerts())
+
+    def add_to_platform_start(
+        self,
+        hass: HomeAssistant,
+        platform: entity_platform.EntityPlatform,
+        parallel_updates: asyncio.Semaphore | None,
+    ) -> None:
+        """Compute the attributes before the registry entry reads them.
+
+        The alerts are evaluated once the entity is added.
+        """
+        super().add_to_platform_start(hass, platform, parallel_updates)
+        if platform.config_entry is not None:
+            self._device_infos = hass.data[DOMAIN][platform.config_entry.entry_id][
+                DEVICE_INFOS
+            ]
+        self._update_attrs()
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state computed once from the current frame."""
+        self._update_state()
+        super().async_write_ha_state()
+        if self._device_stats is not None:
+            self._device_stats.writes += 1
+
     def _callback(self) -> None:
         """Get data from broker into the HA."""
-        if hasattr(self, 'hass'):
-            try:
-                self.schedule_update_ha_state()
-            except Exception as e:
-                LOGGER.error("schedule_update_ha_state DT_%s, %s, %s", self._device.device_class, self._device.info_serialized(), e)
+        if self._expected is not None:
+            self.hass.loop.call_soon_threadsafe(
+                self._async_reconcile, time.monotonic()
+            )
+        if self._update_queue is not None:
+            self._update_queue.schedule(self)
+
+    async def async_set_ha_value(self, value: Any) -> bool:
+        """Publish HA value of the device, merged with the other writes to it.
+
+        In the optimistic mode the requested state is written right away and
+        reverted when the device does not echo it within the timeout.
+        """
+        if self._confirm_timeout is None:
+            return await self._async_publish(value)
+
+        self._async_cancel_revert()
+        self._expected = _expected_change(
+            decode_published_state(self._device), value, (self.key, self.index)
+        )
+        self._expected_since = time.monotonic()
+        self._cancel_revert = async_call_later(
+            self.hass, self._confirm_timeout, self._async_revert
+        )
+        self.async_write_ha_state()
+
+        if not await self._async_publish(value):
+            self._async_revert()
+            return False
+        return True
+
+    async def _async_publish(self, value: Any) -> bool:
+        """Publish HA value of the device."""
+        if self._commands is None:
+            return await async_publish_ha_value(self.hass, self._device, value)
+        return await self._commands.async_set_ha_value(self._device, value)
+
+    @callback
+    def _async_cancel_revert(self) -> None:
+        """Stop waiting for the confirmation."""
+        self._expected = None
+        if self._cancel_revert is not None:
+            self._cancel_revert()
+            self._cancel_revert = None
+
+    @callback
+    def _async_reconcile(self, received: float) -> None:
+        """Take the echoed state of the device over the optimistic one."""
+        if (expected := self._expected) is None:
+            return
+        self._async_cancel_revert()
+
+        assert self._optimistic_stats is not None
+        actual = field_value(self._device.state, (self.key, self.index))
+        if _matches(expected, actual):
+            self._optimistic_stats.latency.record(received - self._expected_since)
+        else:
+            self._optimistic_stats.mismatched += 1
+            LOGGER.debug("%s echoed a different state than requested", self.entity_id)
+
+    @callback
+    def _async_revert(self, _now: datetime | None = None) -> None:
+        """Show the last state of the device, the command was not confirmed."""
+        if self._expected is None:
+            return
+        self._cancel_revert = None
+        self._async_cancel_revert()
+
+        assert self._optimistic_stats is not None
+        self._optimistic_stats.reverted += 1
+        LOGGER.warning(
+            "%s did not confirm the command within %s s, reverting",
+            self.entity_id,
+            self._confirm_timeout,
+        )
+        self._device.get_value()
+        self.async_write_ha_state()
+
+    def apply_value(self, state: Any, value: Any) -> None:
+        """Write the value of the entity into a state of its device.
+
+        Used by the bulk set, entities which cannot be set raise ValueError.
+        """
+        raise ValueError(f"{self.entity_id} cannot be set")
+
+    @property
+    def device(self) -> Device:
+        """Return the iNELS device of the entity."""
+        return self._device
 
     @property
     def should_poll(self) -> bool:
@@ -53,22 +370,20 @@ class InelsBaseEntity(Entity):
 
     @property
     def device_info(self) -> DeviceInfo:
-        """Return device info."""
-        info = self._device.info()
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._device.unique_id)},
-            manufacturer=info.manufacturer,
-            model=info.model_number,
-            name=self._device.title,
-            sw_version=info.sw_version,
-            via_device=(DOMAIN, self._parent_id),
-        )
+        """Return device info, shared by the entities of the device."""
+        if self._device_infos is None:
+            return build_device_info(self._device)
+        return self._device_infos.get(self._device)
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
 
-        return self._device.is_available and super().available
+        return (
+            self._device.is_available
+            and not self._active_alerts
+            and super().available
+        )
 
     @property
     def key(self) -> str:
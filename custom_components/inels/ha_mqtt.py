@@ -0,0 +1,162 @@
+"""iNELS transport over the Home Assistant MQTT integration."""
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Callable
+import copy
+from typing import Any
+
+from inelsmqtt.const import FRAGMENT_DEVICE_TYPE, FRAGMENT_STATE, TOPIC_FRAGMENTS
+from inelsmqtt.utils.core import ProtocolHandlerMapper
+
+from homeassistant.components import mqtt
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+
+class InelsHaMqtt:
+    """InelsMqtt compatible client sharing the connection of the MQTT integration.
+
+    Messages are received by callbacks running on the event loop, so there is
+    no extra network thread and no executor job is needed for any I/O.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the client."""
+        self._hass = hass
+
+        self._listeners: dict[str, dict[str, Callable[[Any], Any]]] = defaultdict(
+            dict
+        )
+        self._subscriptions: dict[str, CALLBACK_TYPE] = {}
+        self._messages: dict[str, Any] = {}
+        self._last_values: dict[str, Any] = {}
+        self._message_hook: Callable[[str], None] | None = None
+        self._traffic_tap: Callable[[str, Any], None] | None = None
+
+    @property
+    def client(self) -> None:
+        """There is no own paho client, the MQTT integration owns it."""
+        return None
+
+    @property
+    def is_available(self) -> bool:
+        """Is the MQTT integration connected to the broker."""
+        return mqtt.is_connected(self._hass)
+
+    @property
+    def list_of_listeners(self) -> dict[str, dict[str, Callable[[Any], Any]]]:
+        """List of listeners."""
+        return self._listeners
+
+    def is_subscribed(self, topic: str) -> bool:
+        """Get info if the topic is subscribed."""
+        return topic in self._subscriptions
+
+    def last_value(self, topic: str) -> Any:
+        """Get last value of the selected topic."""
+        return self._last_values.get(topic)
+
+    def messages(self) -> dict[str, Any]:
+        """Last payload of every received topic."""
+        return self._messages
+
+    def restore_value(self, topic: str, payload: Any) -> None:
+        """Set the current and the last value of the topic."""
+        self._messages[topic] = payload
+        self._last_values[topic] = payload
+
+    async def async_connect(self) -> bool:
+        """Wait for the MQTT integration to be set up."""
+        return await mqtt.async_wait_for_mqtt_client(self._hass)
+
+    def subscribe_listener(
+        self, topic: str, unique_id: str, fnc: Callable[[Any], Any]
+    ) -> None:
+        """Append new item into the datachange listener."""
+        stripped_topic = "/".join(topic.split("/")[2:])
+        self._listeners[stripped_topic][unique_id] = fnc
+
+    def unsubscribe_listeners(self) -> None:
+        """Unsubscribe listeners."""
+        self._listeners.clear()
+
+    def set_message_hook(self, hook: Callable[[str], None] | None) -> None:
+        """Call the hook with the topic of every received message."""
+        self._message_hook = hook
+
+    def set_traffic_tap(self, tap: Callable[[str, Any], None] | None) -> None:
+        """Call the tap with the topic and payload of every received message."""
+        self._traffic_tap = tap
+
+    async def async_publish(
+        self, topic: str, payload: Any, qos: int = 0, retain: bool = True
+    ) -> bool:
+        """Publish a message through the MQTT integration."""
+        await mqtt.async_publish(self._hass, topic, payload, qos, retain)
+        return True
+
+    def publish(
+        self, topic: str, payload: Any, qos: int = 0, retain: bool = True
+    ) -> bool:
+        """Publish a message, safe to be called from any thread."""
+        mqtt.publish(self._hass, topic, payload, qos, retain)
+        return True
+
+    async def async_subscribe(self, topics: list[str]) -> None:
+        """Subscribe to the topics which are not subscribed yet."""
+        for topic in topics:
+            if topic in self._subscriptions:
+                continue
+            self._subscriptions[topic] = await mqtt.async_subscribe(
+                self._hass, topic, self._async_on_message, 0, None
+            )
+
+    @callback
+    def async_unsubscribe(self, topic: str) -> None:
+        """Unsubscribe from the topic."""
+        if (unsubscribe := self._subscriptions.pop(topic, None)) is not None:
+            unsubscribe()
+
+    @callback
+    def _async_on_message(self, msg: mqtt.ReceiveMessage) -> None:
+        """Store the payload and notify listeners of the topic."""
+        if self._traffic_tap is not None:
+            self._traffic_tap(msg.topic, msg.payload)
+        fragments = msg.topic.split("/")
+        device_type = fragments[TOPIC_FRAGMENTS[FRAGMENT_DEVICE_TYPE]]
+        message_type = fragments[TOPIC_FRAGMENTS[FRAGMENT_STATE]]
+
+        if device_type in ProtocolHandlerMapper.DEVICE_TYPE_MAP or device_type == "gw":
+            self._last_values[msg.topic] = (
+                copy.copy(self._messages[msg.topic])
+                if msg.topic in self._messages
+                else msg.payload
+            )
+            self._messages[msg.topic] = msg.payload
+
+        if device_type == "gw" and message_type == "connected":
+            mac = fragments[2]
+            for stripped_topic in self._listeners:
+                if stripped_topic.startswith(mac):
+                    self._notify_listeners(stripped_topic, True)
+        else:
+            stripped_topic = "/".join(fragments[2:])
+            if stripped_topic in self._listeners:
+                self._notify_listeners(stripped_topic, message_type == "connected")
+
+        if self._message_hook is not None:
+            self._message_hook(msg.topic)
+
+    def _notify_listeners(self, stripped_topic: str, is_connected: bool) -> None:
+        """Notify listeners for a specific topic."""
+        for listener in list(self._listeners[stripped_topic].values()):
+            listener(is_connected)
+
+    def disconnect(self) -> None:
+        """Drop all subscriptions, the connection stays with MQTT integration."""
+        for topic in list(self._subscriptions):
+            self.async_unsubscribe(topic)
+
+    def close(self) -> None:
+        """Close the client."""
+        self.disconnect()
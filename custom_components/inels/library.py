@@ -0,0 +1,36 @@
+"""Private attributes of the elkoep-mqtt library the integration relies on.
+
+The library has no public API for them. They are checked against the
+pinned version by the tests and when a config entry is set up, a library
+without them is not supported.
+"""
+from __future__ import annotations
+
+from inelsmqtt import InelsMqtt
+from inelsmqtt.devices import Device
+
+# state and values of a device, set by the commands published on the loop
+DEVICE_STATE = "_Device__state"
+DEVICE_VALUES = "_Device__values"
+# last values of the paho transport, seeded by the discovery cache
+MQTT_LAST_VALUES = "_InelsMqtt__last_values"
+# message handler of the paho transport, wrapped by the streaming discovery
+MQTT_MESSAGE_HANDLER = "_InelsMqtt__on_message"
+
+
+def _has(cls: type, name: str) -> bool:
+    """Is the attribute defined by the class or assigned by its constructor."""
+    return hasattr(cls, name) or name in cls.__init__.__code__.co_names
+
+
+def missing_library_attributes(paho: bool) -> list[str]:
+    """Private attributes the installed library does not have.
+
+    The attributes of the paho transport are checked only when it is used.
+    """
+    required: list[tuple[type, str]] = [(Device, DEVICE_STATE), (Device, DEVICE_VALUES)]
+    if paho:
+        required += [(InelsMqtt, MQTT_LAST_VALUES), (InelsMqtt, MQTT_MESSAGE_HANDLER)]
+    return [
+        f"{cls.__name__}.{name}" for cls, name in required if not _has(cls, name)
+    ]
@@ -1,6 +1,7 @@
 """iNELS light."""
 from __future__ import annotations
 from dataclasses import dataclass, field
+from functools import partial
 from typing import Any, cast
 
 from inelsmqtt.devices import Device
@@ -14,52 +15,51 @@ from homeassistant.components.light import (
     ColorMode,
     LightEntity,
     LightEntityDescription,
+    LightEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .entity import InelsAlert, InelsBaseEntity, async_setup_inels_entities
 from .const import (
-    DEVICES,
     DOMAIN,
     ICON_FLASH,
     ICON_LIGHT,
-    LOGGER,
-    OLD_ENTITIES,
+    TRANSITIONS,
 )
+from .planner import InelsEntityPlan
+from .transitions import InelsTransitionScheduler
 
 
 # LIGHT PLATFORM
 @dataclass
-class InelsLightAlert:
+class InelsLightAlert(InelsAlert):
     """Inels light alert property description."""
 
-    key: str
-    message: str
-
 
 thermal_alert = InelsLightAlert(
-    key="toa", message="Thermal overload on light %s of device %d"
+    key="toa", message="Thermal overload on light %s of device %s"
 )
 
 current_alert = InelsLightAlert(
-    key="coa", message="Current overload on light %s of device %d"
+    key="coa", message="Current overload on light %s of device %s"
 )
 
 dali_comm = InelsLightAlert(
     key="alert_dali_communication",
-    message="Dali communication error on light %s of device %d",
+    message="Dali communication error on light %s of device %s",
 )
 
 dali_power = InelsLightAlert(
-    key="alert_dali_communication", message="Dali power error on light %s of device %d"
+    key="alert_dali_power", message="Dali power error on light %s of device %s"
 )
 
 aout_current = InelsLightAlert(
-    key="aout_coa", message="Current overload of AOUT %s of device %d"
+    key="aout_coa", message="Current overload of AOUT %s of device %s"
 )
 
 
@@ -102,60 +102,55 @@ INELS_LIGHT_TYPES: dict[str, InelsLightType] = {
 }
 
 
+def _create_entities(plan: InelsEntityPlan) -> list[InelsBaseEntity]:
+    """Create entities of the planned devices."""
+    entities: list[InelsBaseEntity] = []
+    for _, device, key, value in plan.blueprints(INELS_LIGHT_TYPES):
+        type_dict = INELS_LIGHT_TYPES[key]
+        if len(value) == 1:
+            entities.append(
+                InelsLight(
+                    device=device,
+                    key=key,
+                    index=0,
+                    description=InelsLightDescription(
+                        key=key,
+                        name=type_dict.name,
+                        icon=type_dict.icon,
+                        color_modes=type_dict.color_modes,
+                        alerts=type_dict.alerts,
+                    ),
+                )
+            )
+        else:
+            for k in range(len(value)):
+                entities.append(
+                    InelsLight(
+                        device=device,
+                        key=key,
+                        index=k,
+                        description=InelsLightDescription(
+                            key=f"{key}{k}",
+                            name=f"{type_dict.name} {k+1}",
+                            icon=type_dict.icon,
+                            color_modes=type_dict.color_modes,
+                            alerts=type_dict.alerts,
+                        ),
+                    )
+                )
+
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Load iNELS lights from config entry."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.LIGHT)
-
-    items = INELS_LIGHT_TYPES.items()
-    entities: list[InelsBaseEntity] = []
-    for device in device_list:
-        for key, type_dict in items:
-            if hasattr(device.state, key):
-                if len(device.state.__dict__[key]) == 1:
-                    entities.append(
-                        InelsLight(
-                            device=device,
-                            key=key,
-                            index=0,
-                            description=InelsLightDescription(
-                                key=key,
-                                name=type_dict.name,
-                                icon=type_dict.icon,
-                                color_modes=type_dict.color_modes,
-                            ),
-                        )
-                    )
-                else:
-                    for k in range(len(device.state.__dict__[key])):
-                        entities.append(
-                            InelsLight(
-                                device=device,
-                                key=key,
-                                index=k,
-                                description=InelsLightDescription(
-                                    key=f"{key}{k}",
-                                    name=f"{type_dict.name} {k+1}",
-                                    icon=type_dict.icon,
-                                    color_modes=type_dict.color_modes,
-                                ),
-                            )
-                        )
-
-    async_add_entities(entities, True)
-
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
-
-    hass.data[DOMAIN][config_entry.entry_id][Platform.LIGHT] = old_entities
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, _create_entities, True
+    )
 
 
 @dataclass
@@ -171,6 +166,9 @@ class InelsLight(InelsBaseEntity, LightEntity):
 
     _entity_description: InelsLightDescription
 
+    _attr_supported_features = LightEntityFeature.TRANSITION
+    _supports_optimistic = True
+
     def __init__(
         self,
         device: Device,
@@ -185,6 +183,7 @@ class InelsLight(InelsBaseEntity, LightEntity):
             index=index,
         )
         self._entity_description = description
+        self._alerts = description.alerts or []
 
         self._attr_unique_id = slugify(f"{self._attr_unique_id}_{description.key}")
         self.entity_id = f"{Platform.LIGHT}.{self._attr_unique_id}"
@@ -199,89 +198,86 @@ class InelsLight(InelsBaseEntity, LightEntity):
             6500  # standard color temp, does not represent actual bulb
         )
 
-    @property
-    def available(self) -> bool:
-        """If it is available."""
-        if self._entity_description.alerts:
-            last_state = self._device.last_values.ha_value.__dict__[self.key][
-                self.index
-            ]
-            for alert in self._entity_description.alerts:
-                if hasattr(self._device.state, alert.key):
-                    if self._device.state.__dict__[alert.key]:
-                        if not last_state.__dict__[alert.key]:
-                            LOGGER.warning(alert.message, self.name, self._device_id)
-                        return False
-        return super().available
+        self._transitions: InelsTransitionScheduler | None = None
 
-    @property
-    def is_on(self) -> bool:
-        """Return true if light is on."""
-        return self._device.state.__dict__[self.key][self.index].brightness > 0
+    async def async_added_to_hass(self) -> None:
+        """Add subscription of the data listener and of the transitions."""
+        await super().async_added_to_hass()
+        assert self.platform.config_entry
+        self._transitions = self.hass.data[DOMAIN][self.platform.config_entry.entry_id][
+            TRANSITIONS
+        ]
+        self.async_on_remove(partial(self._transitions.async_cancel, self))
 
     @property
     def icon(self) -> str | None:
         """Light icon."""
         return self._entity_description.icon
 
-    @property
-    def brightness(self) -> int | None:
-        """Light brightness."""
-        return cast(
-            int,
-            self._device.state.__dict__[self.key][self.index].brightness * 2.55,
-        )
+    def _update_attrs(self) -> None:
+        """Compute the light attributes from the state of its channel."""
+        state = self._read_field(self._device.state)
 
-    @property
-    def rgb_color(self) -> tuple[int, int, int] | None:
-        state = self._device.state.__dict__[self.key][self.index]
-        if hasattr(state, "r"):
-            return (state.r, state.g, state.b)
-        return None
+        self._attr_is_on = state.brightness > 0
+        self._attr_brightness = cast(int, state.brightness * 2.55)
 
-    @property
-    def rgbw_color(self) -> tuple[int, int, int, int] | None:
-        state = self._device.state.__dict__[self.key][self.index]
+        self._attr_rgb_color = None
+        self._attr_rgbw_color = None
+        self._attr_color_temp_kelvin = None
+        self._attr_color_mode = None
+        if hasattr(state, "r"):
+            self._attr_rgb_color = (state.r, state.g, state.b)
+            self._attr_color_mode = ColorMode.RGB
         if hasattr(state, "w"):
-            return tuple(int(i * 2.55) for i in (state.r, state.g, state.b, state.w))
-        return None
-
-    @property
-    def color_temp_kelvin(self) -> int | None:
-        state = self._device.state.__dict__[self.key][self.index]
+            self._attr_rgbw_color = cast(
+                tuple[int, int, int, int],
+                tuple(int(i * 2.55) for i in (state.r, state.g, state.b, state.w)),
+            )
+            self._attr_color_mode = ColorMode.RGBW
         if hasattr(state, "relative_ct"):
-            return int(
+            self._attr_color_temp_kelvin = int(
                 (state.relative_ct / 100)
                 * (self.max_color_temp_kelvin - self.min_color_temp_kelvin)
                 + self.min_color_temp_kelvin
             )
-        return None
-
-    @property
-    def color_mode(self) -> ColorMode | str | None:
-        state = self._device.state.__dict__[self.key][self.index]
-        if hasattr(state, "w"):
-            return ColorMode.RGBW
-        if hasattr(state, "r"):
-            return ColorMode.RGB
-        if hasattr(state, "relative_ct"):
-            return ColorMode.COLOR_TEMP
-        return super().color_mode
+            if self._attr_color_mode is None:
+                self._attr_color_mode = ColorMode.COLOR_TEMP
+
+    def apply_value(self, state: Any, value: Any) -> None:
+        """Turn the light of the state on/off or set its brightness (0-255)."""
+        light = state.__dict__[self.key][self.index]
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            light.brightness = min(int(value / 2.55), 100)
+        elif not cv.boolean(value):
+            light.brightness = 0
+        elif light.brightness == 0:
+            light.brightness = 100
+
+    @callback
+    def _async_transition(self, target: int, **kwargs: Any) -> bool:
+        """Ramp the brightness (0-100) if a transition is requested."""
+        if self._transitions is None:
+            return False
+        if not kwargs.get(ATTR_TRANSITION):
+            self._transitions.async_cancel(self)
+            return False
+
+        start = self._read_field(self._device.state).brightness
+        self._transitions.async_start(self, start, target, kwargs[ATTR_TRANSITION])
+        return True
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Light to turn off."""
         if not self._device:
             return
 
-        transition = None
-        if ATTR_TRANSITION in kwargs:
-            transition = int(kwargs[ATTR_TRANSITION]) / 0.065
-            print(transition)
-        else:
-            # mount device ha value
-            ha_val = self._device.get_value().ha_value
-            ha_val.__dict__[self.key][self.index].brightness = 0
-            await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        if self._async_transition(0, **kwargs):
+            return
+
+        # mount device ha value
+        ha_val = self._device.get_value().ha_value
+        ha_val.__dict__[self.key][self.index].brightness = 0
+        await self.async_set_ha_value(ha_val)
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Light to turn on."""
@@ -307,6 +303,8 @@ class InelsLight(InelsBaseEntity, LightEntity):
             brightness = int(kwargs[ATTR_BRIGHTNESS] / 2.55)
             brightness = min(brightness, 100)
 
+            if self._async_transition(brightness, **kwargs):
+                return
             ha_val.__dict__[self.key][self.index].brightness = brightness
         elif ATTR_COLOR_TEMP_KELVIN in kwargs:
             color_temp = int(kwargs[ATTR_COLOR_TEMP_KELVIN])
@@ -320,10 +318,14 @@ class InelsLight(InelsBaseEntity, LightEntity):
             last_val = self._device.last_values.ha_value
 
             # uses previously observed brightness value if it isn't 0
-            ha_val.__dict__[self.key][self.index].brightness = (
+            brightness = (
                 100
                 if last_val.__dict__[self.key][self.index].brightness == 0
                 else last_val.__dict__[self.key][self.index].brightness
             )
 
-        await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+            if self._async_transition(brightness, **kwargs):
+                return
+            ha_val.__dict__[self.key][self.index].brightness = brightness
+
+        await self.async_set_ha_value(ha_val)
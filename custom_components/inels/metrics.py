@@ -0,0 +1,186 @@
+"""Runtime metrics of the iNELS integration."""
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+import time
+from typing import Any
+
+from inelsmqtt.devices import Device
+
+import homeassistant.util.dt as dt_util
+
+from .const import LATENCY_WINDOW
+
+
+class LatencyStats:
+    """Count, mean, maximum and last value of measured latencies.
+
+    The 95th percentile is taken from the latest latencies only.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self._recent: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, seconds: float) -> None:
+        """Add one measured latency."""
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    @property
+    def mean(self) -> float | None:
+        """Mean latency in seconds."""
+        return self.total / self.count if self.count else None
+
+    @property
+    def p95(self) -> float | None:
+        """95th percentile of the latest latencies in seconds."""
+        if not self._recent:
+            return None
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Statistics in milliseconds."""
+        mean, p95 = self.mean, self.p95
+        return {
+            "count": self.count,
+            "mean_ms": round(mean * 1000, 3) if mean is not None else None,
+            "p95_ms": round(p95 * 1000, 3) if p95 is not None else None,
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": round(self.last * 1000, 3),
+        }
+
+
+class OptimisticStats:
+    """Confirmations of the optimistically shown commands."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.latency = LatencyStats()
+        self.mismatched = 0
+        self.reverted = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Confirmation latency and the commands not confirmed as requested."""
+        return {
+            "confirmation_latency": self.latency.as_dict(),
+            "mismatched": self.mismatched,
+            "reverted": self.reverted,
+        }
+
+
+class PayloadStats:
+    """Commands and bytes published per device class."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self._classes: dict[str, list[int]] = {}
+
+    def record(self, device_class: str, payload: str, full_payload: str) -> None:
+        """Add one published payload and the full state payload it replaced."""
+        stats = self._classes.setdefault(device_class, [0, 0, 0, 0])
+        stats[0] += 1
+        stats[1] += len(payload)
+        stats[2] += len(full_payload)
+        stats[3] += payload != full_payload
+
+    def as_dict(self) -> dict[str, Any]:
+        """Statistics per device class."""
+        return {
+            device_class: {
+                "commands": commands,
+                "delta_commands": deltas,
+                "bytes": sent,
+                "bytes_per_command": round(sent / commands, 1),
+                "full_state_bytes": full,
+            }
+            for device_class, (commands, sent, full, deltas) in sorted(
+                self._classes.items()
+            )
+        }
+
+
+class DeviceStats:
+    """Traffic of one device.
+
+    The echo latency is the time from a published command to the next frame
+    of the device.
+    """
+
+    __slots__ = ("frames", "writes", "commands", "echo", "_last_seen", "_sent")
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.frames = 0
+        self.writes = 0
+        self.commands = 0
+        self.echo = LatencyStats()
+        self._last_seen: float | None = None
+        self._sent: float | None = None
+
+    @property
+    def last_seen(self) -> datetime | None:
+        """Time of the last message of the device."""
+        if self._last_seen is None:
+            return None
+        return dt_util.utc_from_timestamp(self._last_seen)
+
+    def seen(self) -> None:
+        """Note a message of the device, safe to call from any thread."""
+        self._last_seen = time.time()
+
+    def frame_received(self) -> None:
+        """Count a state frame, safe to call from any thread."""
+        self.frames += 1
+        self._last_seen = time.time()
+        if (sent := self._sent) is not None:
+            self._sent = None
+            self.echo.record(time.monotonic() - sent)
+
+    def command_sent(self) -> None:
+        """Count a published command and wait for its echo."""
+        self.commands += 1
+        self._sent = time.monotonic()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Statistics of the device."""
+        last_seen = self.last_seen
+        return {
+            "frames": self.frames,
+            "state_writes": self.writes,
+            "commands": self.commands,
+            "echo_latency": self.echo.as_dict(),
+            "last_seen": last_seen.isoformat() if last_seen is not None else None,
+        }
+
+
+class DeviceMetrics:
+    """Statistics of the devices of one entry by their state topics."""
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self._devices: dict[str, DeviceStats] = {}
+
+    def get(self, device: Device) -> DeviceStats:
+        """Statistics of the device, created on first use."""
+        if (stats := self._devices.get(device.state_topic)) is None:
+            stats = self._devices[device.state_topic] = DeviceStats()
+        return stats
+
+    def as_dict(self) -> dict[str, Any]:
+        """Statistics of all devices, the busiest first."""
+        return {
+            topic: stats.as_dict()
+            for topic, stats in sorted(
+                self._devices.items(), key=lambda item: -item[1].frames
+            )
+        }
@@ -13,14 +13,12 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .entity import InelsBaseEntity, async_setup_inels_entities
 from .const import (
-    DEVICES,
-    DOMAIN,
     ICON_NUMBER,
     LOGGER,
-    OLD_ENTITIES,
 )
+from .planner import InelsEntityPlan
 
 # NUMBER PLATFORM
 @dataclass
@@ -35,43 +33,37 @@ INELS_NUMBER_TYPES: dict[str, InelsNumberType] = {
     "number": InelsNumberType()
 }
 
+def _create_entities(plan: InelsEntityPlan) -> list[InelsBaseEntity]:
+    """Create entities of the planned devices."""
+    entities: list[InelsBaseEntity] = []
+    for _, device, key, value in plan.blueprints(INELS_NUMBER_TYPES):
+        type_dict = INELS_NUMBER_TYPES[key]
+        for k in range(len(value)):
+            entities.append(
+                InelsBusNumber(
+                    device=device,
+                    key=key,
+                    index=k,
+                    description=NumberEntityDescription(
+                        key=f"{key}{k}",
+                        name=f"{type_dict.name} {value[k].addr}",
+                        icon=type_dict.icon,
+                    )
+                )
+            )
+
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Load iNELS number.."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.NUMBER)
-
-    items = INELS_NUMBER_TYPES.items()
-    entities: list[InelsBaseEntity] = []
-    for device in device_list:
-        for key, type_dict in items:
-            if hasattr(device.state, key):
-                for k in range(len(device.state.__dict__[key])):
-                    entities.append(
-                        InelsBusNumber(
-                            device=device,
-                            key=key,
-                            index=k,
-                            description=NumberEntityDescription(
-                                key=f"{key}{k}",
-                                name=f"{type_dict.name} {device.state.__dict__[key][k].addr}",
-                                icon=type_dict.icon,
-                            )
-                        )
-                    )
-    async_add_entities(entities, False)
-
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
-
-    hass.data[DOMAIN][config_entry.entry_id][Platform.NUMBER] = old_entities
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, _create_entities, False
+    )
 
 
 class InelsBusNumber(InelsBaseEntity, NumberEntity):
@@ -102,17 +94,19 @@ class InelsBusNumber(InelsBaseEntity, NumberEntity):
         """Return entity availability."""
         return super().available
 
-    @property
-    def native_value(self) -> int | None:
-        """Return number."""
-        state = self._device.state
-        return state.__dict__[self.key][self.index].value
+    def _update_attrs(self) -> None:
+        """Compute the number from the state of the device."""
+        self._attr_native_value = self._read_field(self._device.state).value
 
     @property
     def icon(self) -> str | None:
         """Number icon."""
         return self.entity_description.icon
 
+    def apply_value(self, state: Any, value: Any) -> None:
+        """Write the number into the state."""
+        state.__dict__[self.key][self.index].value = float(value)
+
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
         if not self._device.is_available:
@@ -121,4 +115,4 @@ class InelsBusNumber(InelsBaseEntity, NumberEntity):
         ha_val = self._device.state
         ha_val.__dict__[self.key][self.index].value = value
 
-        await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        await self.async_set_ha_value(ha_val)
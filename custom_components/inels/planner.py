@@ -0,0 +1,57 @@
+"""Planning of the entities of iNELS devices."""
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable, KeysView
+from operator import attrgetter
+from typing import Any, NamedTuple
+
+from inelsmqtt.devices import Device
+
+
+class EntityBlueprint(NamedTuple):
+    """State key of a device, the base of one or more entities."""
+
+    position: int
+    device: Device
+    key: str
+    value: Any
+
+
+class InelsEntityPlan:
+    """Blueprints of the devices indexed by their state keys.
+
+    The state of every device is scanned once, the platforms look up only the
+    keys they handle instead of probing every device for every known key.
+    """
+
+    def __init__(self, devices: Iterable[Device]) -> None:
+        """Scan the states of the devices."""
+        self.devices = list(devices)
+        self._blueprints: dict[str, list[EntityBlueprint]] = defaultdict(list)
+
+        for position, device in enumerate(self.devices):
+            # undecodable payloads leave a bare object without any keys
+            if not hasattr(state := device.state, "__dict__"):
+                continue
+            for key, value in vars(state).items():
+                if key.startswith("_"):
+                    continue
+                self._blueprints[key].append(
+                    EntityBlueprint(position, device, key, value)
+                )
+
+    @property
+    def keys(self) -> KeysView[str]:
+        """State keys of the planned devices."""
+        return self._blueprints.keys()
+
+    def blueprints(self, keys: Iterable[str]) -> list[EntityBlueprint]:
+        """Blueprints of the keys, ordered by device and then by key."""
+        found: list[EntityBlueprint] = []
+        for key in keys:
+            found.extend(self._blueprints.get(key, ()))
+
+        # stable sort keeps the order of the keys within a device
+        found.sort(key=attrgetter("position"))
+        return found
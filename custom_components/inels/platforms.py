@@ -0,0 +1,111 @@
+"""Platforms of the iNELS integration set up for the planned devices."""
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+
+from .binary_sensor import INELS_BINARY_SENSOR_TYPES
+from .button import INELS_BUTTON_TYPES
+from .climate import INELS_CLIMATE_TYPES
+from .const import CONF_DIAGNOSTIC_SENSORS, LOGGER
+from .cover import INELS_SHUTTERS_TYPES
+from .light import INELS_LIGHT_TYPES
+from .number import INELS_NUMBER_TYPES
+from .planner import InelsEntityPlan
+from .select import INELS_SELECT_TYPES
+from .sensor import INELS_SENSOR_TYPES
+from .switch import INELS_SWITCH_TYPES
+
+# state keys each platform creates entities for, in the order of setup
+PLATFORM_KEYS: dict[Platform, frozenset[str]] = {
+    Platform.BUTTON: frozenset(INELS_BUTTON_TYPES),
+    Platform.SWITCH: frozenset(INELS_SWITCH_TYPES),
+    Platform.NUMBER: frozenset(INELS_NUMBER_TYPES),
+    Platform.LIGHT: frozenset(INELS_LIGHT_TYPES),
+    Platform.COVER: frozenset(INELS_SHUTTERS_TYPES),
+    Platform.SENSOR: frozenset(INELS_SENSOR_TYPES),
+    Platform.CLIMATE: frozenset(INELS_CLIMATE_TYPES),
+    Platform.BINARY_SENSOR: frozenset(INELS_BINARY_SENSOR_TYPES),
+    Platform.SELECT: frozenset(INELS_SELECT_TYPES),
+}
+
+PLATFORMS: list[Platform] = list(PLATFORM_KEYS)
+
+
+class InelsPlatforms:
+    """Platforms set up for the entities of the devices of one entry.
+
+    A platform is set up only when a device has a state key it creates
+    entities for. Platforms needed by devices discovered later are set up
+    in the background, they create the entities of all devices known then.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize without any platform."""
+        self._hass = hass
+        self._entry = entry
+        # the statistic sensors are created for every device
+        self._all_devices = (
+            {Platform.SENSOR}
+            if entry.options.get(CONF_DIAGNOSTIC_SENSORS, False)
+            else set()
+        )
+        self._setups: set[asyncio.Task] = set()
+
+        self.loaded: set[Platform] = set()
+
+    def needed(self, plan: InelsEntityPlan) -> list[Platform]:
+        """Platforms with entities of the planned devices."""
+        keys = plan.keys
+        return [
+            platform
+            for platform, platform_keys in PLATFORM_KEYS.items()
+            if not keys.isdisjoint(platform_keys)
+            or (plan.devices and platform in self._all_devices)
+        ]
+
+    def _missing(self, plan: InelsEntityPlan) -> list[Platform]:
+        """Platforms the planned devices need which are not set up yet."""
+        missing = [
+            platform for platform in self.needed(plan) if platform not in self.loaded
+        ]
+        self.loaded.update(missing)
+        return missing
+
+    async def async_setup(self, plan: InelsEntityPlan) -> None:
+        """Set up the platforms of the planned devices."""
+        platforms = self._missing(plan)
+        LOGGER.debug("Setting up platforms %s", ", ".join(platforms))
+        await self._hass.config_entries.async_forward_entry_setups(
+            self._entry, platforms
+        )
+
+    @callback
+    def async_setup_new(self, plan: InelsEntityPlan) -> None:
+        """Set up the platforms newly discovered devices need in the background."""
+        if not (platforms := self._missing(plan)):
+            return
+        LOGGER.info("Setting up platforms %s", ", ".join(platforms))
+        task = self._entry.async_create_background_task(
+            self._hass,
+            self._hass.config_entries.async_forward_entry_setups(
+                self._entry, platforms
+            ),
+            "inels platforms",
+        )
+        self._setups.add(task)
+        task.add_done_callback(self._setups.discard)
+
+    async def async_wait(self) -> None:
+        """Wait until the platforms set up in the background are done."""
+        if self._setups:
+            await asyncio.wait(self._setups)
+
+    async def async_unload(self) -> bool:
+        """Unload the platforms which were set up."""
+        return await self._hass.config_entries.async_unload_platforms(
+            self._entry, list(self.loaded)
+        )
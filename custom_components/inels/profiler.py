@@ -0,0 +1,219 @@
+"""On-demand profiling of the hot paths of the iNELS integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Iterator
+import cProfile
+from datetime import datetime
+from functools import wraps
+import io
+import pstats
+import time
+import tracemalloc
+from typing import Any
+
+from inelsmqtt import InelsMqtt
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+import homeassistant.util.dt as dt_util
+
+from . import commands
+from .commands import InelsCommandAggregator
+from .const import LOGGER, PROFILE_REPORT_LINES
+from .discovery import InelsStreamingDiscovery
+from .entity import InelsBaseEntity
+from .ha_mqtt import InelsHaMqtt
+from .metrics import LatencyStats
+from .updates import InelsUpdateQueue
+
+# (owner, attribute, span) of the timed entry points, the attributes are
+# looked up on every call so replacing them reaches the running entities
+_ENTRY_POINTS: tuple[tuple[Any, str, str], ...] = (
+    (InelsHaMqtt, "_notify_listeners", "frame dispatch"),
+    (InelsMqtt, "_InelsMqtt__notify_listeners", "frame dispatch"),
+    (InelsUpdateQueue, "_async_flush", "state write batch"),
+    (InelsCommandAggregator, "async_set_ha_value", "command request"),
+    (commands, "encode_command", "command encoding"),
+    (commands, "async_publish_ha_value", "command publish"),
+    (InelsStreamingDiscovery, "_async_add_device", "discovery of a device"),
+    (InelsStreamingDiscovery, "_async_flush", "discovery batch"),
+)
+
+
+def _entity_classes(cls: type) -> Iterator[type]:
+    """The class and all its loaded subclasses."""
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from _entity_classes(subclass)
+
+
+def _entry_points() -> list[tuple[Any, str, str]]:
+    """Entry points with the attribute evaluation of every entity class."""
+    return [
+        *_ENTRY_POINTS,
+        *(
+            (cls, "_update_attrs", f"{cls.__name__} attributes")
+            for cls in _entity_classes(InelsBaseEntity)
+            if "_update_attrs" in vars(cls)
+        ),
+    ]
+
+
+def _timed(function: Callable, record: Callable[[float], None]) -> Callable:
+    """The function recording its duration, the wall time for coroutines."""
+    if asyncio.iscoroutinefunction(function):
+
+        @wraps(function)
+        async def _async_timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                record(time.perf_counter() - started)
+
+        return _async_timed
+
+    @wraps(function)
+    def _timed_call(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(time.perf_counter() - started)
+
+    return _timed_call
+
+
+class InelsProfiler:
+    """Timing spans of the entry points and optionally cProfile and tracemalloc.
+
+    The entry points are replaced by timed wrappers only while profiling and
+    restored afterwards, so nothing is measured and nothing is paid when the
+    profiler is stopped. cProfile covers the event loop thread.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, path: str, profile: bool, memory: bool
+    ) -> None:
+        """Initialize the profiler writing its report to the path."""
+        self._hass = hass
+        self.path = path
+        self._profile = cProfile.Profile() if profile else None
+        self._memory = memory
+        # tracemalloc already started by someone else is left running
+        self._stop_tracing = False
+        self._spans: dict[str, LatencyStats] = {}
+        self._originals: list[tuple[Any, str, Any]] = []
+        self._started: datetime | None = None
+        self._started_time = 0.0
+        self._unsub_stop: CALLBACK_TYPE | None = None
+
+    @property
+    def active(self) -> bool:
+        """Is the profiler running."""
+        return self._started is not None
+
+    @callback
+    def async_start(self, duration: float | None = None) -> None:
+        """Start profiling, stop after the duration in seconds if given."""
+        if self._profile is not None:
+            try:
+                self._profile.enable()
+            except ValueError as err:
+                # only one profiler can run at a time
+                raise HomeAssistantError(f"Could not start cProfile: {err}") from err
+        if self._memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._stop_tracing = True
+
+        for owner, name, span in _entry_points():
+            original = vars(owner)[name]
+            if asyncio.iscoroutinefunction(original):
+                span = f"{span} (wall time)"
+            stats = self._spans.setdefault(span, LatencyStats())
+            self._originals.append((owner, name, original))
+            setattr(owner, name, _timed(original, stats.record))
+
+        self._started = dt_util.utcnow()
+        self._started_time = time.perf_counter()
+        if duration is not None:
+            self._unsub_stop = async_call_later(
+                self._hass, duration, self._async_stop_later
+            )
+        LOGGER.info("Profiling iNELS, the report is written to %s", self.path)
+
+    async def _async_stop_later(self, _now: datetime) -> None:
+        """Stop at the end of the duration."""
+        self._unsub_stop = None
+        await self.async_stop()
+
+    async def async_stop(self) -> None:
+        """Stop profiling and write the report."""
+        if self._started is None:
+            return
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals.clear()
+        if self._profile is not None:
+            self._profile.disable()
+        elapsed = time.perf_counter() - self._started_time
+
+        await self._hass.async_add_executor_job(self._write, elapsed)
+        self._started = None
+        LOGGER.info("iNELS profile written to %s", self.path)
+
+    def _write(self, elapsed: float) -> None:
+        """Write the report, stops the tracing of memory allocations."""
+        report = [
+            f"iNELS profile started {self._started}, {elapsed:.1f} s",
+            "",
+            self._span_table(elapsed),
+        ]
+        if self._profile is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+                PROFILE_REPORT_LINES
+            )
+            report += ["cProfile of the event loop thread", stream.getvalue()]
+        if self._memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self._stop_tracing:
+                tracemalloc.stop()
+            top = snapshot.statistics("lineno")[:PROFILE_REPORT_LINES]
+            report += ["Allocated memory by line", *map(str, top), ""]
+
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("\n".join(report))
+
+    def _span_table(self, elapsed: float) -> str:
+        """Durations of the entry points, the busiest first."""
+        lines = [
+            f"{'span':<40} {'count':>8} {'total ms':>10} {'% time':>7} "
+            f"{'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"
+        ]
+        for span, stats in sorted(
+            self._spans.items(), key=lambda item: -item[1].total
+        ):
+            if not stats.count:
+                continue
+            lines.append(
+                f"{span:<40} {stats.count:>8} {stats.total * 1000:>10.1f} "
+                f"{stats.total / elapsed * 100 if elapsed else 0:>7.2f} "
+                f"{(stats.mean or 0) * 1000:>9.3f} {(stats.p95 or 0) * 1000:>9.3f} "
+                f"{stats.max * 1000:>9.3f}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+@callback
+def async_profile_path(hass: HomeAssistant) -> str:
+    """Path of a new profile report in the config directory."""
+    stamp = dt_util.now().strftime("%Y%m%d-%H%M%S")
+    return hass.config.path(f"inels_profile_{stamp}.txt")
@@ -0,0 +1,176 @@
+"""Recording of the iNELS traffic received from the broker."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from functools import partial
+import json
+import time
+from typing import IO, Any
+
+from inelsmqtt import InelsMqtt
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+import homeassistant.util.dt as dt_util
+
+from .const import LOGGER, RECORDING_FLUSH_INTERVAL_IN_SEC, RECORDING_VERSION
+from .ha_mqtt import InelsHaMqtt
+
+
+def _tap(
+    mqtt: InelsMqtt | InelsHaMqtt, tap: Callable[[str, Any], None]
+) -> Callable[[], None]:
+    """Call the tap with every received message, return the undo."""
+    if isinstance(mqtt, InelsHaMqtt):
+        mqtt.set_traffic_tap(tap)
+        return partial(mqtt.set_traffic_tap, None)
+
+    client = mqtt.client
+    on_message = client.on_message
+
+    def _on_message(paho: Any, userdata: Any, msg: Any) -> None:
+        tap(msg.topic, msg.payload)
+        on_message(paho, userdata, msg)
+
+    client.on_message = _on_message
+
+    def _undo() -> None:
+        if client.on_message is _on_message:
+            client.on_message = on_message
+
+    return _undo
+
+
+def encode_record(elapsed: float, topic: str, payload: Any) -> str:
+    """JSON line of one received message."""
+    if isinstance(payload, (bytes, bytearray)):
+        # payloads are text, anything else survives as escaped surrogates
+        payload = bytes(payload).decode("utf-8", "surrogateescape")
+    return json.dumps({"time": round(elapsed, 6), "topic": topic, "payload": payload})
+
+
+def decode_record(line: str) -> tuple[float, str, bytes]:
+    """Time, topic and payload of a JSON line."""
+    record = json.loads(line)
+    return (
+        record["time"],
+        record["topic"],
+        record["payload"].encode("utf-8", "surrogateescape"),
+    )
+
+
+class InelsTrafficRecorder:
+    """Messages of the transport written to a JSON lines file.
+
+    The first line describes the recording, every other line holds the time
+    since the start, the topic and the payload of one message. Messages are
+    collected on any thread and written by the executor once per interval.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, mqtt: InelsMqtt | InelsHaMqtt, path: str
+    ) -> None:
+        """Initialize the recorder writing to the path."""
+        self._hass = hass
+        self._mqtt = mqtt
+        self.path = path
+        self._buffer: list[tuple[float, str, Any]] = []
+        self._file: IO[str] | None = None
+        # writes of two flushes must not run in two executor threads at once
+        self._write_lock = asyncio.Lock()
+        self._started = 0.0
+        self._undo_tap: Callable[[], None] | None = None
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self._unsub_stop: CALLBACK_TYPE | None = None
+
+        self.messages = 0
+
+    @property
+    def active(self) -> bool:
+        """Is the traffic being recorded."""
+        return self._undo_tap is not None
+
+    async def async_start(self, duration: float | None = None) -> None:
+        """Start recording, stop after the duration in seconds if given."""
+        self._file = await self._hass.async_add_executor_job(self._open)
+        self._started = time.monotonic()
+        self._undo_tap = _tap(self._mqtt, self._record)
+        self._unsub_flush = async_track_time_interval(
+            self._hass,
+            self._async_flush,
+            timedelta(seconds=RECORDING_FLUSH_INTERVAL_IN_SEC),
+        )
+        if duration is not None:
+            self._unsub_stop = async_call_later(
+                self._hass, duration, self._async_stop_later
+            )
+        LOGGER.info("Recording iNELS traffic to %s", self.path)
+
+    def _open(self) -> IO[str]:
+        """Create the file with the header line."""
+        # pylint: disable-next=consider-using-with
+        file = open(self.path, "w", encoding="utf-8")
+        file.write(
+            json.dumps(
+                {"version": RECORDING_VERSION, "started": dt_util.utcnow().isoformat()}
+            )
+            + "\n"
+        )
+        return file
+
+    def _record(self, topic: str, payload: Any) -> None:
+        """Keep the message, safe to call from any thread."""
+        self._buffer.append((time.monotonic() - self._started, topic, payload))
+
+    async def _async_flush(self, _now: datetime | None = None) -> None:
+        """Write the collected messages."""
+        buffer, self._buffer = self._buffer, []
+        if not buffer:
+            return
+        async with self._write_lock:
+            if self._file is not None:
+                self.messages += len(buffer)
+                await self._hass.async_add_executor_job(
+                    self._write, self._file, buffer
+                )
+
+    @staticmethod
+    def _write(file: IO[str], buffer: list[tuple[float, str, Any]]) -> None:
+        """Append the messages to the file."""
+        file.writelines(
+            encode_record(elapsed, topic, payload) + "\n"
+            for elapsed, topic, payload in buffer
+        )
+        file.flush()
+
+    async def _async_stop_later(self, _now: datetime) -> None:
+        """Stop at the end of the duration."""
+        self._unsub_stop = None
+        await self.async_stop()
+
+    async def async_stop(self) -> None:
+        """Stop recording and close the file."""
+        if self._undo_tap is None:
+            return
+        self._undo_tap()
+        self._undo_tap = None
+        for unsub in (self._unsub_flush, self._unsub_stop):
+            if unsub is not None:
+                unsub()
+        self._unsub_flush = self._unsub_stop = None
+
+        await self._async_flush()
+        async with self._write_lock:
+            if self._file is not None:
+                await self._hass.async_add_executor_job(self._file.close)
+                self._file = None
+        LOGGER.info("Recorded %s iNELS messages to %s", self.messages, self.path)
+
+
+@callback
+def async_recording_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Path of a new recording of the config entry in the config directory."""
+    stamp = dt_util.now().strftime("%Y%m%d-%H%M%S")
+    return hass.config.path(f"inels_traffic_{entry_id}_{stamp}.jsonl")
@@ -14,16 +14,14 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .entity import InelsBaseEntity, async_setup_inels_entities
 from .const import (
-    DEVICES,
-    DOMAIN,
     FAN_SPEED_DICT,
     ICON_FAN,
-    OLD_ENTITIES,
     SELECT_OPTIONS_DICT,
     SELECT_OPTIONS_ICON,
 )
+from .planner import InelsEntityPlan
 
 
 # SELECT PLATFORM
@@ -71,42 +69,36 @@ def __set_fan_speed(device: Device, option: str) -> Any | None:
     return ha_val
 
 
-async def async_setup_entry(
-    hass: HomeAssistant,
-    config_entry: ConfigEntry,
-    async_add_entities: AddEntitiesCallback,
-) -> None:
-    """Load iNELS select entity."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.SELECT)
-
+def _create_entities(plan: InelsEntityPlan) -> list[InelsSelect]:
+    """Create entities of the planned devices."""
     entities: list[InelsSelect] = []
 
-    for device in device_list:
-        val = device.get_value()
-        if hasattr(val.ha_value, "fan_speed"):
-            entities.append(
-                InelsSelect(
-                    device,
+    for _, device, _, _ in plan.blueprints(("fan_speed",)):
+        entities.append(
+            InelsSelect(
+                device,
+                key="fan_speed",
+                index=-1,
+                description=InelsSelectEntityDescription(
                     key="fan_speed",
-                    index=-1,
-                    description=InelsSelectEntityDescription(
-                        key="fan_speed",
-                        name="Fan speed",
-                        value=__set_fan_speed,
-                    ),
-                )
+                    name="Fan speed",
+                    value=__set_fan_speed,
+                ),
             )
-    async_add_entities(entities, True)
+        )
 
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
+    return entities
 
-    hass.data[DOMAIN][config_entry.entry_id][Platform.SELECT] = old_entities
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Load iNELS select entity."""
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, _create_entities, True
+    )
 
 
 class InelsSelect(InelsBaseEntity, SelectEntity):
@@ -129,6 +121,10 @@ class InelsSelect(InelsBaseEntity, SelectEntity):
         self.entity_id = f"{Platform.SELECT}.{self._attr_unique_id}"
         self._attr_name = f"{self._attr_name} {self.entity_description.name}"
 
+        self._attr_options = SELECT_OPTIONS_DICT.get(str(self.key), [])
+        if self.key in SELECT_OPTIONS_ICON:
+            self._attr_icon = SELECT_OPTIONS_ICON[self.key]
+
     @property
     def unique_id(self) -> str | None:
         """Return the unique_id of the entity."""
@@ -139,31 +135,15 @@ class InelsSelect(InelsBaseEntity, SelectEntity):
         """Return the name of the entity."""
         return super().name
 
-    @property
-    def icon(self) -> str | None:
-        """Return the icon of the entity."""
-        if self.key in SELECT_OPTIONS_ICON:
-            return SELECT_OPTIONS_ICON[self.key]
-        return super().icon
-
-    @property
-    def current_option(self) -> str | None:
-        """Return the current selected option."""
-        state = self._device.state
-        option = state.__dict__[self.key]
-        return SELECT_OPTIONS_DICT[self.key][state.__dict__[self.key]]
-
-    @property
-    def options(self) -> list[str]:
-        """Return option list."""
-        if str(self.key) in SELECT_OPTIONS_DICT:
-            return SELECT_OPTIONS_DICT[self.key]
-
-        return []
+    def _update_attrs(self) -> None:
+        """Compute the selected option from the state of the device."""
+        self._attr_current_option = SELECT_OPTIONS_DICT[self.key][
+            self._read_field(self._device.state)
+        ]
 
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         if self.entity_description.value:
             new_ha_val = self.entity_description.value(self._device, option)
 
-            self.hass.async_add_executor_job(self._device.set_ha_value, new_ha_val)
+            await self.async_set_ha_value(new_ha_val)
@@ -1,12 +1,10 @@
 """iNELS sensor entity."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Any
 
-from inelsmqtt.const import (  # Data types
-    BUS_SENSOR_ERRORS,
-)
 from inelsmqtt.devices import Device
 from inelsmqtt.const import (
     TEMP_IN,
@@ -16,23 +14,30 @@ from inelsmqtt.const import (
 from homeassistant.components.sensor import (
     SensorEntity,
     SensorEntityDescription,
+    SensorStateClass,
 )
 from homeassistant.components.sensor import SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     LIGHT_LUX,
     PERCENTAGE,
+    EntityCategory,
     Platform,
     UnitOfElectricPotential,
     UnitOfTemperature,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .bus_values import BusValueArray, decode_bus_value
+from .entity import InelsBaseEntity, async_setup_inels_entities
 from .const import (
-    DEVICES,
+    CONF_DIAGNOSTIC_SENSORS,
+    DEVICE_INFOS,
+    DEVICE_METRICS,
     DOMAIN,
     ICON_CARD_ID,
     ICON_DEW_POINT,
@@ -40,9 +45,12 @@ from .const import (
     ICON_HUMIDITY,
     ICON_LIGHT_IN,
     ICON_TEMPERATURE,
-    LOGGER,
-    OLD_ENTITIES,
+    ICON_TIMER,
+    ICON_TRAFFIC,
 )
+from .device_info import InelsDeviceInfos
+from .metrics import DeviceMetrics, DeviceStats
+from .planner import InelsEntityPlan
 
 
 # SENSOR PLATFORM
@@ -124,27 +132,6 @@ INELS_SENSOR_TYPES: dict[str, InelsSensorType] = {
 }
 
 
-def _process_value(val: str) -> tuple[str, bool]:
-    middle_fs = True
-    for k in val[1:-1]:
-        if k.capitalize() != "F":
-            middle_fs = False
-
-    if (
-        middle_fs
-        and val[0] == "7"
-        and ((val[-1] <= "F" and val[-1] >= "A") or val[-1] == "9")
-    ):
-        last = val[-1]
-        last = int(last, 16)
-        error = BUS_SENSOR_ERRORS.get(last)
-        if error is not None:
-            LOGGER.warning(error)
-            return (float(int(val, 16)) / 100, True)
-
-    return (float(int(val, 16)) / 100, False)
-
-
 @dataclass
 class InelsSensorDescriptionMixin:
     """Mixin keys."""
@@ -157,61 +144,147 @@ class InelsSensorDescription(SensorEntityDescription, InelsSensorDescriptionMixi
     raw_sensor_value: bool = False
 
 
+@dataclass
+class InelsMetricSensorDescriptionMixin:
+    """Mixin keys."""
+
+    value_fn: Callable[[DeviceStats], Any]
+
+
+@dataclass
+class InelsMetricSensorDescription(
+    SensorEntityDescription, InelsMetricSensorDescriptionMixin
+):
+    """Class for describing the traffic statistics of iNELS devices."""
+
+
+def _milliseconds(seconds: float | None) -> float | None:
+    """Latency in milliseconds."""
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+INELS_METRIC_SENSOR_TYPES: tuple[InelsMetricSensorDescription, ...] = (
+    InelsMetricSensorDescription(
+        key="frames_received",
+        name="Frames received",
+        icon=ICON_TRAFFIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.frames,
+    ),
+    InelsMetricSensorDescription(
+        key="state_writes",
+        name="State writes",
+        icon=ICON_TRAFFIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.writes,
+    ),
+    InelsMetricSensorDescription(
+        key="commands_sent",
+        name="Commands sent",
+        icon=ICON_TRAFFIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.commands,
+    ),
+    InelsMetricSensorDescription(
+        key="echo_latency",
+        name="Command echo latency",
+        icon=ICON_TIMER,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _milliseconds(stats.echo.mean),
+    ),
+    InelsMetricSensorDescription(
+        key="echo_latency_p95",
+        name="Command echo latency p95",
+        icon=ICON_TIMER,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _milliseconds(stats.echo.p95),
+    ),
+    InelsMetricSensorDescription(
+        key="last_seen",
+        name="Last seen",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda stats: stats.last_seen,
+    ),
+)
+
+
+def _create_entities(plan: InelsEntityPlan) -> list[InelsBaseEntity]:
+    """Create entities of the planned devices."""
+    entities: list[InelsBaseEntity] = []
+    for _, device, key, value in plan.blueprints(INELS_SENSOR_TYPES):
+        type_dict = INELS_SENSOR_TYPES[key]
+        if type_dict.indexed:
+            # the sensors of the array decode it once per frame
+            array = BusValueArray()
+            for k in range(len(value)):
+                entities.append(
+                    InelsSensor(
+                        device=device,
+                        key=key,
+                        index=k,
+                        description=InelsSensorDescription(
+                            key=f"{key}{k}",
+                            name=f"{type_dict.name} {k+1}",
+                            icon=type_dict.icon,
+                            native_unit_of_measurement=type_dict.unit,
+                            raw_sensor_value=type_dict.raw_sensor_value,
+                        ),
+                        array=array,
+                    )
+                )
+        else:
+            entities.append(
+                InelsSensor(
+                    device=device,
+                    key=key,
+                    index=-1,
+                    description=InelsSensorDescription(
+                        key=key,
+                        name=type_dict.name,
+                        icon=type_dict.icon,
+                        native_unit_of_measurement=type_dict.unit,
+                        raw_sensor_value=type_dict.raw_sensor_value,
+                    ),
+                )
+            )
+
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Load iNELS switch.."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.SENSOR)
-
-    items = INELS_SENSOR_TYPES.items()
-    entities: list[InelsBaseEntity] = []
-    for device in device_list:
-        for key, type_dict in items:
-            if hasattr(device.state, key):
-                if type_dict.indexed:
-                    for k in range(len(device.state.__dict__[key])):
-                        entities.append(
-                            InelsSensor(
-                                device=device,
-                                key=key,
-                                index=k,
-                                description=InelsSensorDescription(
-                                    key=f"{key}{k}",
-                                    name=f"{type_dict.name} {k+1}",
-                                    icon=type_dict.icon,
-                                    native_unit_of_measurement=type_dict.unit,
-                                    raw_sensor_value=type_dict.raw_sensor_value,
-                                ),
-                            )
-                        )
-                else:
-                    entities.append(
-                        InelsSensor(
-                            device=device,
-                            key=key,
-                            index=-1,
-                            description=InelsSensorDescription(
-                                key=key,
-                                name=type_dict.name,
-                                icon=type_dict.icon,
-                                native_unit_of_measurement=type_dict.unit,
-                                raw_sensor_value=type_dict.raw_sensor_value,
-                            ),
-                        )
+    create_entities: Callable[[InelsEntityPlan], list[Entity]] = _create_entities
+    if config_entry.options.get(CONF_DIAGNOSTIC_SENSORS, False):
+        inels_data = hass.data[DOMAIN][config_entry.entry_id]
+        metrics: DeviceMetrics = inels_data[DEVICE_METRICS]
+        device_infos: InelsDeviceInfos = inels_data[DEVICE_INFOS]
+
+        def _create_with_metrics(plan: InelsEntityPlan) -> list[Entity]:
+            """Create the entities and the statistic sensors of the devices."""
+            return [
+                *_create_entities(plan),
+                *(
+                    InelsDeviceMetricSensor(
+                        device, metrics.get(device), device_infos, description
                     )
-    async_add_entities(entities, True)
+                    for device in plan.devices
+                    for description in INELS_METRIC_SENSOR_TYPES
+                ),
+            ]
 
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
+        create_entities = _create_with_metrics
 
-    hass.data[DOMAIN][config_entry.entry_id][Platform.SENSOR] = old_entities
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, create_entities, True
+    )
 
 
 class InelsSensor(InelsBaseEntity, SensorEntity):
@@ -226,42 +299,63 @@ class InelsSensor(InelsBaseEntity, SensorEntity):
         key: str,
         index: int,
         description: InelsSensorDescription,
+        array: BusValueArray | None = None,
     ) -> None:
         """Initialize bus sensor."""
         super().__init__(device=device, key=key, index=index)
 
         self.entity_description = description
+        self._array = array
 
         self._attr_unique_id = slugify(f"{self._attr_unique_id}_{description.key}")
         self.entity_id = f"{Platform.SENSOR}.{self._attr_unique_id}"
         self._attr_name = f"{self._attr_name} {description.name}"
 
-        if self.index != -1:  # with index
-            val = self._device.state.__dict__[self.key][self.index]
-        else:
-            val = self._device.state.__dict__[self.key]
-
-        if not self.entity_description.raw_sensor_value and isinstance(val, str):
-            val, self.sensor_error = _process_value(val)
-
         self._attr_device_class = self.entity_description.device_class
         self._attr_icon = self.entity_description.icon
-        self._attr_native_value = val
-
-    def _callback(self) -> None:
-        """Refresh data."""
-        super()._callback()
 
-        if self.index != -1:  # with index
-            val = self._device.state.__dict__[self.key][self.index]
-        else:
-            val = self._device.state.__dict__[self.key]
+    def _update_attrs(self) -> None:
+        """Compute the sensor value from the state of the device."""
+        val = self._read_field(self._device.state)
 
         if (not self.entity_description.raw_sensor_value) and isinstance(val, str):
-            val, self.sensor_error = _process_value(val)
+            if self._array is not None:
+                val, self.sensor_error = self._array.get(
+                    getattr(self._device.state, self._key), self._index
+                )
+            else:
+                val, self.sensor_error = decode_bus_value(val)
 
         self._attr_native_value = val
 
     @property
     def available(self) -> bool:
         return (not self.sensor_error) and super().available
+
+
+class InelsDeviceMetricSensor(SensorEntity):
+    """Traffic statistic of an iNELS device, polled and disabled by default."""
+
+    entity_description: InelsMetricSensorDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        device: Device,
+        stats: DeviceStats,
+        device_infos: InelsDeviceInfos,
+        description: InelsMetricSensorDescription,
+    ) -> None:
+        """Initialize the statistic sensor of the device."""
+        self.entity_description = description
+        self._stats = stats
+
+        self._attr_unique_id = slugify(f"{device.unique_id}_{description.key}")
+        self.entity_id = f"{Platform.SENSOR}.{self._attr_unique_id}"
+        self._attr_name = f"{device.title} {description.name}"
+        self._attr_device_info = device_infos.get(device)
+
+    async def async_update(self) -> None:
+        """Read the statistic."""
+        self._attr_native_value = self.entity_description.value_fn(self._stats)
@@ -0,0 +1,309 @@
+"""Services of the iNELS integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Mapping
+from typing import Any
+
+from inelsmqtt.devices import Device
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+
+from .commands import InelsCommandAggregator, decode_published_state
+from .const import (
+    ATTR_COMMANDS,
+    ATTR_CPROFILE,
+    ATTR_DURATION,
+    ATTR_MEMORY,
+    ATTR_VALUE,
+    BROKER,
+    COMMANDS,
+    DOMAIN,
+    ENTITIES,
+    LOGGER,
+    PROFILER,
+    RECORDER,
+    SERVICE_BULK_SET,
+    SERVICE_START_PROFILE,
+    SERVICE_START_RECORDING,
+    SERVICE_STOP_PROFILE,
+    SERVICE_STOP_RECORDING,
+)
+from .entity import InelsBaseEntity
+from .profiler import InelsProfiler, async_profile_path
+from .recorder import InelsTrafficRecorder, async_recording_path
+
+
+def _value(value: Any) -> bool | float:
+    """Validate a value, either on/off or a number."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return cv.boolean(value)
+    except vol.Invalid:
+        return vol.Coerce(float)(value)
+
+
+COMMAND_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Required(ATTR_VALUE): _value,
+    }
+)
+
+BULK_SET_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            **cv.ENTITY_SERVICE_FIELDS,
+            vol.Optional(ATTR_VALUE): _value,
+            vol.Optional(ATTR_COMMANDS): vol.All(cv.ensure_list, [COMMAND_SCHEMA]),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_VALUE, ATTR_COMMANDS),
+)
+
+START_RECORDING_SCHEMA = vol.Schema(
+    {vol.Optional(ATTR_DURATION): vol.All(vol.Coerce(float), vol.Range(min=1))}
+)
+
+START_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION): vol.All(vol.Coerce(float), vol.Range(min=1)),
+        vol.Optional(ATTR_CPROFILE, default=True): cv.boolean,
+        vol.Optional(ATTR_MEMORY, default=False): cv.boolean,
+    }
+)
+
+
+def _find_entity(
+    hass: HomeAssistant, entity_id: str
+) -> tuple[InelsBaseEntity, dict[str, Any]] | None:
+    """Entity of any config entry and the data of its entry."""
+    for inels_data in hass.data.get(DOMAIN, {}).values():
+        if (entity := inels_data.get(ENTITIES, {}).get(entity_id)) is not None:
+            return entity, inels_data
+    return None
+
+
+async def _async_set_device(
+    commands: InelsCommandAggregator,
+    device: Device,
+    values: list[tuple[InelsBaseEntity, Any]],
+) -> dict[str, Any]:
+    """Apply the values of the entities to one state and publish it."""
+    result: dict[str, Any] = {
+        "entities": [entity.entity_id for entity, _ in values],
+        "success": False,
+    }
+    if not device.is_available:
+        result["error"] = "unavailable"
+        return result
+    if (state := decode_published_state(device)) is None:
+        result["error"] = "no state"
+        return result
+
+    try:
+        for entity, value in values:
+            entity.apply_value(state, value)
+    except (ValueError, vol.Invalid) as err:
+        result["error"] = str(err)
+        return result
+
+    result["success"] = await commands.async_set_ha_value(device, state)
+    return result
+
+
+async def async_bulk_set(
+    hass: HomeAssistant, values: Mapping[str, Any]
+) -> dict[str, Any]:
+    """Set the values of many entities with one frame per device.
+
+    The values are keyed by entity id, the result lists per device the
+    entities it was set for and whether the frame was published.
+    """
+    devices: dict[str, tuple[InelsCommandAggregator, Device, list]] = {}
+    unknown: list[str] = []
+    for entity_id, value in values.items():
+        if (found := _find_entity(hass, entity_id)) is None:
+            unknown.append(entity_id)
+            continue
+        entity, inels_data = found
+        device: Device = entity.device
+        devices.setdefault(
+            device.state_topic, (inels_data[COMMANDS], device, [])
+        )[2].append((entity, value))
+
+    results = await asyncio.gather(
+        *(
+            _async_set_device(commands, device, device_values)
+            for commands, device, device_values in devices.values()
+        )
+    )
+
+    if unknown:
+        LOGGER.warning("Bulk set of unknown entities: %s", ", ".join(unknown))
+    return {
+        "devices": {
+            device.unique_id: result
+            for (_, device, _), result in zip(devices.values(), results)
+        },
+        "unknown": unknown,
+    }
+
+
+async def async_start_recording(
+    hass: HomeAssistant, duration: float | None = None
+) -> list[str]:
+    """Record the traffic of all config entries, return the files."""
+    paths: list[str] = []
+    for entry_id, inels_data in hass.data.get(DOMAIN, {}).items():
+        recorder: InelsTrafficRecorder | None = inels_data.get(RECORDER)
+        if recorder is None or not recorder.active:
+            recorder = inels_data[RECORDER] = InelsTrafficRecorder(
+                hass, inels_data[BROKER], async_recording_path(hass, entry_id)
+            )
+            await recorder.async_start(duration)
+        paths.append(recorder.path)
+    return paths
+
+
+async def async_stop_recording(hass: HomeAssistant) -> dict[str, int]:
+    """Stop the recordings, return the number of messages per file."""
+    recorded: dict[str, int] = {}
+    for inels_data in hass.data.get(DOMAIN, {}).values():
+        if (recorder := inels_data.pop(RECORDER, None)) is not None:
+            await recorder.async_stop()
+            recorded[recorder.path] = recorder.messages
+    return recorded
+
+
+@callback
+def async_start_profile(
+    hass: HomeAssistant,
+    duration: float | None = None,
+    profile: bool = True,
+    memory: bool = False,
+) -> str:
+    """Profile the integration, return the file of the report."""
+    profiler: InelsProfiler | None = hass.data.get(PROFILER)
+    if profiler is None or not profiler.active:
+        profiler = InelsProfiler(hass, async_profile_path(hass), profile, memory)
+        profiler.async_start(duration)
+        hass.data[PROFILER] = profiler
+    return profiler.path
+
+
+async def async_stop_profile(hass: HomeAssistant) -> str | None:
+    """Stop profiling, return the file of the report."""
+    if (profiler := hass.data.pop(PROFILER, None)) is None:
+        return None
+    await profiler.async_stop()
+    return profiler.path
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+    if hass.services.has_service(DOMAIN, SERVICE_BULK_SET):
+        return
+
+    async def async_handle_bulk_set(call: ServiceCall) -> ServiceResponse:
+        """Set the values of the targets and of the commands."""
+        values: dict[str, Any] = {}
+        if ATTR_VALUE in call.data:
+            selected = async_extract_referenced_entity_ids(hass, call)
+            for entity_id in selected.referenced:
+                values[entity_id] = call.data[ATTR_VALUE]
+            # entities of areas and devices which are not iNELS are skipped
+            for entity_id in selected.indirectly_referenced:
+                if _find_entity(hass, entity_id) is not None:
+                    values[entity_id] = call.data[ATTR_VALUE]
+        for command in call.data.get(ATTR_COMMANDS, []):
+            values[command[ATTR_ENTITY_ID]] = command[ATTR_VALUE]
+
+        result = await async_bulk_set(hass, values)
+        return result if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_SET,
+        async_handle_bulk_set,
+        schema=BULK_SET_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_handle_start_recording(call: ServiceCall) -> ServiceResponse:
+        """Record the received traffic into files in the config directory."""
+        paths = await async_start_recording(hass, call.data.get(ATTR_DURATION))
+        return {"files": paths} if call.return_response else None
+
+    async def async_handle_stop_recording(call: ServiceCall) -> ServiceResponse:
+        """Stop recording the received traffic."""
+        recorded = await async_stop_recording(hass)
+        return {"files": recorded} if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_RECORDING,
+        async_handle_start_recording,
+        schema=START_RECORDING_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_RECORDING,
+        async_handle_stop_recording,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_handle_start_profile(call: ServiceCall) -> ServiceResponse:
+        """Profile the hot paths of the integration."""
+        path = async_start_profile(
+            hass,
+            call.data.get(ATTR_DURATION),
+            call.data[ATTR_CPROFILE],
+            call.data[ATTR_MEMORY],
+        )
+        return {"file": path} if call.return_response else None
+
+    async def async_handle_stop_profile(call: ServiceCall) -> ServiceResponse:
+        """Stop profiling and write the report."""
+        path = await async_stop_profile(hass)
+        return {"file": path} if call.return_response else None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_PROFILE,
+        async_handle_start_profile,
+        schema=START_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_PROFILE,
+        async_handle_stop_profile,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+@callback
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the services of the integration."""
+    for service in (
+        SERVICE_BULK_SET,
+        SERVICE_START_RECORDING,
+        SERVICE_STOP_RECORDING,
+        SERVICE_START_PROFILE,
+        SERVICE_STOP_PROFILE,
+    ):
+        hass.services.async_remove(DOMAIN, service)
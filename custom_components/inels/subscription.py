@@ -0,0 +1,172 @@
+"""Data listeners of iNELS devices shared by their entities."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from functools import partial
+from operator import attrgetter
+from typing import Any
+
+from inelsmqtt import InelsMqtt
+from inelsmqtt.devices import Device
+
+from homeassistant.core import CALLBACK_TYPE
+
+from .ha_mqtt import InelsHaMqtt
+from .metrics import DeviceMetrics, DeviceStats
+
+Field = tuple[str, int]
+
+
+def freeze_value(value: Any) -> Any:
+    """Comparable copy of a decoded value.
+
+    The library decodes nested values into anonymous classes, which compare
+    by identity, so they are turned into tuples of their public attributes.
+    """
+    if isinstance(value, list):
+        return tuple(freeze_value(item) for item in value)
+    if isinstance(value, type):
+        return tuple(
+            (name, freeze_value(item))
+            for name, item in vars(value).items()
+            if not name.startswith("_")
+        )
+    return value
+
+
+def field_value(state: Any, field: Field) -> Any:
+    """Value of the state the entity of the field is reading."""
+    key, index = field
+    value = getattr(state, key, None)
+    if index >= 0 and isinstance(value, list):
+        return value[index] if index < len(value) else None
+    return value
+
+
+def field_accessor(field: Field) -> Callable[[Any], Any]:
+    """Compiled reader of the field, the state must contain it."""
+    key, index = field
+    getter = attrgetter(key)
+    if index < 0:
+        return getter
+    return lambda state: getter(state)[index]
+
+
+class InelsSubscriptions:
+    """One data listener per device, whatever the number of its entities.
+
+    The listener is registered when the first entity of the device is added
+    and dropped when the last one is removed. On every frame the decoded
+    state is compared per (key, index) with the values the entities were last
+    notified about and only the entities whose value changed are notified.
+    """
+
+    def __init__(
+        self, mqtt: InelsMqtt | InelsHaMqtt, metrics: DeviceMetrics | None = None
+    ) -> None:
+        """Initialize the subscriptions of the transport."""
+        self._mqtt = mqtt
+        self._metrics = metrics
+        self._callbacks: dict[str, dict[Field, list[Callable[[], None]]]] = {}
+        self._values: dict[str, dict[Field, Any]] = {}
+        self._available: dict[str, bool] = {}
+
+        self.emitted = 0
+        self.suppressed = 0
+
+    @property
+    def active(self) -> int:
+        """Number of devices with a registered listener."""
+        return len(self._callbacks)
+
+    @property
+    def references(self) -> int:
+        """Number of entities sharing the listeners."""
+        return sum(
+            len(callbacks)
+            for fields in self._callbacks.values()
+            for callbacks in fields.values()
+        )
+
+    def subscribe(
+        self, device: Device, key: str, index: int, fnc: Callable[[], None]
+    ) -> CALLBACK_TYPE:
+        """Notify the callback about changes of the field of the device."""
+        topic = device.state_topic
+        if (fields := self._callbacks.get(topic)) is None:
+            fields = self._callbacks[topic] = {}
+            stats = self._metrics.get(device) if self._metrics is not None else None
+            self._mqtt.subscribe_listener(
+                topic, device.unique_id, partial(self._on_data, device, stats)
+            )
+        fields.setdefault((key, index), []).append(fnc)
+
+        return partial(self._unsubscribe, device, (key, index), fnc)
+
+    def _unsubscribe(
+        self, device: Device, field: Field, fnc: Callable[[], None]
+    ) -> None:
+        """Drop the callback, drop the listener of the device with the last one."""
+        topic = device.state_topic
+        if (fields := self._callbacks.get(topic)) is None:
+            return
+
+        callbacks = fields.get(field, [])
+        if fnc in callbacks:
+            callbacks.remove(fnc)
+        if not callbacks:
+            fields.pop(field, None)
+            self._values.get(topic, {}).pop(field, None)
+        if fields:
+            return
+
+        del self._callbacks[topic]
+        self._values.pop(topic, None)
+        self._available.pop(topic, None)
+        stripped_topic = "/".join(topic.split("/")[2:])
+        # only the inner dict is changed, the network thread of paho may be
+        # iterating the topics at the same time
+        if (listeners := self._mqtt.list_of_listeners.get(stripped_topic)) is not None:
+            listeners.pop(device.unique_id, None)
+
+    def _on_data(
+        self, device: Device, stats: DeviceStats | None, availability_update: bool
+    ) -> None:
+        """Decode the frame and notify the entities of the changed fields."""
+        if stats is not None:
+            if availability_update:
+                stats.seen()
+            else:
+                stats.frame_received()
+        device.get_value()
+
+        topic = device.state_topic
+        if (fields := self._callbacks.get(topic)) is None:
+            return
+
+        # availability applies to all entities of the device
+        changed_all = False
+        if availability_update:
+            available = device.is_available
+            changed_all = self._available.get(topic) != available
+            self._available[topic] = available
+
+        state = device.state
+        values = self._values.setdefault(topic, {})
+        for field, callbacks in list(fields.items()):
+            value = freeze_value(field_value(state, field))
+            if not changed_all and field in values and values[field] == value:
+                self.suppressed += len(callbacks)
+                continue
+
+            values[field] = value
+            self.emitted += len(callbacks)
+            for fnc in list(callbacks):
+                fnc()
+
+    def clear(self) -> None:
+        """Drop all listeners."""
+        self._callbacks.clear()
+        self._values.clear()
+        self._available.clear()
+        self._mqtt.unsubscribe_listeners()
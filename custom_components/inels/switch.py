@@ -10,29 +10,24 @@ from homeassistant.components.switch import SwitchEntity, SwitchEntityDescriptio
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .entity import InelsBaseEntity
+from .entity import InelsAlert, InelsBaseEntity, async_setup_inels_entities
 from .const import (
-    DEVICES,
-    DOMAIN,
     ICON_SWITCH,
-    LOGGER,
-    OLD_ENTITIES,
 )
+from .planner import InelsEntityPlan
 
 
 # SWITCH PLATFORM
 @dataclass
-class InelsSwitchAlert:
+class InelsSwitchAlert(InelsAlert):
     """Inels switch alert property description."""
 
-    key: str
-    message: str
 
-
-relay_overflow = InelsSwitchAlert(key="overflow", message="Relay overflow in %s of %d")
+relay_overflow = InelsSwitchAlert(key="overflow", message="Relay overflow in %s of %s")
 
 
 @dataclass
@@ -52,64 +47,60 @@ INELS_SWITCH_TYPES: dict[str, InelsSwitchType] = {
 }
 
 
+def _create_entities(plan: InelsEntityPlan) -> list[InelsBaseEntity]:
+    """Create entities of the planned devices."""
+    entities: list[InelsBaseEntity] = []
+    for _, device, key, value in plan.blueprints(INELS_SWITCH_TYPES):
+        type_dict = INELS_SWITCH_TYPES[key]
+        if len(value) == 1:
+            entities.append(
+                InelsBusSwitch(
+                    device=device,
+                    key=key,
+                    index=0,
+                    description=InelsSwitchEntityDescription(
+                        key=key,
+                        name=type_dict.name,
+                        icon=type_dict.icon,
+                        overload_key=type_dict.overflow,
+                        alerts=type_dict.alerts,
+                    ),
+                )
+            )
+        else:
+            for k in range(len(value)):
+                description=InelsSwitchEntityDescription(
+                    key=f"{key}{k}",
+                    name=f"{type_dict.name} {k+1}",
+                    icon=type_dict.icon,
+                    overload_key=type_dict.overflow,
+                    alerts=type_dict.alerts,
+                )
+
+                if device.inels_type == 'BITS':
+                    description.name = f"Bit {value[k].addr}"
+
+                entities.append(
+                    InelsBusSwitch(
+                        device=device,
+                        key=key,
+                        index=k,
+                        description=description,
+                    )
+                )
+
+    return entities
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Load iNELS switch.."""
-    device_list: list[Device] = hass.data[DOMAIN][config_entry.entry_id][DEVICES]
-    old_entities: list[str] = hass.data[DOMAIN][config_entry.entry_id][
-        OLD_ENTITIES
-    ].get(Platform.SWITCH)
-
-    items = INELS_SWITCH_TYPES.items()
-    entities: list[InelsBaseEntity] = []
-    for device in device_list:
-        for key, type_dict in items:
-            if hasattr(device.state, key):
-                if len(device.state.__dict__[key]) == 1:
-                    entities.append(
-                        InelsBusSwitch(
-                            device=device,
-                            key=key,
-                            index=0,
-                            description=InelsSwitchEntityDescription(
-                                key=key,
-                                name=type_dict.name,
-                                icon=type_dict.icon,
-                                overload_key=type_dict.overflow,
-                            ),
-                        )
-                    )
-                else:
-                    for k in range(len(device.state.__dict__[key])):
-                        description=InelsSwitchEntityDescription(
-                            key=f"{key}{k}",
-                            name=f"{type_dict.name} {k+1}",
-                            icon=type_dict.icon,
-                            overload_key=type_dict.overflow,
-                        )
-
-                        if device.inels_type == 'BITS':
-                            description.name = f"Bit {device.state.__dict__[key][k].addr}"
-
-                        entities.append(
-                            InelsBusSwitch(
-                                device=device,
-                                key=key,
-                                index=k,
-                                description=description,
-                            )
-                        )
-    async_add_entities(entities, False)
-
-    if old_entities:
-        for entity in entities:
-            if entity.entity_id in old_entities:
-                old_entities.pop(old_entities.index(entity.entity_id))
-
-    hass.data[DOMAIN][config_entry.entry_id][Platform.SWITCH] = old_entities
+    async_setup_inels_entities(
+        hass, config_entry, async_add_entities, _create_entities, False
+    )
 
 
 @dataclass
@@ -125,6 +116,8 @@ class InelsBusSwitch(InelsBaseEntity, SwitchEntity):
 
     entity_description: InelsSwitchEntityDescription
 
+    _supports_optimistic = True
+
     def __init__(
         self,
         device: Device,
@@ -136,37 +129,25 @@ class InelsBusSwitch(InelsBaseEntity, SwitchEntity):
         super().__init__(device=device, key=key, index=index)
 
         self.entity_description = description
+        self._alerts = description.alerts or []
 
         self._attr_unique_id = slugify(f"{self._attr_unique_id}_{description.key}")
         self.entity_id = f"{Platform.SWITCH}.{self._attr_unique_id}"
         self._attr_name = f"{self._attr_name} {description.name}"
 
-    @property
-    def available(self) -> bool:
-        """Return entity availability."""
-        if self.entity_description.alerts:
-            last_state = self._device.last_values.ha_value.__dict__[self.key][
-                self.index
-            ]
-            for alert in self.entity_description.alerts:
-                if hasattr(self._device.state, alert.key):
-                    if self._device.state.__dict__[alert.key]:
-                        if not last_state.__dict__[alert.key]:
-                            LOGGER.warning(alert.message, self.name, self._device_id)
-                        return False
-        return super().available
-
-    @property
-    def is_on(self) -> bool | None:
-        """Return if switch is on."""
-        state = self._device.state
-        return state.__dict__[self.key][self.index].is_on
+    def _update_attrs(self) -> None:
+        """Compute the switch attributes from the state of its relay."""
+        self._attr_is_on = self._read_field(self._device.state).is_on
 
     @property
     def icon(self) -> str | None:
         """Switch icon."""
         return self.entity_description.icon
 
+    def apply_value(self, state: Any, value: Any) -> None:
+        """Switch the relay of the state on or off."""
+        state.__dict__[self.key][self.index].is_on = cv.boolean(value)
+
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Instruct the switch to turn off."""
         if not self._device.is_available:
@@ -175,7 +156,7 @@ class InelsBusSwitch(InelsBaseEntity, SwitchEntity):
         ha_val = self._device.state
         ha_val.__dict__[self.key][self.index].is_on = False
 
-        await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        await self.async_set_ha_value(ha_val)
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Instruct the switch to turn on."""
@@ -185,4 +166,4 @@ class InelsBusSwitch(InelsBaseEntity, SwitchEntity):
         ha_val = self._device.state
         ha_val.__dict__[self.key][self.index].is_on = True
 
-        await self.hass.async_add_executor_job(self._device.set_ha_value, ha_val)
+        await self.async_set_ha_value(ha_val)
@@ -0,0 +1,151 @@
+"""Brightness transitions of iNELS lights."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import time
+from typing import TYPE_CHECKING, Any
+
+from inelsmqtt.devices import Device
+
+from homeassistant.core import HomeAssistant, callback
+
+from .commands import InelsCommandAggregator, decode_published_state
+from .const import LOGGER, TRANSITION_STEP_IN_SEC
+from .subscription import field_value
+
+if TYPE_CHECKING:
+    from .entity import InelsBaseEntity
+
+
+@dataclass
+class _Ramp:
+    """Brightness (0-100) of one light moving from start to target."""
+
+    entity: InelsBaseEntity
+    start: int
+    target: int
+    started: float
+    duration: float
+    sent: int | None = None
+
+    def level(self, now: float) -> int:
+        """Brightness of the ramp at the time."""
+        if now >= self.started + self.duration:
+            return self.target
+        progress = (now - self.started) / self.duration
+        return round(self.start + (self.target - self.start) * progress)
+
+
+class InelsTransitionScheduler:
+    """Brightness ramps of all lights, stepped by one shared timer.
+
+    The devices have no native ramp in their command payloads, so the ramps
+    are stepped from Home Assistant. On every step the lights of one device
+    are written in a single frame and at most rate frames per second are
+    published over all devices; devices waiting the longest go first and
+    skip the levels they missed.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, commands: InelsCommandAggregator, rate: float
+    ) -> None:
+        """Initialize the scheduler, the rate is in frames per second."""
+        self._hass = hass
+        self._commands = commands
+        self._rate = rate
+        self._ramps: dict[InelsBaseEntity, _Ramp] = {}
+        # state topic -> time of the last frame of the device
+        self._last_frames: dict[str, float] = {}
+        self._budget = 0.0
+        self._handle: asyncio.TimerHandle | None = None
+
+        self.frames = 0
+        self.deferred = 0
+
+    @property
+    def active(self) -> int:
+        """Number of running ramps."""
+        return len(self._ramps)
+
+    @callback
+    def async_start(
+        self, entity: InelsBaseEntity, start: int, target: int, duration: float
+    ) -> None:
+        """Move the brightness of the light to the target within the duration."""
+        self._ramps[entity] = _Ramp(entity, start, target, time.monotonic(), duration)
+        if self._handle is None:
+            self._budget = 0.0
+            self._async_step()
+
+    @callback
+    def async_cancel(self, entity: InelsBaseEntity) -> None:
+        """Stop the ramp of the light where it is."""
+        self._ramps.pop(entity, None)
+
+    @callback
+    def _async_step(self) -> None:
+        """Publish the current levels of the ramps within the rate limit."""
+        self._handle = None
+        now = time.monotonic()
+
+        # all ramps of a device are written with its frame, the published
+        # state may not have caught up with the previous steps yet
+        devices: dict[str, list[_Ramp]] = {}
+        due: set[str] = set()
+        for ramp in self._ramps.values():
+            topic = ramp.entity.device.state_topic
+            devices.setdefault(topic, []).append(ramp)
+            if ramp.level(now) != ramp.sent:
+                due.add(topic)
+
+        # unused budget is not saved up for later bursts
+        step_budget = self._rate * TRANSITION_STEP_IN_SEC
+        self._budget = min(self._budget + step_budget, max(step_budget, 1.0))
+        order = sorted(due, key=lambda topic: self._last_frames.get(topic, 0.0))
+        for position, topic in enumerate(order):
+            if self._budget < 1:
+                self.deferred += len(order) - position
+                break
+            self._budget -= 1
+            self._last_frames[topic] = now
+            self._async_publish(devices[topic], now)
+
+        for entity, ramp in list(self._ramps.items()):
+            if ramp.sent == ramp.target and now >= ramp.started + ramp.duration:
+                del self._ramps[entity]
+
+        if self._ramps:
+            self._handle = self._hass.loop.call_later(
+                TRANSITION_STEP_IN_SEC, self._async_step
+            )
+
+    @callback
+    def _async_publish(self, ramps: list[_Ramp], now: float) -> None:
+        """Write the levels of the lights of one device in one frame."""
+        device = ramps[0].entity.device
+        if (state := decode_published_state(device)) is None:
+            for ramp in ramps:
+                ramp.sent = ramp.target
+            return
+
+        for ramp in ramps:
+            level = ramp.level(now)
+            field_value(state, (ramp.entity.key, ramp.entity.index)).brightness = level
+            ramp.sent = level
+
+        self.frames += 1
+        self._hass.async_create_task(self._async_send(device, state))
+
+    async def _async_send(self, device: Device, state: Any) -> None:
+        """Publish the frame of the step."""
+        if not await self._commands.async_set_ha_value(device, state):
+            LOGGER.debug("Transition step of %s was not published", device.title)
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop all ramps."""
+        self._ramps.clear()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
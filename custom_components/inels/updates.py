@@ -0,0 +1,116 @@
+"""Batched state writes of iNELS entities."""
+from __future__ import annotations
+
+import asyncio
+from itertools import islice
+import math
+import threading
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+
+from .const import LOGGER
+from .metrics import LatencyStats
+
+
+class InelsUpdateQueue:
+    """Entities with a changed state, written to the state machine in batches.
+
+    Entities are queued from the network thread of paho or from the event
+    loop. The loop is woken up once per batch instead of once per entity and
+    at most max_batch states are written before control goes back to the
+    loop. An entity queued while the queue is idle is written on the next
+    iteration of the loop together with everything queued in the same tick,
+    under sustained bursts a batch is flushed at most once per latency bound,
+    so no entity waits longer than the bound.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_batch: int, latency: float) -> None:
+        """Initialize the queue, must be called from the event loop."""
+        self._hass = hass
+        self._max_batch = max_batch
+        self._latency = latency
+        self._loop_thread = threading.get_ident()
+
+        self._lock = threading.Lock()
+        self._dirty: dict[Entity, None] = {}
+        self._scheduled = False
+        self._handle: asyncio.Handle | None = None
+        self._last_flush = -math.inf
+
+        self.batches = 0
+        self.writes = 0
+        self.flush = LatencyStats()
+
+    @property
+    def pending(self) -> int:
+        """Number of entities waiting for their state write."""
+        return len(self._dirty)
+
+    def schedule(self, entity: Entity) -> None:
+        """Queue the state write of the entity, safe to call from any thread."""
+        with self._lock:
+            self._dirty[entity] = None
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        if threading.get_ident() == self._loop_thread:
+            self._async_schedule_flush()
+        else:
+            self._hass.loop.call_soon_threadsafe(self._async_schedule_flush)
+
+    def discard(self, entity: Entity) -> None:
+        """Drop the queued state write of a removed entity."""
+        with self._lock:
+            self._dirty.pop(entity, None)
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        """Flush the queue on the next tick, later if the last flush was recent."""
+        loop = self._hass.loop
+        if (delay := self._last_flush + self._latency - loop.time()) > 0:
+            self._handle = loop.call_later(delay, self._async_flush)
+        else:
+            self._handle = loop.call_soon(self._async_flush)
+
+    @callback
+    def _async_flush(self) -> None:
+        """Write the states of one batch, continue with the rest on the next tick."""
+        started = time.monotonic()
+        self._last_flush = self._hass.loop.time()
+        with self._lock:
+            batch = list(islice(self._dirty, self._max_batch))
+            for entity in batch:
+                del self._dirty[entity]
+            remaining = bool(self._dirty)
+            if not remaining:
+                self._scheduled = False
+                self._handle = None
+
+        self.batches += 1
+        try:
+            for entity in batch:
+                try:
+                    entity.async_write_ha_state()
+                except Exception:  # pylint: disable=broad-except
+                    # one bad frame must not stop the writes of the others
+                    LOGGER.exception(
+                        "Could not write the state of %s", entity.entity_id
+                    )
+            self.writes += len(batch)
+            self.flush.record(time.monotonic() - started)
+        finally:
+            if remaining:
+                self._handle = self._hass.loop.call_soon(self._async_flush)
+
+    @callback
+    def async_stop(self) -> None:
+        """Drop the queued entities."""
+        with self._lock:
+            self._dirty.clear()
+            self._scheduled = False
+            if self._handle is not None:
+                self._handle.cancel()
+                self._handle = None
@@ -0,0 +1,106 @@
+"""Tests of the decoding of bus sensor values against the legacy decoder."""
+from __future__ import annotations
+
+import random
+
+from inelsmqtt.const import BUS_SENSOR_ERRORS
+import pytest
+
+from benchmarks.bus_values import error_value, legacy_process_value
+from custom_components.inels.bus_values import (
+    NUMPY_MIN_VALUES,
+    UNIFORM_MIN_VALUES,
+    BusValueArray,
+    decode_bus_value,
+    decode_bus_values,
+)
+
+WIDTHS = range(1, 17)
+
+
+def _values(rng: random.Random, width: int, count: int) -> list[str]:
+    """Random hex values of the width, with the error codes and near misses."""
+    values = [f"{rng.randrange(16**width):0{width}X}" for _ in range(count)]
+    if width >= 2:
+        values += [error_value(width, code) for code in range(16)]
+        # an error code with one middle digit off
+        values.append(f"7{'F' * (width - 3)}E9" if width >= 3 else "69")
+    return values
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_single_values_match_legacy(width: int) -> None:
+    """Values, error codes and lower case decode as before."""
+    values = _values(random.Random(width), width, 200)
+    values += [value.lower() for value in values]
+    for value in values:
+        assert decode_bus_value(value) == legacy_process_value(value), value
+
+
+def test_error_codes_are_reported() -> None:
+    """Every error code of the library is reported, its letters in upper case."""
+    for code in BUS_SENSOR_ERRORS:
+        value = error_value(4, code)
+        assert decode_bus_value(value) == (int(value, 16) / 100, True)
+        assert decode_bus_value(value.lower())[1] == (code == 0x9)
+
+
+@pytest.mark.parametrize(
+    "count", [1, UNIFORM_MIN_VALUES, NUMPY_MIN_VALUES, NUMPY_MIN_VALUES * 4]
+)
+@pytest.mark.parametrize("width", WIDTHS)
+def test_arrays_match_legacy(width: int, count: int) -> None:
+    """Arrays decode as their values one by one did before."""
+    rng = random.Random(width * count)
+    values = _values(rng, width, count)[:count]
+    for values in (values, [value.lower() for value in values]):
+        assert decode_bus_values(values) == [
+            legacy_process_value(value) for value in values
+        ]
+
+
+def test_array_of_odd_widths_matches_legacy() -> None:
+    """Arrays of values of different widths decode one by one."""
+    rng = random.Random(0)
+    values = [
+        f"{rng.randrange(16**width):0{width}X}" for width in (3, 5, 4, 7) * 20
+    ] + [error_value(5)]
+    assert decode_bus_values(values) == [
+        legacy_process_value(value) for value in values
+    ]
+
+
+def test_wide_values_decode_alike_on_every_path() -> None:
+    """Values above 2**53 are rounded to a float before the division.
+
+    numpy converts them to a float first, an exact division of the integer
+    would differ from it in the last bit.
+    """
+    pytest.importorskip("numpy")
+    rng = random.Random(0)
+    values = [f"{rng.getrandbits(63) | 1 << 63:016X}" for _ in range(NUMPY_MIN_VALUES)]
+    legacy = [legacy_process_value(value) for value in values]
+    assert any(
+        int(value, 16) / 100 != decoded
+        for value, (decoded, _) in zip(values, legacy)
+    )
+
+    assert decode_bus_values(values) == legacy
+    assert decode_bus_values(values[:UNIFORM_MIN_VALUES]) == legacy[:UNIFORM_MIN_VALUES]
+    assert [decode_bus_value(value) for value in values] == legacy
+
+
+def test_array_is_decoded_once_per_frame() -> None:
+    """The sensors of one array share the decode of a frame."""
+    array = BusValueArray()
+    frame = ["0A10", error_value(4), "0064", "0000"]
+    assert [array.get(frame, index) for index in range(4)] == [
+        legacy_process_value(value) for value in frame
+    ]
+    decoded = array._decoded
+    array.get(frame, 1)
+    assert array._decoded is decoded
+
+    # a new frame is a new list
+    array.get(list(frame), 1)
+    assert array._decoded is not decoded
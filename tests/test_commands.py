@@ -0,0 +1,132 @@
+"""Tests of the publishing of device values."""
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from inelsmqtt import InelsMqtt
+from inelsmqtt.const import MQTT_HOST, MQTT_PORT
+from inelsmqtt.devices import Device
+from paho.mqtt.client import MQTT_ERR_SUCCESS
+
+from custom_components.inels.commands import (
+    async_publish_ha_value,
+    encode_command,
+    encode_ha_value,
+)
+from custom_components.inels.metrics import PayloadStats
+
+STATE_TOPIC = "inels/status/0011/02/01AB"
+ADDRESSES = 8
+
+
+def _device() -> Device:
+    """Relay reporting it is off, on its own transport."""
+    mqtt = InelsMqtt({MQTT_HOST: "localhost", MQTT_PORT: 1883})
+    mqtt.messages()[STATE_TOPIC] = b"00\n00\n"
+    device = Device(mqtt, STATE_TOPIC)
+    device.get_value()
+    return device
+
+
+def _turned_on(device: Device) -> Any:
+    """State of the device with the relay on."""
+    value = device.state
+    value.simple_relay[0].is_on = True
+    return value
+
+
+def test_published_value_is_the_state_as_with_set_ha_value() -> None:
+    """The connected paho client is used, the device state follows the library."""
+    library = _device()
+    with patch.object(library.mqtt, "publish", return_value=True) as publish:
+        library.set_ha_value(_turned_on(library))
+    expected = publish.call_args.args[1]
+
+    async def _run() -> None:
+        device = _device()
+        client = device.mqtt.client
+        hass: Any = SimpleNamespace()
+        with patch.object(client, "is_connected", return_value=True), patch.object(
+            client, "publish", return_value=SimpleNamespace(rc=MQTT_ERR_SUCCESS)
+        ) as publish:
+            assert await async_publish_ha_value(hass, device, _turned_on(device))
+
+        publish.assert_called_once_with(device.set_topic, expected, 0, True)
+        assert device.values.inels_set_value == library.values.inels_set_value
+        assert device.state is device.values.ha_value
+        assert device.state.simple_relay[0].is_on
+
+    asyncio.run(_run())
+
+
+def _addressed(device_type: str) -> Device:
+    """CU3 virtual bits or integers reporting zero on all addresses."""
+    mqtt = InelsMqtt({MQTT_HOST: "localhost", MQTT_PORT: 1883})
+    topic = f"inels/status/0011/{device_type}/01AC"
+    mqtt.messages()[topic] = json.dumps(
+        {"state": {f"{addr:03}": 0 for addr in range(ADDRESSES)}}
+    ).encode()
+    device = Device(mqtt, topic)
+    device.get_value()
+    return device
+
+
+def test_changed_bit_is_sent_alone() -> None:
+    """Only the changed address of the virtual bits is published."""
+    device = _addressed("bits")
+    value = device.state
+    value.bit[3].is_on = True
+    stats = PayloadStats()
+
+    payload = encode_command(device, value, stats)
+
+    assert json.loads(payload) == {"cmd": {"003": 1}}
+    assert stats.as_dict()["bits"]["delta_commands"] == 1
+
+
+def test_changed_integers_are_sent_alone() -> None:
+    """Only the changed addresses of the virtual integers are published."""
+    device = _addressed("integers")
+    value = device.state
+    value.number[1].value = 7
+    value.number[5].value = 300
+
+    payload = encode_command(device, value)
+
+    assert json.loads(payload) == {"cmd": {"001": 7, "005": 300}}
+
+
+def test_unchanged_value_is_sent_as_full_frame() -> None:
+    """Without a changed address the whole state is published."""
+    device = _addressed("bits")
+
+    assert encode_command(device, device.state) == encode_ha_value(
+        device, device.state
+    )
+
+
+def test_value_without_published_state_is_sent_as_full_frame() -> None:
+    """Without a decodable published state there is nothing to compare with."""
+    device = _addressed("bits")
+    value = device.state
+    value.bit[3].is_on = True
+    del device.mqtt.messages()[device.state_topic]
+
+    payload = encode_command(device, value)
+
+    assert payload == encode_ha_value(device, value)
+    assert len(json.loads(payload)["cmd"]) == ADDRESSES
+
+
+def test_positional_value_is_sent_as_full_frame() -> None:
+    """Devices with positional frames always get the whole state."""
+    device = _device()
+    value = _turned_on(device)
+    stats = PayloadStats()
+
+    assert encode_command(device, value, stats) == encode_ha_value(device, value)
+    assert stats.as_dict()["02"]["delta_commands"] == 0
@@ -0,0 +1,77 @@
+"""Tests of the discovery and its cache on the paho transport."""
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+from inelsmqtt import InelsMqtt
+from inelsmqtt.const import (
+    MQTT_HOST,
+    MQTT_PORT,
+    MQTT_TOTAL_CONNECTED_TOPIC,
+    MQTT_TOTAL_STATUS_TOPIC,
+)
+
+from custom_components.inels.discovery import InelsStreamingDiscovery, _restore_value
+
+STATE_TOPIC = "inels/status/0011/02/01AB"
+
+
+def _hass() -> Any:
+    """Home Assistant running the executor jobs inline."""
+
+    async def _async_add_executor_job(target: Any, *args: Any) -> Any:
+        return target(*args)
+
+    return SimpleNamespace(
+        loop=asyncio.get_running_loop(),
+        async_add_executor_job=_async_add_executor_job,
+    )
+
+
+def _mqtt() -> MagicMock:
+    """Paho transport of the library subscribed to everything."""
+    mqtt = MagicMock(spec=InelsMqtt)
+    mqtt.client = MagicMock()
+    mqtt.is_subscribed.return_value = True
+    return mqtt
+
+
+def _discovery(mqtt: MagicMock) -> InelsStreamingDiscovery:
+    """Discovery of a config entry without cached devices."""
+    return InelsStreamingDiscovery(
+        _hass(), MagicMock(), mqtt, [], MagicMock(), MagicMock(), lambda: None
+    )
+
+
+def test_received_topics_are_processed_on_the_loop() -> None:
+    """The message handler of the library is wrapped, not replaced."""
+
+    async def _run() -> None:
+        mqtt = _mqtt()
+        on_message = mqtt._InelsMqtt__on_message  # pylint: disable=protected-access
+        discovery = _discovery(mqtt)
+        with patch.object(discovery, "_async_process_topic") as process:
+            await discovery.async_subscribe()
+            msg = SimpleNamespace(topic=STATE_TOPIC, payload=b"")
+            mqtt.client.on_message(None, None, msg)
+            await asyncio.sleep(0)
+
+        on_message.assert_called_once_with(None, None, msg)
+        process.assert_called_once_with(msg.topic)
+        mqtt.subscribe.assert_called_once_with(
+            [MQTT_TOTAL_CONNECTED_TOPIC, MQTT_TOTAL_STATUS_TOPIC]
+        )
+
+    asyncio.run(_run())
+
+
+def test_cached_state_is_the_current_and_the_last_value() -> None:
+    """Restored frames are seeded like received ones."""
+    mqtt = InelsMqtt({MQTT_HOST: "localhost", MQTT_PORT: 1883})
+    _restore_value(mqtt, STATE_TOPIC, b"\x01\n")
+
+    assert mqtt.messages()[STATE_TOPIC] == b"\x01\n"
+    assert mqtt.last_value(STATE_TOPIC) == b"\x01\n"
@@ -0,0 +1,52 @@
+"""Tests of the entities on a synthetic installation."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+from homeassistant.core import Event
+from homeassistant.helpers import entity_registry as er
+
+from benchmarks.catalog import build_catalog, synthetic_devices
+from benchmarks.fakes import FakeInelsMqtt
+from benchmarks.harness import async_installation
+from custom_components.inels.const import ENTITIES, EVENT_ALERT
+
+RENAMED = "switch.renamed_relay"
+
+
+def test_alert_is_fired_with_the_registered_entity_id() -> None:
+    """Alerts raised by the cached state are reported once the entity is added."""
+
+    async def _run() -> None:
+        devices = synthetic_devices(build_catalog(), 78)
+        # the second frames of the catalog raise the alerts of the relays
+        async with async_installation(
+            (device.state_topic, device.frames[1]) for device in devices
+        ) as installation:
+            hass = installation.hass
+            events: list[Event] = []
+            hass.bus.async_listen(EVENT_ALERT, events.append)
+
+            relay = next(
+                entity_id
+                for entity_id, entity in installation.inels_data[ENTITIES].items()
+                # pylint: disable-next=protected-access
+                if entity_id.startswith("switch.") and entity._active_alerts
+            )
+            er.async_get(hass).async_update_entity(relay, new_entity_id=RENAMED)
+            await hass.async_block_till_done()
+            events.clear()
+            # the new entities suggest the entity_id the registry has renamed
+            with patch("custom_components.inels.InelsHaMqtt", FakeInelsMqtt):
+                await hass.config_entries.async_reload(installation.entry.entry_id)
+            await hass.async_block_till_done()
+
+        raised = {
+            event.data["entity_id"] for event in events if event.data["active"]
+        }
+        assert RENAMED in raised
+        assert relay not in raised
+        assert None not in raised
+
+    asyncio.run(_run())
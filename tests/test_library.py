@@ -0,0 +1,39 @@
+"""Tests of the private attributes of the pinned library."""
+from __future__ import annotations
+
+from importlib import metadata
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from custom_components.inels.library import missing_library_attributes
+
+MANIFEST = Path(__file__).parents[1] / "custom_components" / "inels" / "manifest.json"
+LIBRARY = "elkoep-mqtt"
+
+
+def test_pinned_library_has_the_private_attributes() -> None:
+    """The private attributes the integration uses exist in the pinned library.
+
+    A new version of the library must be checked before the requirement is
+    bumped.
+    """
+    requirement = f"{LIBRARY}=={metadata.version(LIBRARY)}"
+    assert requirement in json.loads(MANIFEST.read_text())["requirements"]
+    assert requirement == "elkoep-mqtt==0.2.33b10"
+    assert not missing_library_attributes(paho=True)
+
+
+def test_missing_attribute_is_reported() -> None:
+    """A renamed attribute is reported with its class."""
+    with patch("custom_components.inels.library.DEVICE_STATE", "_Device__renamed"):
+        assert missing_library_attributes(paho=False) == ["Device._Device__renamed"]
+
+
+def test_paho_attributes_are_checked_only_for_paho() -> None:
+    """The transport of the MQTT integration does not need them."""
+    renamed = "_InelsMqtt__renamed"
+    for attribute in ("MQTT_LAST_VALUES", "MQTT_MESSAGE_HANDLER"):
+        with patch(f"custom_components.inels.library.{attribute}", renamed):
+            assert not missing_library_attributes(paho=False)
+            assert missing_library_attributes(paho=True) == [f"InelsMqtt.{renamed}"]
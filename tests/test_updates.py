@@ -0,0 +1,148 @@
+"""Tests of the batched state writes."""
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+from custom_components.inels.updates import InelsUpdateQueue
+
+LATENCY = 0.05
+
+
+class _Entity:
+    """Entity counting its state writes."""
+
+    entity_id = "switch.test"
+
+    def __init__(self) -> None:
+        """Initialize the entity."""
+        self.writes = 0
+
+    def async_write_ha_state(self) -> None:
+        """Count the state write."""
+        self.writes += 1
+
+
+class _FailingEntity(_Entity):
+    """Entity raising on every state write."""
+
+    def async_write_ha_state(self) -> None:
+        """Fail the state write."""
+        super().async_write_ha_state()
+        raise ValueError("bad frame")
+
+
+def _queue(max_batch: int = 200) -> InelsUpdateQueue:
+    """Queue on the running loop."""
+    hass = SimpleNamespace(loop=asyncio.get_running_loop())
+    return InelsUpdateQueue(hass, max_batch, LATENCY)  # type: ignore[arg-type]
+
+
+def test_isolated_update_is_written_on_the_next_iteration() -> None:
+    """An update of an idle queue does not wait for the latency bound."""
+
+    async def _run() -> None:
+        queue = _queue()
+        entity = _Entity()
+        queue.schedule(entity)
+        assert entity.writes == 0
+        await asyncio.sleep(0)
+        assert entity.writes == 1
+        assert queue.pending == 0
+
+    asyncio.run(_run())
+
+
+def test_updates_of_one_tick_are_written_in_one_batch() -> None:
+    """Entities queued in the same tick share the flush."""
+
+    async def _run() -> None:
+        queue = _queue()
+        entities = [_Entity() for _ in range(10)]
+        for entity in entities:
+            queue.schedule(entity)
+        await asyncio.sleep(0)
+        assert [entity.writes for entity in entities] == [1] * 10
+        assert queue.batches == 1
+
+    asyncio.run(_run())
+
+
+def test_burst_is_flushed_at_most_once_per_latency() -> None:
+    """An update right after a flush waits for the rest of the bound."""
+
+    async def _run() -> None:
+        loop = asyncio.get_running_loop()
+        queue = _queue()
+        entity = _Entity()
+        queue.schedule(entity)
+        await asyncio.sleep(0)
+        queued = loop.time()
+        queue.schedule(entity)
+        await asyncio.sleep(0)
+        assert entity.writes == 1
+
+        while entity.writes == 1:
+            await asyncio.sleep(0.001)
+        waited = loop.time() - queued
+        assert LATENCY * 0.5 < waited < LATENCY * 4
+        assert queue.batches == 2
+
+    asyncio.run(_run())
+
+
+def test_large_batch_continues_on_the_next_iteration() -> None:
+    """No more than max_batch states are written per flush."""
+
+    async def _run() -> None:
+        queue = _queue(max_batch=3)
+        entities = [_Entity() for _ in range(5)]
+        for entity in entities:
+            queue.schedule(entity)
+        await asyncio.sleep(0)
+        assert sum(entity.writes for entity in entities) == 3
+        await asyncio.sleep(0)
+        assert sum(entity.writes for entity in entities) == 5
+
+    asyncio.run(_run())
+
+
+def test_failing_write_does_not_stop_the_queue(caplog: Any) -> None:
+    """The other entities of the batch and later batches are still written."""
+
+    async def _run() -> None:
+        queue = _queue(max_batch=2)
+        failing = _FailingEntity()
+        entities = [_Entity() for _ in range(3)]
+        queue.schedule(failing)
+        for entity in entities:
+            queue.schedule(entity)
+        await asyncio.sleep(LATENCY * 2)
+        assert queue.pending == 0
+        assert failing.writes == 1
+        assert [entity.writes for entity in entities] == [1, 1, 1]
+
+        # later updates are flushed again
+        queue.schedule(failing)
+        queue.schedule(entities[0])
+        await asyncio.sleep(LATENCY * 2)
+        assert failing.writes == 2
+        assert entities[0].writes == 2
+
+    asyncio.run(_run())
+    assert "Could not write the state of switch.test" in caplog.text
+
+
+def test_stop_drops_the_queued_updates() -> None:
+    """Stopped queue writes nothing."""
+
+    async def _run() -> None:
+        queue = _queue()
+        entity = _Entity()
+        queue.schedule(entity)
+        queue.async_stop()
+        await asyncio.sleep(LATENCY)
+        assert entity.writes == 0
+
+    asyncio.run(_run())